@@ -0,0 +1,61 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from app.core.config import settings
+from app.core.database import Base, engine
+from app.database import models  # registra las tablas en Base.metadata
+
+config = context.config
+
+if config.config_file_name is not None and config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
+
+# Metadata única de los modelos, usada por --autogenerate
+target_metadata = Base.metadata
+
+def _is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+def run_migrations_offline() -> None:
+    """Genera el SQL de las migraciones sin conectarse (alembic upgrade --sql)"""
+    context.configure(
+        url=settings.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=_is_sqlite(settings.DATABASE_URL)
+    )
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online() -> None:
+    """Aplica las migraciones usando el engine de la aplicación
+    
+    Así las migraciones pasan por el mismo pool y el mismo perfil de SQLite.
+    Se puede pasar una conexión ya abierta en config.attributes["connection"].
+    """
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        _run_with_connection(connection)
+        return
+    
+    with engine.connect() as connection:
+        _run_with_connection(connection)
+
+def _run_with_connection(connection) -> None:
+    context.configure(
+        connection=connection,
+        target_metadata=target_metadata,
+        # SQLite no soporta la mayoría de ALTER TABLE: usar el modo batch
+        render_as_batch=connection.dialect.name == "sqlite"
+    )
+    
+    with context.begin_transaction():
+        context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
\ No newline at end of file
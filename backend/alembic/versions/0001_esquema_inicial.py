@@ -0,0 +1,226 @@
+"""esquema inicial
+
+Tablas e índices tal como los creaba Base.metadata.create_all antes de usar
+Alembic. Las bases de datos existentes se marcan en esta revisión
+(ver app.database.migrations.upgrade_database) en lugar de ejecutarla.
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-17 02:02:47.202494
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('drivers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('cedula', sa.String(length=20), nullable=False),
+    sa.Column('nombre_completo', sa.String(length=100), nullable=False),
+    sa.Column('telefono', sa.String(length=20), nullable=True),
+    sa.Column('email', sa.String(length=100), nullable=True),
+    sa.Column('direccion', sa.Text(), nullable=True),
+    sa.Column('numero_licencia', sa.String(length=30), nullable=False),
+    sa.Column('categoria_licencia', sa.String(length=10), nullable=False),
+    sa.Column('fecha_vencimiento_licencia', sa.Date(), nullable=False),
+    sa.Column('estado', sa.Enum('DISPONIBLE', 'EN_SERVICIO', 'DESCANSO', 'INCAPACITADO', name='driverstatus'), nullable=True),
+    sa.Column('fecha_ingreso', sa.Date(), nullable=True),
+    sa.Column('años_experiencia', sa.Integer(), nullable=True),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('numero_licencia')
+    )
+    with op.batch_alter_table('drivers', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_drivers_cedula'), ['cedula'], unique=True)
+        batch_op.create_index(batch_op.f('ix_drivers_id'), ['id'], unique=False)
+
+    op.create_table('transport_requests',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('numero_solicitud', sa.String(length=50), nullable=True),
+    sa.Column('nombre_solicitante', sa.String(length=100), nullable=False),
+    sa.Column('dependencia', sa.String(length=100), nullable=True),
+    sa.Column('telefono_contacto', sa.String(length=20), nullable=True),
+    sa.Column('email_contacto', sa.String(length=100), nullable=True),
+    sa.Column('fecha_solicitud', sa.DateTime(), nullable=False),
+    sa.Column('fecha_viaje', sa.DateTime(), nullable=False),
+    sa.Column('origen', sa.String(length=200), nullable=False),
+    sa.Column('destino', sa.String(length=200), nullable=False),
+    sa.Column('proposito_viaje', sa.Text(), nullable=True),
+    sa.Column('numero_pasajeros', sa.Integer(), nullable=True),
+    sa.Column('estado', sa.Enum('PENDIENTE', 'ASIGNADO', 'EN_CURSO', 'COMPLETADO', 'CANCELADO', name='requeststatus'), nullable=True),
+    sa.Column('prioridad', sa.Enum('BAJA', 'MEDIA', 'ALTA', 'CRITICA', name='alertpriority'), nullable=True),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.Column('requiere_vehiculo_especial', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('transport_requests', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_transport_requests_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_transport_requests_numero_solicitud'), ['numero_solicitud'], unique=True)
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=100), nullable=False),
+    sa.Column('hashed_password', sa.String(length=100), nullable=False),
+    sa.Column('nombre_completo', sa.String(length=100), nullable=True),
+    sa.Column('rol', sa.String(length=30), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('notificaciones_email', sa.Boolean(), nullable=True),
+    sa.Column('notificaciones_push', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('last_login', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_email'), ['email'], unique=True)
+        batch_op.create_index(batch_op.f('ix_users_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_username'), ['username'], unique=True)
+
+    op.create_table('vehicles',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('placa', sa.String(length=10), nullable=False),
+    sa.Column('marca', sa.String(length=50), nullable=False),
+    sa.Column('modelo', sa.String(length=50), nullable=False),
+    sa.Column('año', sa.Integer(), nullable=False),
+    sa.Column('color', sa.String(length=30), nullable=True),
+    sa.Column('tipo_vehiculo', sa.Enum('SEDAN', 'SUV', 'CAMIONETA', 'BUS', name='vehicletype'), nullable=False),
+    sa.Column('numero_motor', sa.String(length=50), nullable=True),
+    sa.Column('numero_chasis', sa.String(length=50), nullable=True),
+    sa.Column('cilindraje', sa.Integer(), nullable=True),
+    sa.Column('capacidad_pasajeros', sa.Integer(), nullable=True),
+    sa.Column('kilometraje', sa.Integer(), nullable=True),
+    sa.Column('estado', sa.Enum('DISPONIBLE', 'EN_USO', 'MANTENIMIENTO', 'FUERA_DE_SERVICIO', name='vehiclestatus'), nullable=True),
+    sa.Column('fecha_compra', sa.Date(), nullable=True),
+    sa.Column('fecha_soat', sa.Date(), nullable=True),
+    sa.Column('fecha_tecnicomecanica', sa.Date(), nullable=True),
+    sa.Column('fecha_seguro', sa.Date(), nullable=True),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.Column('activo', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('vehicles', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_vehicles_id'), ['id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_vehicles_placa'), ['placa'], unique=True)
+
+    op.create_table('assignments',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('solicitud_id', sa.Integer(), nullable=False),
+    sa.Column('vehiculo_id', sa.Integer(), nullable=False),
+    sa.Column('conductor_id', sa.Integer(), nullable=False),
+    sa.Column('fecha_asignacion', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('kilometraje_inicio', sa.Integer(), nullable=True),
+    sa.Column('kilometraje_fin', sa.Integer(), nullable=True),
+    sa.Column('fecha_inicio_real', sa.DateTime(), nullable=True),
+    sa.Column('fecha_fin_real', sa.DateTime(), nullable=True),
+    sa.Column('observaciones_conductor', sa.Text(), nullable=True),
+    sa.Column('calificacion_servicio', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['conductor_id'], ['drivers.id'], ),
+    sa.ForeignKeyConstraint(['solicitud_id'], ['transport_requests.id'], ),
+    sa.ForeignKeyConstraint(['vehiculo_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_assignments_id'), ['id'], unique=False)
+
+    op.create_table('maintenance',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vehiculo_id', sa.Integer(), nullable=False),
+    sa.Column('tipo_mantenimiento', sa.Enum('PREVENTIVO', 'CORRECTIVO', 'EMERGENCIA', 'REVISION_TECNICA', name='maintenancetype'), nullable=False),
+    sa.Column('estado', sa.Enum('PROGRAMADO', 'EN_PROCESO', 'COMPLETADO', 'CANCELADO', name='maintenancestatus'), nullable=True),
+    sa.Column('fecha_programada', sa.DateTime(), nullable=False),
+    sa.Column('fecha_inicio', sa.DateTime(), nullable=True),
+    sa.Column('fecha_finalizacion', sa.DateTime(), nullable=True),
+    sa.Column('descripcion', sa.Text(), nullable=False),
+    sa.Column('kilometraje_actual', sa.Integer(), nullable=True),
+    sa.Column('costo_estimado', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('costo_real', sa.Numeric(precision=10, scale=2), nullable=True),
+    sa.Column('taller_proveedor', sa.String(length=100), nullable=True),
+    sa.Column('contacto_taller', sa.String(length=50), nullable=True),
+    sa.Column('observaciones', sa.Text(), nullable=True),
+    sa.Column('repuestos_utilizados', sa.Text(), nullable=True),
+    sa.Column('proximo_mantenimiento_km', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['vehiculo_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('maintenance', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_maintenance_id'), ['id'], unique=False)
+
+    op.create_table('maintenance_alerts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('vehiculo_id', sa.Integer(), nullable=False),
+    sa.Column('tipo_alerta', sa.String(length=50), nullable=False),
+    sa.Column('mensaje', sa.Text(), nullable=False),
+    # El tipo alertpriority ya fue creado con transport_requests (PostgreSQL)
+    sa.Column('prioridad', postgresql.ENUM('BAJA', 'MEDIA', 'ALTA', 'CRITICA', name='alertpriority', create_type=False), nullable=False),
+    sa.Column('fecha_creacion', sa.DateTime(), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.Column('fecha_vencimiento', sa.DateTime(), nullable=True),
+    sa.Column('activa', sa.Boolean(), nullable=True),
+    sa.Column('vista', sa.Boolean(), nullable=True),
+    sa.ForeignKeyConstraint(['vehiculo_id'], ['vehicles.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('maintenance_alerts', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_maintenance_alerts_id'), ['id'], unique=False)
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('maintenance_alerts', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_maintenance_alerts_id'))
+
+    op.drop_table('maintenance_alerts')
+    with op.batch_alter_table('maintenance', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_maintenance_id'))
+
+    op.drop_table('maintenance')
+    with op.batch_alter_table('assignments', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_assignments_id'))
+
+    op.drop_table('assignments')
+    with op.batch_alter_table('vehicles', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_vehicles_placa'))
+        batch_op.drop_index(batch_op.f('ix_vehicles_id'))
+
+    op.drop_table('vehicles')
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_username'))
+        batch_op.drop_index(batch_op.f('ix_users_id'))
+        batch_op.drop_index(batch_op.f('ix_users_email'))
+
+    op.drop_table('users')
+    with op.batch_alter_table('transport_requests', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_transport_requests_numero_solicitud'))
+        batch_op.drop_index(batch_op.f('ix_transport_requests_id'))
+
+    op.drop_table('transport_requests')
+    with op.batch_alter_table('drivers', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_drivers_id'))
+        batch_op.drop_index(batch_op.f('ix_drivers_cedula'))
+
+    op.drop_table('drivers')
+
+    # En PostgreSQL los tipos ENUM sobreviven a las tablas que los usan
+    if op.get_bind().dialect.name == "postgresql":
+        for enum_name in ("alertpriority", "requeststatus", "maintenancestatus", "maintenancetype", "vehiclestatus", "vehicletype", "driverstatus"):
+            sa.Enum(name=enum_name).drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,73 @@
+"""índices compuestos y parciales para las consultas frecuentes
+
+En PostgreSQL los índices se crean con CREATE INDEX CONCURRENTLY, fuera de la
+transacción de la migración, para no bloquear escrituras sobre tablas grandes.
+En SQLite se crean dentro de batch_alter_table. En ambos casos se omiten los
+que ya existen (bases creadas con create_all después de definirlos en los modelos).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 02:20:11.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabla, índice, columnas, opciones por dialecto)
+INDEXES = [
+    ('vehicles', 'ix_vehicles_activo_estado', ['activo', 'estado'], {}),
+    ('drivers', 'ix_drivers_activo_estado_licencia', ['activo', 'estado', 'fecha_vencimiento_licencia'], {}),
+    ('maintenance', 'ix_maintenance_vehiculo_estado_fecha', ['vehiculo_id', 'estado', 'fecha_programada'], {}),
+    ('maintenance', 'ix_maintenance_estado_fecha', ['estado', 'fecha_programada'], {}),
+    ('transport_requests', 'ix_transport_requests_estado_fecha_viaje', ['estado', 'fecha_viaje'], {}),
+    ('assignments', 'ix_assignments_vehiculo_fecha', ['vehiculo_id', 'fecha_asignacion'], {}),
+    ('assignments', 'ix_assignments_conductor_fecha', ['conductor_id', 'fecha_asignacion'], {}),
+    ('assignments', 'ix_assignments_solicitud', ['solicitud_id'], {}),
+    ('maintenance_alerts', 'ix_maintenance_alerts_vehiculo_tipo_activa', ['vehiculo_id', 'tipo_alerta', 'activa'], {}),
+    ('maintenance_alerts', 'ix_maintenance_alerts_activas_fecha', ['fecha_creacion'], {
+        'sqlite_where': sa.text('activa = 1'),
+        'postgresql_where': sa.text('activa = true')
+    }),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+        with op.get_context().autocommit_block():
+            for table_name, index_name, columns, options in INDEXES:
+                op.create_index(
+                    index_name,
+                    table_name,
+                    columns,
+                    postgresql_concurrently=True,
+                    if_not_exists=True,
+                    **options
+                )
+        return
+
+    for table_name, index_name, columns, options in INDEXES:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.create_index(index_name, columns, if_not_exists=True, **options)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for table_name, index_name, columns, options in reversed(INDEXES):
+                op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+        return
+
+    for table_name, index_name, columns, options in reversed(INDEXES):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_index(index_name, if_exists=True)
\ No newline at end of file
@@ -0,0 +1,61 @@
+"""índices para la paginación por cursor de los listados
+
+Cubren el orden estable (fecha + id) de los listados de solicitudes,
+asignaciones y mantenimientos. Igual que en 0002, en PostgreSQL se crean con
+CREATE INDEX CONCURRENTLY fuera de la transacción de la migración.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 02:31:40.772014
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (tabla, índice, columnas)
+INDEXES = [
+    ('transport_requests', 'ix_transport_requests_created_id', ['created_at', 'id']),
+    ('assignments', 'ix_assignments_fecha_id', ['fecha_asignacion', 'id']),
+    ('maintenance', 'ix_maintenance_fecha_id', ['fecha_programada', 'id']),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+        with op.get_context().autocommit_block():
+            for table_name, index_name, columns in INDEXES:
+                op.create_index(
+                    index_name,
+                    table_name,
+                    columns,
+                    postgresql_concurrently=True,
+                    if_not_exists=True
+                )
+        return
+    
+    for table_name, index_name, columns in INDEXES:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.create_index(index_name, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for table_name, index_name, columns in reversed(INDEXES):
+                op.drop_index(index_name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
+        return
+    
+    for table_name, index_name, columns in reversed(INDEXES):
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.drop_index(index_name, if_exists=True)
\ No newline at end of file
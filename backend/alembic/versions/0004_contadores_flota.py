@@ -0,0 +1,75 @@
+"""tabla fleet_counters con los contadores del dashboard
+
+Los contadores se mantienen en cada escritura (app.services.fleet_counters) y
+se reconcilian periódicamente contra las tablas de origen. Esta migración crea
+la tabla y la llena con los valores actuales, con las mismas claves que usa el
+servicio: valores de los enums en minúscula (la columna guarda el nombre).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 03:41:08.530217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+vehicles = sa.table('vehicles', sa.column('id'), sa.column('tipo_vehiculo'), sa.column('estado'), sa.column('activo'))
+drivers = sa.table('drivers', sa.column('id'), sa.column('estado'), sa.column('fecha_vencimiento_licencia'), sa.column('activo'))
+transport_requests = sa.table('transport_requests', sa.column('id'), sa.column('estado'))
+maintenance_alerts = sa.table('maintenance_alerts', sa.column('id'), sa.column('activa'))
+
+
+def _text(column):
+    """Valor de la columna como texto en minúscula ('' si es NULL)"""
+    return sa.func.lower(sa.func.coalesce(sa.cast(column, sa.String(30)), ''))
+
+
+def upgrade() -> None:
+    fleet_counters = op.create_table('fleet_counters',
+    sa.Column('grupo', sa.String(length=30), nullable=False),
+    sa.Column('clave', sa.String(length=60), nullable=False),
+    sa.Column('valor', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+    sa.PrimaryKeyConstraint('grupo', 'clave')
+    )
+    
+    # Valores iniciales (grupo, clave, valor) a partir de las tablas de origen
+    sources = [
+        sa.select(
+            sa.literal('vehiculos'),
+            _text(vehicles.c.tipo_vehiculo) + sa.literal(':') + _text(vehicles.c.estado),
+            sa.func.count(vehicles.c.id)
+        ).where(vehicles.c.activo == sa.true()).group_by(vehicles.c.tipo_vehiculo, vehicles.c.estado),
+        sa.select(
+            sa.literal('conductores'),
+            _text(drivers.c.estado) + sa.literal(':') + _text(drivers.c.fecha_vencimiento_licencia),
+            sa.func.count(drivers.c.id)
+        ).where(drivers.c.activo == sa.true()).group_by(drivers.c.estado, drivers.c.fecha_vencimiento_licencia),
+        sa.select(
+            sa.literal('solicitudes'),
+            _text(transport_requests.c.estado),
+            sa.func.count(transport_requests.c.id)
+        ).group_by(transport_requests.c.estado),
+        sa.select(
+            sa.literal('alertas'),
+            sa.literal('activas'),
+            sa.func.count(maintenance_alerts.c.id)
+        ).where(maintenance_alerts.c.activa == sa.true()).having(sa.func.count(maintenance_alerts.c.id) > 0),
+    ]
+    
+    for source in sources:
+        op.execute(fleet_counters.insert().from_select(['grupo', 'clave', 'valor'], source))
+
+
+def downgrade() -> None:
+    op.drop_table('fleet_counters')
\ No newline at end of file
@@ -0,0 +1,49 @@
+"""tabla import_jobs con el estado de las importaciones en segundo plano
+
+El estado y el resultado de cada trabajo se guardan en la base de datos para
+que cualquier worker de la aplicación pueda responder su consulta, no solo el
+que recibió el archivo.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 05:12:44.918306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('import_jobs',
+    sa.Column('job_id', sa.String(length=32), nullable=False),
+    sa.Column('status', sa.Enum('PENDIENTE', 'EN_PROCESO', 'COMPLETADO', 'FALLIDO', name='importjobstatus'), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=True),
+    sa.Column('file_size', sa.Integer(), nullable=True),
+    sa.Column('bundle', sa.Boolean(), nullable=True),
+    sa.Column('validate_only', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=True),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('progress', sa.JSON(), nullable=True),
+    sa.Column('result', sa.JSON(), nullable=True),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index('ix_import_jobs_created_at', 'import_jobs', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_import_jobs_created_at', table_name='import_jobs')
+    op.drop_table('import_jobs')
+    
+    # En PostgreSQL el tipo ENUM sobrevive a la tabla
+    if op.get_bind().dialect.name == "postgresql":
+        sa.Enum(name='importjobstatus').drop(op.get_bind(), checkfirst=True)
\ No newline at end of file
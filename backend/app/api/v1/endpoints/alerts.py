@@ -1,52 +1,72 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import select, insert, func, and_, or_
 from typing import List, Optional
 from datetime import datetime, date, timedelta
-from ...core.database import get_db
-from ...database.models import (
+from ....core.database import get_db, get_async_db, get_async_read_db
+from ....core.events import event_bus
+from ....database.models import (
     Vehicle, Driver, MaintenanceAlert, Maintenance, User,
     VehicleStatus, DriverStatus, MaintenanceStatus, AlertPriority, UserRole
 )
-from ...schemas.schemas import (
+from ....schemas.schemas import (
     MaintenanceAlert as MaintenanceAlertSchema,
     MaintenanceAlertCreate, 
     MaintenanceAlertUpdate
 )
-from .auth import get_current_active_user, require_role
+from ....services import fleet_counters
+from .auth import get_current_active_user, get_current_active_user_async, require_role
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _alerts_query():
+    """Consulta base de alertas; el vehículo se carga de antemano porque el
+    schema lo incluye y con AsyncSession no hay lazy loading"""
+    return select(MaintenanceAlert).options(selectinload(MaintenanceAlert.vehiculo))
+
+def _vehicles_with_active_alert(db: Session, tipo_alerta: str, vehicle_ids: List[int]) -> set:
+    """Ids de los vehículos que ya tienen una alerta activa del tipo dado
+    (una sola consulta en lugar de una por vehículo)"""
+    if not vehicle_ids:
+        return set()
+    
+    return set(db.scalars(select(MaintenanceAlert.vehiculo_id).where(
+        MaintenanceAlert.vehiculo_id.in_(vehicle_ids),
+        MaintenanceAlert.tipo_alerta == tipo_alerta,
+        MaintenanceAlert.activa == True
+    )))
+
 @router.get("/", response_model=List[MaintenanceAlertSchema])
-def get_alerts(
+async def get_alerts(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=500),
     priority: Optional[AlertPriority] = Query(None, description="Filtrar por prioridad"),
     active_only: bool = Query(True, description="Solo alertas activas"),
     vehicle_id: Optional[int] = Query(None, description="Filtrar por vehículo"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene lista de alertas con filtros opcionales"""
     
-    query = db.query(MaintenanceAlert)
+    query = _alerts_query()
     
     if active_only:
-        query = query.filter(MaintenanceAlert.activa == True)
+        query = query.where(MaintenanceAlert.activa == True)
     
     if priority:
-        query = query.filter(MaintenanceAlert.prioridad == priority)
+        query = query.where(MaintenanceAlert.prioridad == priority)
     
     if vehicle_id:
-        query = query.filter(MaintenanceAlert.vehiculo_id == vehicle_id)
+        query = query.where(MaintenanceAlert.vehiculo_id == vehicle_id)
     
-    alerts = query.order_by(
+    alerts = (await db.scalars(query.order_by(
         MaintenanceAlert.prioridad.desc(),
         MaintenanceAlert.fecha_creacion.desc()
-    ).offset(skip).limit(limit).all()
+    ).offset(skip).limit(limit))).all()
     
     return alerts
 
@@ -91,14 +111,14 @@ def create_alert(
     return db_alert
 
 @router.get("/{alert_id}", response_model=MaintenanceAlertSchema)
-def get_alert(
+async def get_alert(
     alert_id: int,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene una alerta específica por ID"""
     
-    alert = db.query(MaintenanceAlert).filter(MaintenanceAlert.id == alert_id).first()
+    alert = await db.scalar(_alerts_query().where(MaintenanceAlert.id == alert_id))
     
     if not alert:
         raise HTTPException(
@@ -155,50 +175,50 @@ def deactivate_alert(
     return {"message": "Alerta desactivada"}
 
 @router.get("/vehicle/{vehicle_id}", response_model=List[MaintenanceAlertSchema])
-def get_alerts_by_vehicle(
+async def get_alerts_by_vehicle(
     vehicle_id: int,
     active_only: bool = Query(True, description="Solo alertas activas"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene todas las alertas de un vehículo específico"""
     
     # Verificar que el vehículo existe
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    vehicle = await db.get(Vehicle, vehicle_id)
     if not vehicle:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Vehículo no encontrado"
         )
     
-    query = db.query(MaintenanceAlert).filter(MaintenanceAlert.vehiculo_id == vehicle_id)
+    query = _alerts_query().where(MaintenanceAlert.vehiculo_id == vehicle_id)
     
     if active_only:
-        query = query.filter(MaintenanceAlert.activa == True)
+        query = query.where(MaintenanceAlert.activa == True)
     
-    alerts = query.order_by(
+    alerts = (await db.scalars(query.order_by(
         MaintenanceAlert.prioridad.desc(),
         MaintenanceAlert.fecha_creacion.desc()
-    ).all()
+    ))).all()
     
     return alerts
 
 @router.get("/priority/{priority_level}", response_model=List[MaintenanceAlertSchema])
-def get_alerts_by_priority(
+async def get_alerts_by_priority(
     priority_level: AlertPriority,
     active_only: bool = Query(True, description="Solo alertas activas"),
     limit: int = Query(50, ge=1, le=200),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene alertas por nivel de prioridad"""
     
-    query = db.query(MaintenanceAlert).filter(MaintenanceAlert.prioridad == priority_level)
+    query = _alerts_query().where(MaintenanceAlert.prioridad == priority_level)
     
     if active_only:
-        query = query.filter(MaintenanceAlert.activa == True)
+        query = query.where(MaintenanceAlert.activa == True)
     
-    alerts = query.order_by(MaintenanceAlert.fecha_creacion.desc()).limit(limit).all()
+    alerts = (await db.scalars(query.order_by(MaintenanceAlert.fecha_creacion.desc()).limit(limit))).all()
     
     return alerts
 
@@ -212,6 +232,7 @@ def check_expired_documents(
     
     target_date = date.today() + timedelta(days=days_ahead)
     alerts_created = []
+    new_alerts = []
     
     # Verificar SOAT próximos a vencer
     vehicles_soat = db.query(Vehicle).filter(
@@ -221,20 +242,16 @@ def check_expired_documents(
         Vehicle.fecha_soat > date.today()
     ).all()
     
+    # Vehículos que ya tienen alerta activa de este tipo
+    with_alert = _vehicles_with_active_alert(db, "soat_vencimiento", [v.id for v in vehicles_soat])
+    
     for vehicle in vehicles_soat:
         days_until = (vehicle.fecha_soat - date.today()).days
         
-        # Verificar si ya existe alerta activa para este vehículo y tipo
-        existing_alert = db.query(MaintenanceAlert).filter(
-            MaintenanceAlert.vehiculo_id == vehicle.id,
-            MaintenanceAlert.tipo_alerta == "soat_vencimiento",
-            MaintenanceAlert.activa == True
-        ).first()
-        
-        if not existing_alert:
+        if vehicle.id not in with_alert:
             priority = AlertPriority.CRITICA if days_until <= 7 else AlertPriority.ALTA
             
-            alert = MaintenanceAlert(
+            new_alerts.append(dict(
                 vehiculo_id=vehicle.id,
                 tipo_alerta="soat_vencimiento",
                 mensaje=f"SOAT del vehículo {vehicle.placa} vence el {vehicle.fecha_soat} ({days_until} días)",
@@ -243,9 +260,7 @@ def check_expired_documents(
                 fecha_creacion=datetime.utcnow(),
                 activa=True,
                 vista=False
-            )
-            
-            db.add(alert)
+            ))
             alerts_created.append({
                 "vehicle": vehicle.placa,
                 "type": "SOAT",
@@ -261,19 +276,15 @@ def check_expired_documents(
         Vehicle.fecha_tecnicomecanica > date.today()
     ).all()
     
+    with_alert = _vehicles_with_active_alert(db, "tecnicomecanica_vencimiento", [v.id for v in vehicles_tecnico])
+    
     for vehicle in vehicles_tecnico:
         days_until = (vehicle.fecha_tecnicomecanica - date.today()).days
         
-        existing_alert = db.query(MaintenanceAlert).filter(
-            MaintenanceAlert.vehiculo_id == vehicle.id,
-            MaintenanceAlert.tipo_alerta == "tecnicomecanica_vencimiento",
-            MaintenanceAlert.activa == True
-        ).first()
-        
-        if not existing_alert:
+        if vehicle.id not in with_alert:
             priority = AlertPriority.CRITICA if days_until <= 7 else AlertPriority.ALTA
             
-            alert = MaintenanceAlert(
+            new_alerts.append(dict(
                 vehiculo_id=vehicle.id,
                 tipo_alerta="tecnicomecanica_vencimiento",
                 mensaje=f"Revisión técnico-mecánica del vehículo {vehicle.placa} vence el {vehicle.fecha_tecnicomecanica} ({days_until} días)",
@@ -282,9 +293,7 @@ def check_expired_documents(
                 fecha_creacion=datetime.utcnow(),
                 activa=True,
                 vista=False
-            )
-            
-            db.add(alert)
+            ))
             alerts_created.append({
                 "vehicle": vehicle.placa,
                 "type": "Revisión Técnico-mecánica",
@@ -309,8 +318,23 @@ def check_expired_documents(
             "days_until": days_until
         })
     
+    # Todas las alertas nuevas en un solo INSERT (executemany); el INSERT en
+    # lote no pasa por el flush, el contador del dashboard se ajusta aparte
+    if new_alerts:
+        db.execute(insert(MaintenanceAlert), new_alerts)
+        fleet_counters.adjust(db.connection(), {
+            (fleet_counters.ALERTS, fleet_counters.ACTIVE_ALERTS_KEY): len(new_alerts)
+        })
     db.commit()
     
+    # El INSERT en lote tampoco pasa por los eventos del ORM (dashboard en vivo)
+    for alert in new_alerts:
+        event_bus.publish("alert_created", {
+            "vehiculo_id": alert["vehiculo_id"],
+            "tipo_alerta": alert["tipo_alerta"],
+            "prioridad": alert["prioridad"]
+        })
+    
     logger.info(f"Verificación de documentos vencidos ejecutada por {current_user.username}. "
                f"Alertas creadas: {len(alerts_created)}")
     
@@ -330,24 +354,33 @@ def check_maintenance_due(
     """Verifica vehículos que necesitan mantenimiento por kilometraje"""
     
     alerts_created = []
+    new_alerts = []
     
     # Obtener vehículos activos con información de mantenimiento
     vehicles = db.query(Vehicle).filter(Vehicle.activo == True).all()
     
+    # Kilometraje del último mantenimiento completado de cada vehículo, en una
+    # sola consulta (el más reciente por vehículo según fecha de finalización)
+    ranked = select(
+        Maintenance.vehiculo_id,
+        Maintenance.kilometraje_actual,
+        func.row_number().over(
+            partition_by=Maintenance.vehiculo_id,
+            order_by=Maintenance.fecha_finalizacion.desc()
+        ).label("posicion")
+    ).where(Maintenance.estado == MaintenanceStatus.COMPLETADO).subquery()
+    last_km_by_vehicle = dict(db.execute(
+        select(ranked.c.vehiculo_id, ranked.c.kilometraje_actual).where(ranked.c.posicion == 1)
+    ).all())
+    
+    with_alert = _vehicles_with_active_alert(db, "mantenimiento_kilometraje", [v.id for v in vehicles])
+    
     for vehicle in vehicles:
         if not vehicle.kilometraje:
             continue
         
-        # Buscar último mantenimiento completado
-        last_maintenance = db.query(Maintenance).filter(
-            Maintenance.vehiculo_id == vehicle.id,
-            Maintenance.estado == MaintenanceStatus.COMPLETADO
-        ).order_by(Maintenance.fecha_finalizacion.desc()).first()
-        
         # Determinar kilometraje del último mantenimiento
-        last_km = 0
-        if last_maintenance and last_maintenance.kilometraje_actual:
-            last_km = last_maintenance.kilometraje_actual
+        last_km = last_km_by_vehicle.get(vehicle.id) or 0
         
         # Calcular kilómetros desde último mantenimiento
         km_since_maintenance = vehicle.kilometraje - last_km
@@ -355,16 +388,10 @@ def check_maintenance_due(
         # Verificar si necesita mantenimiento
         if km_since_maintenance >= km_threshold:
             # Verificar si ya existe alerta activa
-            existing_alert = db.query(MaintenanceAlert).filter(
-                MaintenanceAlert.vehiculo_id == vehicle.id,
-                MaintenanceAlert.tipo_alerta == "mantenimiento_kilometraje",
-                MaintenanceAlert.activa == True
-            ).first()
-            
-            if not existing_alert:
+            if vehicle.id not in with_alert:
                 priority = AlertPriority.ALTA if km_since_maintenance >= (km_threshold * 1.2) else AlertPriority.MEDIA
                 
-                alert = MaintenanceAlert(
+                new_alerts.append(dict(
                     vehiculo_id=vehicle.id,
                     tipo_alerta="mantenimiento_kilometraje",
                     mensaje=f"Vehículo {vehicle.placa} necesita mantenimiento. "
@@ -373,9 +400,7 @@ def check_maintenance_due(
                     fecha_creacion=datetime.utcnow(),
                     activa=True,
                     vista=False
-                )
-                
-                db.add(alert)
+                ))
                 alerts_created.append({
                     "vehicle": vehicle.placa,
                     "current_km": vehicle.kilometraje,
@@ -383,8 +408,23 @@ def check_maintenance_due(
                     "km_since_maintenance": km_since_maintenance
                 })
     
+    # Todas las alertas nuevas en un solo INSERT (executemany); el INSERT en
+    # lote no pasa por el flush, el contador del dashboard se ajusta aparte
+    if new_alerts:
+        db.execute(insert(MaintenanceAlert), new_alerts)
+        fleet_counters.adjust(db.connection(), {
+            (fleet_counters.ALERTS, fleet_counters.ACTIVE_ALERTS_KEY): len(new_alerts)
+        })
     db.commit()
     
+    # El INSERT en lote tampoco pasa por los eventos del ORM (dashboard en vivo)
+    for alert in new_alerts:
+        event_bus.publish("alert_created", {
+            "vehiculo_id": alert["vehiculo_id"],
+            "tipo_alerta": alert["tipo_alerta"],
+            "prioridad": alert["prioridad"]
+        })
+    
     logger.info(f"Verificación de mantenimiento por kilometraje ejecutada por {current_user.username}. "
                f"Alertas creadas: {len(alerts_created)}")
     
@@ -395,34 +435,34 @@ def check_maintenance_due(
     }
 
 @router.get("/summary/stats")
-def get_alert_stats(
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+async def get_alert_stats(
+    current_user: User = Depends(get_current_active_user_async),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene estadísticas resumidas de alertas"""
     
     # Contar alertas por prioridad
     alert_stats = {}
     for priority in AlertPriority:
-        count = db.query(MaintenanceAlert).filter(
+        count = await db.scalar(select(func.count(MaintenanceAlert.id)).where(
             MaintenanceAlert.prioridad == priority,
             MaintenanceAlert.activa == True
-        ).count()
+        ))
         alert_stats[priority.value] = count
     
     # Alertas no vistas
-    unseen_alerts = db.query(MaintenanceAlert).filter(
+    unseen_alerts = await db.scalar(select(func.count(MaintenanceAlert.id)).where(
         MaintenanceAlert.activa == True,
         MaintenanceAlert.vista == False
-    ).count()
+    ))
     
     # Alertas por tipo
-    alert_types = db.query(
+    alert_types = (await db.execute(select(
         MaintenanceAlert.tipo_alerta,
         func.count(MaintenanceAlert.id).label('count')
-    ).filter(
+    ).where(
         MaintenanceAlert.activa == True
-    ).group_by(MaintenanceAlert.tipo_alerta).all()
+    ).group_by(MaintenanceAlert.tipo_alerta))).all()
     
     type_stats = {item.tipo_alerta: item.count for item in alert_types}
     
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, contains_eager
 from typing import List, Optional
-from ...core.database import get_db
-from ...database.models import (
+from ....core.database import get_db, get_read_db
+from ....core.pagination import keyset_paginate, build_page
+from ....database.models import (
     Assignment, Vehicle, Driver, TransportRequest, 
     VehicleStatus, DriverStatus, RequestStatus
 )
-from ...schemas.schemas import (
+from ....schemas.schemas import (
     Assignment as AssignmentSchema,
     AssignmentCreate,
     AssignmentUpdate,
@@ -19,20 +20,31 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def _assignments_query(db: Session):
+    """Consulta base de asignaciones unida a su solicitud; solicitud, vehículo y
+    conductor se cargan en la misma consulta porque el schema los incluye"""
+    return db.query(Assignment).join(Assignment.solicitud).options(
+        contains_eager(Assignment.solicitud),
+        joinedload(Assignment.vehiculo),
+        joinedload(Assignment.conductor)
+    )
+
 @router.get("/", response_model=PaginatedResponse)
 def get_assignments(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(20, ge=1, le=100, description="Número de registros a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor de la respuesta anterior)"),
+    include_total: bool = Query(False, description="Incluir el total de registros (requiere un conteo adicional)"),
     vehiculo_id: Optional[int] = Query(None, description="Filtrar por vehículo"),
     conductor_id: Optional[int] = Query(None, description="Filtrar por conductor"),
     fecha_desde: Optional[date] = Query(None, description="Filtrar desde fecha"),
     fecha_hasta: Optional[date] = Query(None, description="Filtrar hasta fecha"),
     activa: Optional[bool] = Query(None, description="Filtrar asignaciones activas"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene lista de asignaciones con filtros y paginación"""
     
-    query = db.query(Assignment).join(TransportRequest)
+    query = _assignments_query(db)
     
     # Aplicar filtros
     if vehiculo_id:
@@ -57,32 +69,30 @@ def get_assignments(
                 TransportRequest.estado.in_([RequestStatus.COMPLETADO, RequestStatus.CANCELADO])
             )
     
-    # Ordenar por fecha de asignación descendente
-    query = query.order_by(Assignment.fecha_asignacion.desc())
-    
-    # Obtener total de registros
-    total = query.count()
+    # Obtener total de registros solo si se pide
+    total = query.count() if include_total else None
     
-    # Aplicar paginación
-    assignments = query.offset(skip).limit(limit).all()
+    # Ordenar por fecha de asignación descendente y paginar por cursor
+    sort_columns = [Assignment.fecha_asignacion]
+    assignments = keyset_paginate(
+        query, Assignment, limit, cursor, skip, sort_columns, descending=True
+    ).all()
     
-    # Calcular páginas
-    pages = (total + limit - 1) // limit
-    current_page = (skip // limit) + 1
-    
-    return PaginatedResponse(
-        items=[AssignmentSchema.model_validate(a) for a in assignments],
+    return build_page(
+        assignments,
+        limit,
+        lambda a: AssignmentSchema.model_validate(a).model_dump(),
+        sort_columns,
         total=total,
-        page=current_page,
-        pages=pages,
-        per_page=limit
+        skip=skip,
+        cursor=cursor
     )
 
 @router.get("/{assignment_id}", response_model=AssignmentSchema)
 def get_assignment(assignment_id: int, db: Session = Depends(get_db)):
     """Obtiene una asignación específica por ID"""
     
-    assignment = db.query(Assignment).filter(
+    assignment = _assignments_query(db).filter(
         Assignment.id == assignment_id
     ).first()
     
@@ -223,7 +233,7 @@ def update_assignment(
     # Si se está cambiando vehículo o conductor, verificar disponibilidad
     if (assignment_update.vehiculo_id and assignment_update.vehiculo_id != db_assignment.vehiculo_id) or \
        (assignment_update.conductor_id and assignment_update.conductor_id != db_assignment.conductor_id):
-        
+       
         new_vehicle_id = assignment_update.vehiculo_id or db_assignment.vehiculo_id
         new_conductor_id = assignment_update.conductor_id or db_assignment.conductor_id
         
@@ -429,7 +439,7 @@ def end_trip(
     db.commit()
     
     # Verificar si necesita mantenimiento por kilometraje
-    from ...services.notification_service import notification_service
+    from ....services.notification_service import notification_service
     notification_service._check_vehicle_maintenance_due(db, vehicle)
     db.commit()
     
@@ -448,7 +458,7 @@ def end_trip(
 def get_active_assignments(
     vehiculo_id: Optional[int] = Query(None, description="Filtrar por vehículo"),
     conductor_id: Optional[int] = Query(None, description="Filtrar por conductor"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene asignaciones activas (en curso o programadas para hoy)"""
     
@@ -457,7 +467,7 @@ def get_active_assignments(
     today = datetime.now().date()
     tomorrow = today + timedelta(days=1)
     
-    query = db.query(Assignment).join(TransportRequest).filter(
+    query = _assignments_query(db).filter(
         TransportRequest.estado.in_([RequestStatus.ASIGNADO, RequestStatus.EN_CURSO]),
         TransportRequest.fecha_viaje >= today,
         TransportRequest.fecha_viaje < tomorrow
@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from ...core.database import get_db
-from ...core.config import settings
-from ...database.models import User, UserRole
-from ...schemas.schemas import UserCreate, UserLogin, Token, TokenData, User as UserSchema
+from ....core.database import get_db, get_async_db
+from ....core.config import settings
+from ....database.models import User, UserRole
+from ....schemas.schemas import UserCreate, UserLogin, Token, TokenData, User as UserSchema
 import logging
 
 logger = logging.getLogger(__name__)
@@ -51,35 +53,60 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
         return None
     return user
 
-async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    """Obtiene el usuario actual desde el token JWT"""
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudieron validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    
+
+def _decode_token(token: str) -> TokenData:
+    """Valida el token JWT y extrae el username"""
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
-            raise credentials_exception
-        token_data = TokenData(username=username)
+            raise _credentials_exception()
+        return TokenData(username=username)
     except JWTError:
-        raise credentials_exception
+        raise _credentials_exception()
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+    """Obtiene el usuario actual desde el token JWT
+    
+    Es síncrona para que la consulta se ejecute en el threadpool y no
+    bloquee el event loop; el usuario queda en la misma sesión del endpoint.
+    """
+    token_data = _decode_token(token)
     
     user = db.query(User).filter(User.username == token_data.username, User.activo == True).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     return user
 
-async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_user_async(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> User:
+    """Variante de get_current_user para endpoints que usan AsyncSession"""
+    token_data = _decode_token(token)
+    
+    user = await db.scalar(select(User).where(User.username == token_data.username, User.activo == True))
+    if user is None:
+        raise _credentials_exception()
+    
+    return user
+
+def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Verifica que el usuario esté activo"""
     if not current_user.activo:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     return current_user
 
+async def get_current_active_user_async(current_user: User = Depends(get_current_user_async)) -> User:
+    """Verifica que el usuario esté activo (sesión asíncrona)"""
+    if not current_user.activo:
+        raise HTTPException(status_code=400, detail="Usuario inactivo")
+    return current_user
+
 def require_role(required_roles: list):
     """Decorator para requerir roles específicos"""
     def role_checker(current_user: User = Depends(get_current_active_user)):
@@ -1,113 +1,275 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, contains_eager
+from sqlalchemy import select, func, case, true, and_, or_
+from contextlib import asynccontextmanager
 from typing import List, Optional
-from datetime import datetime, date, timedelta
-from ...core.database import get_db
-from ...database.models import (
+from datetime import datetime, date, time, timedelta
+from ....core import database
+from ....core.config import settings
+from ....core.database import get_async_read_db
+from ....core.cache import cached, ALL_TAGS
+from ....core.events import event_bus, sse_message
+from ....database.models import (
     Vehicle, Driver, TransportRequest, Assignment, Maintenance, MaintenanceAlert,
     VehicleStatus, DriverStatus, RequestStatus, MaintenanceStatus, AlertPriority
 )
-from ...schemas.schemas import DashboardStats, VehicleAvailability
+from ....schemas.schemas import DashboardStats, VehicleAvailability
+from ....services import fleet_counters
+from ....services import live_events  # registra los eventos de las escrituras para /stream
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+async def _count(db: AsyncSession, model, *criteria) -> int:
+    """Cuenta las filas de `model` que cumplen los criterios"""
+    return await db.scalar(select(func.count(model.id)).where(*criteria))
+
+def _count_if(*criteria):
+    """COUNT de las filas que cumplen los criterios (agregado condicional)"""
+    return func.count(case((and_(*criteria), 1)))
+
+def upcoming_maintenance_query(now: Optional[datetime] = None):
+    """Mantenimientos programados para los próximos 30 días (depende de la
+    hora de la consulta, por eso no es un contador materializado)"""
+    now = now or datetime.now()
+    return select(func.count(Maintenance.id).label("mantenimientos_programados")).where(
+        Maintenance.estado == MaintenanceStatus.PROGRAMADO,
+        Maintenance.fecha_programada >= now,
+        Maintenance.fecha_programada <= now + timedelta(days=30)
+    )
+
+def dashboard_stats_query(now: Optional[datetime] = None):
+    """Todas las estadísticas del dashboard en una sola sentencia, desde las
+    tablas de origen (referencia de los contadores materializados)
+    
+    Un agregado condicional por tabla (vehículos y conductores se recorren una
+    sola vez para todos sus conteos), combinados como subconsultas de una fila:
+    un único viaje a la base de datos en lugar de un COUNT por indicador.
+    """
+    now = now or datetime.now()
+    
+    vehicles = select(
+        func.count(Vehicle.id).label("total_vehiculos"),
+        _count_if(Vehicle.estado == VehicleStatus.DISPONIBLE).label("vehiculos_disponibles"),
+        _count_if(Vehicle.estado == VehicleStatus.EN_USO).label("vehiculos_en_uso"),
+        _count_if(Vehicle.estado == VehicleStatus.MANTENIMIENTO).label("vehiculos_mantenimiento")
+    ).where(Vehicle.activo == True).subquery()
+    
+    drivers = select(
+        func.count(Driver.id).label("total_conductores"),
+        _count_if(
+            Driver.estado == DriverStatus.DISPONIBLE,
+            Driver.fecha_vencimiento_licencia > now.date()
+        ).label("conductores_disponibles")
+    ).where(Driver.activo == True).subquery()
+    
+    requests = select(
+        func.count(TransportRequest.id).label("solicitudes_pendientes")
+    ).where(TransportRequest.estado == RequestStatus.PENDIENTE).subquery()
+    
+    alerts = select(
+        func.count(MaintenanceAlert.id).label("alertas_activas")
+    ).where(MaintenanceAlert.activa == True).subquery()
+    
+    maintenance = upcoming_maintenance_query(now).subquery()
+    
+    # Cada subconsulta devuelve exactamente una fila: unirlas sin condición da una fila
+    return select(vehicles, drivers, requests, alerts, maintenance).select_from(
+        vehicles
+        .join(drivers, true())
+        .join(requests, true())
+        .join(alerts, true())
+        .join(maintenance, true())
+    )
+
 @router.get("/stats", response_model=DashboardStats)
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    """Obtiene estadísticas generales para el dashboard"""
+@cached("dashboard:stats", tags=ALL_TAGS)
+async def get_dashboard_stats(db: AsyncSession = Depends(get_async_read_db)):
+    """Obtiene estadísticas generales para el dashboard
     
-    # Estadísticas de vehículos
-    total_vehiculos = db.query(Vehicle).filter(Vehicle.activo == True).count()
-    vehiculos_disponibles = db.query(Vehicle).filter(
-        Vehicle.activo == True,
-        Vehicle.estado == VehicleStatus.DISPONIBLE
-    ).count()
-    vehiculos_en_uso = db.query(Vehicle).filter(
-        Vehicle.activo == True,
-        Vehicle.estado == VehicleStatus.EN_USO
-    ).count()
-    vehiculos_mantenimiento = db.query(Vehicle).filter(
-        Vehicle.activo == True,
-        Vehicle.estado == VehicleStatus.MANTENIMIENTO
-    ).count()
-    
-    # Estadísticas de conductores
-    total_conductores = db.query(Driver).filter(Driver.activo == True).count()
-    conductores_disponibles = db.query(Driver).filter(
-        Driver.activo == True,
-        Driver.estado == DriverStatus.DISPONIBLE,
-        Driver.fecha_vencimiento_licencia > date.today()
-    ).count()
+    Se leen de los contadores materializados (fleet_counters), que se
+    actualizan en cada escritura: el costo no depende del tamaño de la flota
+    ni del número de solicitudes.
+    """
     
-    # Estadísticas de solicitudes
-    solicitudes_pendientes = db.query(TransportRequest).filter(
-        TransportRequest.estado == RequestStatus.PENDIENTE
-    ).count()
-    
-    # Alertas activas
-    alertas_activas = db.query(MaintenanceAlert).filter(
-        MaintenanceAlert.activa == True
-    ).count()
-    
-    # Mantenimientos programados para los próximos 30 días
-    future_date = datetime.now() + timedelta(days=30)
-    mantenimientos_programados = db.query(Maintenance).filter(
-        Maintenance.estado == MaintenanceStatus.PROGRAMADO,
-        Maintenance.fecha_programada >= datetime.now(),
-        Maintenance.fecha_programada <= future_date
-    ).count()
+    return await compute_dashboard_stats(db)
+
+async def compute_dashboard_stats(db: AsyncSession) -> DashboardStats:
+    counters = (await db.execute(fleet_counters.counters_query())).all()
+    mantenimientos_programados = await db.scalar(upcoming_maintenance_query())
     
     return DashboardStats(
-        total_vehiculos=total_vehiculos,
-        vehiculos_disponibles=vehiculos_disponibles,
-        vehiculos_en_uso=vehiculos_en_uso,
-        vehiculos_mantenimiento=vehiculos_mantenimiento,
-        total_conductores=total_conductores,
-        conductores_disponibles=conductores_disponibles,
-        solicitudes_pendientes=solicitudes_pendientes,
-        alertas_activas=alertas_activas,
+        **fleet_counters.dashboard_counts(counters),
         mantenimientos_programados=mantenimientos_programados
     )
 
+class DashboardStream:
+    """Difusión de cambios del dashboard a los clientes de /dashboard/stream
+    
+    Un único consumidor del bus de eventos agrupa los eventos que llegan
+    seguidos, recalcula las estadísticas una vez por grupo y envía a todos los
+    clientes los eventos y los indicadores que cambiaron: el costo no depende
+    del número de pantallas abiertas. El consumidor corre solo mientras haya
+    clientes conectados.
+    """
+    
+    def __init__(self):
+        # Sesiones para recalcular (por defecto, las del primario: acaba de escribirse)
+        self.session_factory = None
+        self.stats: Optional[dict] = None
+        self._clients: set = set()
+        self._task: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Event] = None
+    
+    def available(self) -> bool:
+        """Hay sesiones asíncronas para recalcular (no con DB_ASYNC_ENABLED=false)"""
+        return self._session_factory() is not None
+    
+    def _session_factory(self):
+        return self.session_factory or database.AsyncSessionLocal
+    
+    @asynccontextmanager
+    async def connect(self):
+        """Cola de mensajes SSE de un cliente, empezando por el estado actual"""
+        queue = asyncio.Queue(maxsize=settings.EVENT_BUS_QUEUE_SIZE)
+        
+        if self._task is None or self._task.done():
+            self._ready = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        
+        # Suscripción al bus y estadísticas iniciales listas (o el error al calcularlas)
+        await self._ready.wait()
+        if self._task.done():
+            self._task.result()
+        
+        queue.put_nowait(sse_message("snapshot", {"stats": self.stats}))
+        self._clients.add(queue)
+        
+        try:
+            yield queue
+        finally:
+            self._clients.discard(queue)
+            if not self._clients and self._task is not None:
+                self._task.cancel()
+                self._task = None
+    
+    async def _run(self):
+        async with event_bus.subscribe() as events:
+            try:
+                self.stats = await self._compute_stats()
+            finally:
+                self._ready.set()
+            
+            while True:
+                batch = [await events.get()]
+                await asyncio.sleep(settings.DASHBOARD_STREAM_BATCH_SECONDS)
+                while not events.empty():
+                    batch.append(events.get_nowait())
+                
+                try:
+                    stats = await self._compute_stats()
+                except Exception as e:
+                    logger.error(f"Error recalculando estadísticas del dashboard en vivo: {e}")
+                    stats = self.stats
+                
+                changes = {key: value for key, value in stats.items() if self.stats.get(key) != value}
+                self.stats = stats
+                self._broadcast(sse_message("update", {"events": batch, "changes": changes}))
+    
+    async def _compute_stats(self) -> dict:
+        session_factory = self._session_factory()
+        if session_factory is None:
+            raise RuntimeError("El acceso asíncrono a la base de datos no está disponible (DB_ASYNC_ENABLED o driver asíncrono)")
+        
+        async with session_factory() as db:
+            return (await compute_dashboard_stats(db)).model_dump()
+    
+    def _broadcast(self, message: str):
+        for queue in list(self._clients):
+            if queue.full():
+                # Cliente lento: pierde el mensaje más antiguo, no bloquea a los demás
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+dashboard_stream = DashboardStream()
+
+@router.get("/stream")
+async def stream_dashboard(request: Request):
+    """Cambios del dashboard en vivo (Server-Sent Events)
+    
+    Al conectarse se recibe un evento `snapshot` con las estadísticas actuales;
+    luego un evento `update` por cada grupo de cambios (asignaciones creadas o
+    canceladas, viajes iniciados o finalizados, cambios de estado de
+    vehículos, alertas creadas) con los indicadores que cambiaron. Reemplaza
+    el sondeo periódico de /dashboard/stats, /dashboard/alerts y
+    /assignments/active/.
+    
+    Requiere el acceso asíncrono a la base de datos; sin él responde 503.
+    """
+    if not dashboard_stream.available():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="El dashboard en vivo requiere el acceso asíncrono a la base de datos (DB_ASYNC_ENABLED)"
+        )
+    
+    async def messages():
+        async with dashboard_stream.connect() as queue:
+            while not await request.is_disconnected():
+                try:
+                    yield await asyncio.wait_for(queue.get(), timeout=settings.DASHBOARD_STREAM_PING_SECONDS)
+                except asyncio.TimeoutError:
+                    # Comentario SSE: mantiene la conexión abierta en proxies
+                    yield ": ping\n\n"
+    
+    return StreamingResponse(
+        messages(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @router.get("/alerts")
-def get_dashboard_alerts(
+@cached("dashboard:alerts", tags=("alertas", "vehiculos", "conductores"))
+async def get_dashboard_alerts(
     limit: int = Query(10, ge=1, le=50, description="Número máximo de alertas a retornar"),
     priority: Optional[AlertPriority] = Query(None, description="Filtrar por prioridad"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene alertas importantes para mostrar en el dashboard"""
     
-    query = db.query(MaintenanceAlert).filter(
+    query = select(MaintenanceAlert).where(
         MaintenanceAlert.activa == True
     )
     
     if priority:
-        query = query.filter(MaintenanceAlert.prioridad == priority)
+        query = query.where(MaintenanceAlert.prioridad == priority)
     
-    alerts = query.order_by(
+    alerts = (await db.scalars(query.order_by(
         MaintenanceAlert.prioridad.desc(),
         MaintenanceAlert.fecha_creacion.desc()
-    ).limit(limit).all()
+    ).limit(limit))).all()
     
     # Contar alertas por prioridad
     alert_counts = {}
     for prio in AlertPriority:
-        count = db.query(MaintenanceAlert).filter(
+        count = await _count(
+            db, MaintenanceAlert,
             MaintenanceAlert.activa == True,
             MaintenanceAlert.prioridad == prio
-        ).count()
+        )
         alert_counts[prio.value] = count
     
     # Alertas de licencias próximas a vencer
     license_alerts = []
-    drivers_expiring = db.query(Driver).filter(
+    drivers_expiring = (await db.scalars(select(Driver).where(
         Driver.activo == True,
         Driver.fecha_vencimiento_licencia <= date.today() + timedelta(days=30),
         Driver.fecha_vencimiento_licencia > date.today()
-    ).all()
+    ))).all()
     
     for driver in drivers_expiring:
         days_until = (driver.fecha_vencimiento_licencia - date.today()).days
@@ -127,88 +289,152 @@ def get_dashboard_alerts(
         "total_alerts": len(alerts) + len(license_alerts)
     }
 
+# Días máximos de la grilla de disponibilidad
+MAX_AVAILABILITY_DAYS = 31
+
+def _day_range(start: date, end: date):
+    """[inicio del primer día, inicio del día siguiente al último): un rango
+    sobre la columna que sí puede usar los índices, a diferencia de
+    func.date(columna) == día"""
+    return datetime.combine(start, time.min), datetime.combine(end + timedelta(days=1), time.min)
+
+def vehicle_trips_query(start: date, end: date):
+    """(vehiculo_id, fecha_viaje) de los viajes asignados o en curso entre
+    las fechas (inclusive), para toda la flota"""
+    since, until = _day_range(start, end)
+    return select(Assignment.vehiculo_id, TransportRequest.fecha_viaje).join(Assignment.solicitud).where(
+        TransportRequest.estado.in_([RequestStatus.ASIGNADO, RequestStatus.EN_CURSO]),
+        TransportRequest.fecha_viaje >= since,
+        TransportRequest.fecha_viaje < until
+    )
+
+def vehicle_maintenance_query(start: date, end: date):
+    """(vehiculo_id, fecha_programada) de los mantenimientos programados o en
+    proceso entre las fechas (inclusive), para toda la flota"""
+    since, until = _day_range(start, end)
+    return select(Maintenance.vehiculo_id, Maintenance.fecha_programada).where(
+        Maintenance.estado.in_([MaintenanceStatus.PROGRAMADO, MaintenanceStatus.EN_PROCESO]),
+        Maintenance.fecha_programada >= since,
+        Maintenance.fecha_programada < until
+    )
+
+def _availability_summary(statuses) -> dict:
+    statuses = list(statuses)
+    return {
+        "disponibles": statuses.count(VehicleStatus.DISPONIBLE),
+        "en_uso": statuses.count(VehicleStatus.EN_USO),
+        "mantenimiento": statuses.count(VehicleStatus.MANTENIMIENTO)
+    }
+
 @router.get("/vehicle-availability")
-def get_vehicle_availability(
+@cached("dashboard:vehicle-availability", tags=("vehiculos", "solicitudes", "asignaciones", "mantenimientos"))
+async def get_vehicle_availability(
     fecha: Optional[date] = Query(None, description="Fecha para verificar disponibilidad (default: hoy)"),
-    db: Session = Depends(get_db)
+    fecha_fin: Optional[date] = Query(None, description="Último día (inclusive) para obtener una grilla por día desde `fecha`"),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Obtiene disponibilidad de vehículos para una fecha específica"""
+    """Obtiene disponibilidad de vehículos para una fecha específica
+    
+    Con `fecha_fin` la respuesta incluye además la grilla por vehículo y día
+    (`grid`) y el resumen de cada día (`daily_summary`), hasta
+    MAX_AVAILABILITY_DAYS días. Se resuelve con tres consultas para toda la
+    flota (vehículos, viajes y mantenimientos del rango), sin importar el
+    número de vehículos ni de días.
+    """
     
     target_date = fecha or date.today()
+    end_date = fecha_fin or target_date
+    
+    if end_date < target_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fecha_fin no puede ser anterior a fecha"
+        )
+    
+    if (end_date - target_date).days >= MAX_AVAILABILITY_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango no puede superar {MAX_AVAILABILITY_DAYS} días"
+        )
+    
+    days = [target_date + timedelta(days=n) for n in range((end_date - target_date).days + 1)]
     
     # Obtener todos los vehículos activos
-    vehicles = db.query(Vehicle).filter(Vehicle.activo == True).all()
+    vehicles = (await db.scalars(select(Vehicle).where(Vehicle.activo == True).order_by(Vehicle.id))).all()
+    
+    # Días ocupados por vehículo: viajes y mantenimientos de todo el rango
+    in_use = {
+        (vehiculo_id, fecha_viaje.date())
+        for vehiculo_id, fecha_viaje in await db.execute(vehicle_trips_query(target_date, end_date))
+    }
+    in_maintenance = {
+        (vehiculo_id, fecha_programada.date())
+        for vehiculo_id, fecha_programada in await db.execute(vehicle_maintenance_query(target_date, end_date))
+    }
+    
+    def status_on(vehicle: Vehicle, day: date) -> VehicleStatus:
+        # El mantenimiento tiene prioridad sobre un viaje el mismo día
+        if (vehicle.id, day) in in_maintenance:
+            return VehicleStatus.MANTENIMIENTO
+        if (vehicle.id, day) in in_use:
+            return VehicleStatus.EN_USO
+        return VehicleStatus.DISPONIBLE
+    
+    grid = {vehicle.id: [status_on(vehicle, day) for day in days] for vehicle in vehicles}
     
     availability_list = []
     
     for vehicle in vehicles:
-        # Verificar si tiene asignaciones en la fecha
-        assignment = db.query(Assignment).join(TransportRequest).filter(
-            Assignment.vehiculo_id == vehicle.id,
-            func.date(TransportRequest.fecha_viaje) == target_date,
-            TransportRequest.estado.in_([RequestStatus.ASIGNADO, RequestStatus.EN_CURSO])
-        ).first()
-        
-        # Verificar mantenimientos programados
-        maintenance = db.query(Maintenance).filter(
-            Maintenance.vehiculo_id == vehicle.id,
-            func.date(Maintenance.fecha_programada) == target_date,
-            Maintenance.estado.in_([MaintenanceStatus.PROGRAMADO, MaintenanceStatus.EN_PROCESO])
-        ).first()
-        
-        # Determinar estado de disponibilidad
-        if maintenance:
-            status = VehicleStatus.MANTENIMIENTO
-        elif assignment:
-            status = VehicleStatus.EN_USO
-        else:
-            status = VehicleStatus.DISPONIBLE
-        
         # Próxima revisión (SOAT, técnico-mecánica, etc.)
-        proxima_revision = None
-        if vehicle.fecha_soat:
-            if not proxima_revision or vehicle.fecha_soat < proxima_revision:
-                proxima_revision = vehicle.fecha_soat
-        if vehicle.fecha_tecnicomecanica:
-            if not proxima_revision or vehicle.fecha_tecnicomecanica < proxima_revision:
-                proxima_revision = vehicle.fecha_tecnicomecanica
+        revisions = [d for d in (vehicle.fecha_soat, vehicle.fecha_tecnicomecanica) if d]
         
         availability_list.append(VehicleAvailability(
             id=vehicle.id,
             placa=vehicle.placa,
             marca=vehicle.marca,
             modelo=vehicle.modelo,
-            estado=status,
+            estado=grid[vehicle.id][0],
             kilometraje=vehicle.kilometraje or 0,
-            proxima_revision=proxima_revision
+            proxima_revision=min(revisions) if revisions else None
         ))
     
-    # Contar por estado
-    summary = {
-        "disponibles": len([v for v in availability_list if v.estado == VehicleStatus.DISPONIBLE]),
-        "en_uso": len([v for v in availability_list if v.estado == VehicleStatus.EN_USO]),
-        "mantenimiento": len([v for v in availability_list if v.estado == VehicleStatus.MANTENIMIENTO])
-    }
-    
-    return {
+    result = {
         "date": target_date,
         "vehicle_availability": availability_list,
-        "summary": summary
+        "summary": _availability_summary(v.estado for v in availability_list)
     }
+    
+    if fecha_fin:
+        result["period"] = {"start": target_date, "end": end_date, "days": len(days)}
+        result["grid"] = [
+            {
+                "id": vehicle.id,
+                "placa": vehicle.placa,
+                "estados": {day.isoformat(): estado.value for day, estado in zip(days, grid[vehicle.id])}
+            }
+            for vehicle in vehicles
+        ]
+        result["daily_summary"] = [
+            {"date": day, **_availability_summary(statuses[n] for statuses in grid.values())}
+            for n, day in enumerate(days)
+        ]
+    
+    return result
 
 @router.get("/recent-activity")
-def get_recent_activity(
+@cached("dashboard:recent-activity", tags=("solicitudes", "asignaciones", "mantenimientos", "vehiculos", "conductores"))
+async def get_recent_activity(
     limit: int = Query(10, ge=1, le=50, description="Número de actividades recientes"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene actividad reciente en el sistema"""
     
     activities = []
     
     # Solicitudes recientes
-    recent_requests = db.query(TransportRequest).order_by(
+    recent_requests = (await db.scalars(select(TransportRequest).order_by(
         TransportRequest.created_at.desc()
-    ).limit(limit//3).all()
+    ).limit(limit//3))).all()
     
     for req in recent_requests:
         activities.append({
@@ -220,13 +446,17 @@ def get_recent_activity(
         })
     
     # Asignaciones recientes
-    recent_assignments = db.query(Assignment).order_by(
+    # Vehículo y conductor se cargan en la misma consulta
+    recent_assignments = (await db.scalars(select(Assignment).options(
+        joinedload(Assignment.vehiculo),
+        joinedload(Assignment.conductor)
+    ).order_by(
         Assignment.fecha_asignacion.desc()
-    ).limit(limit//3).all()
+    ).limit(limit//3))).all()
     
     for assign in recent_assignments:
-        vehicle = db.query(Vehicle).filter(Vehicle.id == assign.vehiculo_id).first()
-        driver = db.query(Driver).filter(Driver.id == assign.conductor_id).first()
+        vehicle = assign.vehiculo
+        driver = assign.conductor
         activities.append({
             "type": "assignment_created",
             "timestamp": assign.fecha_asignacion,
@@ -235,12 +465,14 @@ def get_recent_activity(
         })
     
     # Mantenimientos recientes
-    recent_maintenance = db.query(Maintenance).order_by(
+    recent_maintenance = (await db.scalars(select(Maintenance).options(
+        joinedload(Maintenance.vehiculo)
+    ).order_by(
         Maintenance.created_at.desc()
-    ).limit(limit//3).all()
+    ).limit(limit//3))).all()
     
     for maint in recent_maintenance:
-        vehicle = db.query(Vehicle).filter(Vehicle.id == maint.vehiculo_id).first()
+        vehicle = maint.vehiculo
         activities.append({
             "type": "maintenance_scheduled",
             "timestamp": maint.created_at,
@@ -258,67 +490,70 @@ def get_recent_activity(
     }
 
 @router.get("/performance-metrics")
-def get_performance_metrics(
+@cached("dashboard:performance-metrics", tags=ALL_TAGS)
+async def get_performance_metrics(
     days_back: int = Query(30, ge=1, le=365, description="Días hacia atrás para calcular métricas"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene métricas de rendimiento del sistema"""
     
     start_date = datetime.now() - timedelta(days=days_back)
     
     # Métricas de solicitudes
-    total_requests = db.query(TransportRequest).filter(
+    total_requests = await _count(
+        db, TransportRequest,
         TransportRequest.created_at >= start_date
-    ).count()
+    )
     
-    completed_requests = db.query(TransportRequest).filter(
+    completed_requests = await _count(
+        db, TransportRequest,
         TransportRequest.created_at >= start_date,
         TransportRequest.estado == RequestStatus.COMPLETADO
-    ).count()
+    )
     
     # Tiempo promedio de asignación (desde creación hasta asignación)
-    avg_assignment_time_query = db.query(
+    avg_assignment_time_query = (await db.execute(select(
         func.avg(
             func.julianday(Assignment.fecha_asignacion) - 
             func.julianday(TransportRequest.fecha_solicitud)
         ).label('avg_days')
-    ).join(TransportRequest).filter(
+    ).join(TransportRequest).where(
         TransportRequest.created_at >= start_date,
         Assignment.fecha_asignacion.isnot(None)
-    ).first()
+    ))).first()
     
     avg_assignment_time_days = avg_assignment_time_query.avg_days if avg_assignment_time_query.avg_days else 0
     
     # Utilización de vehículos (% de tiempo en uso)
-    total_vehicles = db.query(Vehicle).filter(Vehicle.activo == True).count()
+    total_vehicles = await _count(db, Vehicle, Vehicle.activo == True)
     
     # Días con asignaciones por vehículo
-    vehicle_usage = db.query(
+    vehicle_usage = (await db.execute(select(
         func.count(func.distinct(func.date(TransportRequest.fecha_viaje))).label('days_used')
-    ).join(Assignment).join(TransportRequest).filter(
+    ).select_from(Assignment).join(TransportRequest).where(
         TransportRequest.fecha_viaje >= start_date,
         TransportRequest.estado.in_([RequestStatus.COMPLETADO, RequestStatus.EN_CURSO])
-    ).first()
+    ))).first()
     
     vehicle_utilization = (vehicle_usage.days_used / (days_back * total_vehicles) * 100) if total_vehicles > 0 else 0
     
     # Costo promedio de mantenimiento
-    avg_maintenance_cost = db.query(
+    avg_maintenance_cost = await db.scalar(select(
         func.avg(Maintenance.costo_real)
-    ).filter(
+    ).where(
         Maintenance.fecha_finalizacion >= start_date,
         Maintenance.estado == MaintenanceStatus.COMPLETADO,
         Maintenance.costo_real.isnot(None)
-    ).scalar() or 0
+    )) or 0
     
     # Eficiencia de combustible (km por vehículo)
-    total_km = db.query(
+    total_km = await db.scalar(select(
         func.sum(Assignment.kilometraje_fin - Assignment.kilometraje_inicio)
-    ).join(TransportRequest).filter(
+    ).join(TransportRequest).where(
         TransportRequest.fecha_viaje >= start_date,
         Assignment.kilometraje_fin.isnot(None),
         Assignment.kilometraje_inicio.isnot(None)
-    ).scalar() or 0
+    )) or 0
     
     avg_km_per_vehicle = (total_km / total_vehicles) if total_vehicles > 0 else 0
     
@@ -346,9 +581,10 @@ def get_performance_metrics(
     }
 
 @router.get("/upcoming-events")
-def get_upcoming_events(
+@cached("dashboard:upcoming-events", tags=("solicitudes", "asignaciones", "mantenimientos", "vehiculos", "conductores"))
+async def get_upcoming_events(
     days_ahead: int = Query(7, ge=1, le=30, description="Días hacia adelante para buscar eventos"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene eventos próximos (viajes programados, mantenimientos, vencimientos)"""
     
@@ -357,15 +593,21 @@ def get_upcoming_events(
     events = []
     
     # Viajes programados
-    upcoming_trips = db.query(Assignment).join(TransportRequest).filter(
+    # Solicitud (ya unida para filtrar), vehículo y conductor se cargan junto con
+    # la asignación: sin lazy loading en AsyncSession ni consultas por viaje
+    upcoming_trips = (await db.scalars(select(Assignment).join(Assignment.solicitud).options(
+        contains_eager(Assignment.solicitud),
+        joinedload(Assignment.vehiculo),
+        joinedload(Assignment.conductor)
+    ).where(
         TransportRequest.fecha_viaje >= datetime.now(),
         TransportRequest.fecha_viaje <= end_date,
         TransportRequest.estado.in_([RequestStatus.ASIGNADO, RequestStatus.EN_CURSO])
-    ).all()
+    ))).all()
     
     for trip in upcoming_trips:
-        vehicle = db.query(Vehicle).filter(Vehicle.id == trip.vehiculo_id).first()
-        driver = db.query(Driver).filter(Driver.id == trip.conductor_id).first()
+        vehicle = trip.vehiculo
+        driver = trip.conductor
         events.append({
             "type": "trip",
             "datetime": trip.solicitud.fecha_viaje,
@@ -377,14 +619,16 @@ def get_upcoming_events(
         })
     
     # Mantenimientos programados
-    upcoming_maintenance = db.query(Maintenance).filter(
+    upcoming_maintenance = (await db.scalars(select(Maintenance).options(
+        joinedload(Maintenance.vehiculo)
+    ).where(
         Maintenance.fecha_programada >= datetime.now(),
         Maintenance.fecha_programada <= end_date,
         Maintenance.estado == MaintenanceStatus.PROGRAMADO
-    ).all()
+    ))).all()
     
     for maint in upcoming_maintenance:
-        vehicle = db.query(Vehicle).filter(Vehicle.id == maint.vehiculo_id).first()
+        vehicle = maint.vehiculo
         events.append({
             "type": "maintenance",
             "datetime": maint.fecha_programada,
@@ -399,12 +643,12 @@ def get_upcoming_events(
     upcoming_expirations = []
     
     # SOAT próximos a vencer
-    vehicles_soat = db.query(Vehicle).filter(
+    vehicles_soat = (await db.scalars(select(Vehicle).where(
         Vehicle.activo == True,
         Vehicle.fecha_soat.isnot(None),
         Vehicle.fecha_soat >= date.today(),
         Vehicle.fecha_soat <= end_date.date()
-    ).all()
+    ))).all()
     
     for vehicle in vehicles_soat:
         events.append({
@@ -430,57 +674,13 @@ def get_upcoming_events(
     }
 
 @router.get("/fleet-status")
-def get_fleet_status(db: Session = Depends(get_db)):
-    """Obtiene estado actual completo de la flota"""
-    
-    # Estado de vehículos por tipo
-    vehicle_status_by_type = db.query(
-        Vehicle.tipo_vehiculo,
-        Vehicle.estado,
-        func.count(Vehicle.id).label('count')
-    ).filter(
-        Vehicle.activo == True
-    ).group_by(
-        Vehicle.tipo_vehiculo, Vehicle.estado
-    ).all()
-    
-    # Estado de conductores
-    driver_status = db.query(
-        Driver.estado,
-        func.count(Driver.id).label('count')
-    ).filter(
-        Driver.activo == True,
-        Driver.fecha_vencimiento_licencia > date.today()
-    ).group_by(Driver.estado).all()
+@cached("dashboard:fleet-status", tags=("vehiculos", "conductores", "solicitudes", "asignaciones", "mantenimientos"))
+async def get_fleet_status(db: AsyncSession = Depends(get_async_read_db)):
+    """Obtiene estado actual completo de la flota (desde los contadores materializados)"""
     
-    # Solicitudes por estado
-    request_status = db.query(
-        TransportRequest.estado,
-        func.count(TransportRequest.id).label('count')
-    ).group_by(TransportRequest.estado).all()
+    counters = (await db.execute(fleet_counters.counters_query())).all()
     
     return {
-        "vehicle_status_by_type": [
-            {
-                "tipo": item.tipo_vehiculo.value,
-                "estado": item.estado.value,
-                "count": item.count
-            }
-            for item in vehicle_status_by_type
-        ],
-        "driver_status": [
-            {
-                "estado": item.estado.value,
-                "count": item.count
-            }
-            for item in driver_status
-        ],
-        "request_status": [
-            {
-                "estado": item.estado.value,
-                "count": item.count
-            }
-            for item in request_status
-        ],
+        **fleet_counters.fleet_status(counters),
         "timestamp": datetime.now()
     }
\ No newline at end of file
@@ -1,9 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ...core.database import get_db
-from ...database.models import Driver, DriverStatus
-from ...schemas.schemas import (
+from ....core.database import get_db, get_async_db, get_async_read_db
+from ....core.pagination import keyset_paginate, build_page
+from ....database.models import Driver, DriverStatus
+from ....schemas.schemas import (
     Driver as DriverSchema,
     DriverCreate,
     DriverUpdate,
@@ -17,65 +20,66 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=PaginatedResponse)
-def get_drivers(
+async def get_drivers(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(20, ge=1, le=100, description="Número de registros a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor de la respuesta anterior)"),
+    include_total: bool = Query(False, description="Incluir el total de registros (requiere un conteo adicional)"),
     cedula: Optional[str] = Query(None, description="Filtrar por cédula"),
     nombre: Optional[str] = Query(None, description="Filtrar por nombre"),
     estado: Optional[DriverStatus] = Query(None, description="Filtrar por estado"),
     categoria_licencia: Optional[str] = Query(None, description="Filtrar por categoría de licencia"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
     licencia_vigente: Optional[bool] = Query(None, description="Filtrar por licencia vigente"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene lista de conductores con filtros y paginación"""
     
-    query = db.query(Driver)
+    query = select(Driver)
     
     # Aplicar filtros
     if cedula:
-        query = query.filter(Driver.cedula.ilike(f"%{cedula}%"))
+        query = query.where(Driver.cedula.ilike(f"%{cedula}%"))
     if nombre:
-        query = query.filter(Driver.nombre_completo.ilike(f"%{nombre}%"))
+        query = query.where(Driver.nombre_completo.ilike(f"%{nombre}%"))
     if estado:
-        query = query.filter(Driver.estado == estado)
+        query = query.where(Driver.estado == estado)
     if categoria_licencia:
-        query = query.filter(Driver.categoria_licencia.ilike(f"%{categoria_licencia}%"))
+        query = query.where(Driver.categoria_licencia.ilike(f"%{categoria_licencia}%"))
     if activo is not None:
-        query = query.filter(Driver.activo == activo)
+        query = query.where(Driver.activo == activo)
     if licencia_vigente is not None:
         today = date.today()
         if licencia_vigente:
-            query = query.filter(Driver.fecha_vencimiento_licencia > today)
+            query = query.where(Driver.fecha_vencimiento_licencia > today)
         else:
-            query = query.filter(Driver.fecha_vencimiento_licencia <= today)
-    
-    # Obtener total de registros
-    total = query.count()
+            query = query.where(Driver.fecha_vencimiento_licencia <= today)
     
-    # Aplicar paginación
-    drivers = query.offset(skip).limit(limit).all()
+    # Obtener total de registros solo si se pide
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
     
-    # Calcular páginas
-    pages = (total + limit - 1) // limit
-    current_page = (skip // limit) + 1
+    # Paginar por cursor en orden de id
+    drivers = (await db.scalars(keyset_paginate(query, Driver, limit, cursor, skip))).all()
     
-    return PaginatedResponse(
-        items=[DriverSchema.model_validate(d) for d in drivers],
+    return build_page(
+        drivers,
+        limit,
+        lambda d: DriverSchema.model_validate(d).model_dump(),
         total=total,
-        page=current_page,
-        pages=pages,
-        per_page=limit
+        skip=skip,
+        cursor=cursor
     )
 
 @router.get("/{driver_id}", response_model=DriverSchema)
-def get_driver(driver_id: int, db: Session = Depends(get_db)):
+async def get_driver(driver_id: int, db: AsyncSession = Depends(get_async_db)):
     """Obtiene un conductor específico por ID"""
     
-    driver = db.query(Driver).filter(
+    driver = await db.scalar(select(Driver).where(
         Driver.id == driver_id,
         Driver.activo == True
-    ).first()
+    ))
     
     if not driver:
         raise HTTPException(
@@ -219,21 +223,21 @@ def delete_driver(driver_id: int, db: Session = Depends(get_db)):
     return {"message": "Conductor eliminado exitosamente"}
 
 @router.get("/{driver_id}/assignments")
-def get_driver_assignments(
+async def get_driver_assignments(
     driver_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     fecha_inicio: Optional[datetime] = Query(None, description="Filtrar desde fecha"),
     fecha_fin: Optional[datetime] = Query(None, description="Filtrar hasta fecha"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene el historial de asignaciones de un conductor"""
     
     # Verificar que el conductor existe
-    driver = db.query(Driver).filter(
+    driver = await db.scalar(select(Driver).where(
         Driver.id == driver_id,
         Driver.activo == True
-    ).first()
+    ))
     
     if not driver:
         raise HTTPException(
@@ -242,22 +246,22 @@ def get_driver_assignments(
         )
     
     # Obtener asignaciones
-    from ...database.models import Assignment
+    from ....database.models import Assignment
     
-    assignments_query = db.query(Assignment).filter(
+    assignments_query = select(Assignment).where(
         Assignment.conductor_id == driver_id
     )
     
     # Aplicar filtros de fecha
     if fecha_inicio:
-        assignments_query = assignments_query.filter(Assignment.fecha_asignacion >= fecha_inicio)
+        assignments_query = assignments_query.where(Assignment.fecha_asignacion >= fecha_inicio)
     if fecha_fin:
-        assignments_query = assignments_query.filter(Assignment.fecha_asignacion <= fecha_fin)
+        assignments_query = assignments_query.where(Assignment.fecha_asignacion <= fecha_fin)
     
     assignments_query = assignments_query.order_by(Assignment.fecha_asignacion.desc())
     
-    total = assignments_query.count()
-    assignments = assignments_query.offset(skip).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(assignments_query.subquery()))
+    assignments = (await db.scalars(assignments_query.offset(skip).limit(limit))).all()
     
     return {
         "driver": DriverSchema.model_validate(driver),
@@ -268,17 +272,17 @@ def get_driver_assignments(
     }
 
 @router.get("/available/")
-def get_available_drivers(
+async def get_available_drivers(
     fecha_inicio: datetime = Query(..., description="Fecha y hora de inicio del servicio"),
     fecha_fin: datetime = Query(..., description="Fecha y hora de fin del servicio"),
     categoria_licencia: Optional[str] = Query(None, description="Categoría de licencia requerida"),
     anos_experiencia_min: Optional[int] = Query(None, ge=0, description="Años mínimos de experiencia"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene conductores disponibles para un período específico"""
     
     # Filtros base
-    query = db.query(Driver).filter(
+    query = select(Driver).where(
         Driver.activo == True,
         Driver.estado == DriverStatus.DISPONIBLE,
         Driver.fecha_vencimiento_licencia > date.today()  # Licencia vigente
@@ -286,14 +290,14 @@ def get_available_drivers(
     
     # Filtros opcionales
     if categoria_licencia:
-        query = query.filter(Driver.categoria_licencia.ilike(f"%{categoria_licencia}%"))
+        query = query.where(Driver.categoria_licencia.ilike(f"%{categoria_licencia}%"))
     
     if anos_experiencia_min:
-        query = query.filter(Driver.años_experiencia >= anos_experiencia_min)
+        query = query.where(Driver.años_experiencia >= anos_experiencia_min)
     
     # TODO: Implementar verificación de disponibilidad basada en asignaciones del período
     
-    available_drivers = query.all()
+    available_drivers = (await db.scalars(query)).all()
     
     # Verificar alertas de licencias próximas a vencer
     drivers_with_alerts = []
@@ -321,19 +325,19 @@ def get_available_drivers(
     }
 
 @router.get("/license-expiry-alerts/")
-def get_license_expiry_alerts(
+async def get_license_expiry_alerts(
     days_ahead: int = Query(30, ge=1, le=365, description="Días hacia adelante para verificar vencimientos"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene conductores con licencias próximas a vencer"""
     
     future_date = date.today() + timedelta(days=days_ahead)
     
-    drivers_expiring = db.query(Driver).filter(
+    drivers_expiring = (await db.scalars(select(Driver).where(
         Driver.activo == True,
         Driver.fecha_vencimiento_licencia <= future_date,
         Driver.fecha_vencimiento_licencia > date.today()
-    ).order_by(Driver.fecha_vencimiento_licencia).all()
+    ).order_by(Driver.fecha_vencimiento_licencia))).all()
     
     alerts = []
     for driver in drivers_expiring:
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ...core.database import get_db
-from ...database.models import Maintenance, MaintenanceStatus, MaintenanceType, Vehicle
-from ...schemas.schemas import (
+from ....core.database import get_db, get_read_db
+from ....core.pagination import keyset_paginate, build_page
+from ....database.models import Maintenance, MaintenanceStatus, MaintenanceType, Vehicle
+from ....schemas.schemas import (
     Maintenance as MaintenanceSchema,
     MaintenanceCreate,
     MaintenanceUpdate,
@@ -20,12 +21,14 @@ router = APIRouter()
 def get_maintenance_records(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(20, ge=1, le=100, description="Número de registros a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor de la respuesta anterior)"),
+    include_total: bool = Query(False, description="Incluir el total de registros (requiere un conteo adicional)"),
     vehiculo_id: Optional[int] = Query(None, description="Filtrar por vehículo"),
     tipo: Optional[MaintenanceType] = Query(None, description="Filtrar por tipo de mantenimiento"),
     estado: Optional[MaintenanceStatus] = Query(None, description="Filtrar por estado"),
     fecha_desde: Optional[date] = Query(None, description="Filtrar desde fecha"),
     fecha_hasta: Optional[date] = Query(None, description="Filtrar hasta fecha"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene lista de mantenimientos con filtros y paginación"""
     
@@ -44,25 +47,23 @@ def get_maintenance_records(
         fecha_hasta_end = datetime.combine(fecha_hasta, datetime.max.time())
         query = query.filter(Maintenance.fecha_programada <= fecha_hasta_end)
     
-    # Ordenar por fecha programada descendente
-    query = query.order_by(Maintenance.fecha_programada.desc())
-    
-    # Obtener total de registros
-    total = query.count()
-    
-    # Aplicar paginación
-    maintenance_records = query.offset(skip).limit(limit).all()
+    # Obtener total de registros solo si se pide
+    total = query.count() if include_total else None
     
-    # Calcular páginas
-    pages = (total + limit - 1) // limit
-    current_page = (skip // limit) + 1
+    # Ordenar por fecha programada descendente y paginar por cursor
+    sort_columns = [Maintenance.fecha_programada]
+    maintenance_records = keyset_paginate(
+        query, Maintenance, limit, cursor, skip, sort_columns, descending=True
+    ).all()
     
-    return PaginatedResponse(
-        items=[MaintenanceSchema.model_validate(m) for m in maintenance_records],
+    return build_page(
+        maintenance_records,
+        limit,
+        lambda m: MaintenanceSchema.model_validate(m).model_dump(),
+        sort_columns,
         total=total,
-        page=current_page,
-        pages=pages,
-        per_page=limit
+        skip=skip,
+        cursor=cursor
     )
 
 @router.get("/{maintenance_id}", response_model=MaintenanceSchema)
@@ -110,7 +111,7 @@ def create_maintenance(maintenance: MaintenanceCreate, db: Session = Depends(get
     
     # Si es mantenimiento correctivo o de emergencia, marcar vehículo como en mantenimiento
     if maintenance.tipo_mantenimiento in [MaintenanceType.CORRECTIVO, MaintenanceType.EMERGENCIA]:
-        from ...database.models import VehicleStatus
+        from ....database.models import VehicleStatus
         vehicle.estado = VehicleStatus.MANTENIMIENTO
     
     db.add(db_maintenance)
@@ -154,7 +155,7 @@ def update_maintenance(
     
     # Manejar cambios de estado
     if maintenance_update.estado and maintenance_update.estado != old_status:
-        await handle_maintenance_status_change(db, db_maintenance, vehicle, old_status)
+        handle_maintenance_status_change(db, db_maintenance, vehicle, old_status)
     
     db.commit()
     db.refresh(db_maintenance)
@@ -163,7 +164,7 @@ def update_maintenance(
     
     return MaintenanceSchema.model_validate(db_maintenance)
 
-async def handle_maintenance_status_change(
+def handle_maintenance_status_change(
     db: Session, 
     maintenance: Maintenance, 
     vehicle: Vehicle, 
@@ -171,7 +172,7 @@ async def handle_maintenance_status_change(
 ):
     """Maneja cambios de estado en el mantenimiento y actualiza el vehículo"""
     
-    from ...database.models import VehicleStatus
+    from ....database.models import VehicleStatus
     
     if maintenance.estado == MaintenanceStatus.EN_PROCESO:
         # Mantenimiento iniciado
@@ -225,7 +226,7 @@ def delete_maintenance(maintenance_id: int, db: Session = Depends(get_db)):
     # Actualizar estado del vehículo
     vehicle = db.query(Vehicle).filter(Vehicle.id == db_maintenance.vehiculo_id).first()
     if vehicle:
-        from ...database.models import VehicleStatus
+        from ....database.models import VehicleStatus
         vehicle.estado = VehicleStatus.DISPONIBLE
     
     db.commit()
@@ -239,7 +240,7 @@ def get_scheduled_maintenance(
     dias_adelante: int = Query(30, ge=1, le=365, description="Días hacia adelante para buscar mantenimientos"),
     vehiculo_id: Optional[int] = Query(None, description="Filtrar por vehículo específico"),
     tipo: Optional[MaintenanceType] = Query(None, description="Filtrar por tipo de mantenimiento"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene mantenimientos programados en los próximos días"""
     
@@ -294,7 +295,7 @@ def get_scheduled_maintenance(
 @router.get("/overdue/")
 def get_overdue_maintenance(
     vehiculo_id: Optional[int] = Query(None, description="Filtrar por vehículo específico"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene mantenimientos vencidos (no realizados en su fecha programada)"""
     
@@ -340,7 +341,7 @@ def get_maintenance_costs(
     vehiculo_id: Optional[int] = Query(None, description="Filtrar por vehículo específico"),
     fecha_desde: Optional[date] = Query(None, description="Fecha inicio"),
     fecha_hasta: Optional[date] = Query(None, description="Fecha fin"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene análisis de costos de mantenimiento"""
     
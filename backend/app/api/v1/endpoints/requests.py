@@ -1,19 +1,25 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request, Response
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ...core.database import get_db
-from ...database.models import TransportRequest, RequestStatus
-from ...schemas.schemas import (
+from ....core.database import get_db, get_read_db
+from ....core.pagination import keyset_paginate, build_page
+from ....database.models import TransportRequest, RequestStatus
+from ....schemas.schemas import (
     TransportRequest as TransportRequestSchema,
     TransportRequestCreate,
     TransportRequestUpdate,
     PaginatedResponse
 )
-from ...services.excel_processor import excel_processor
+from ....core.config import settings
+from ....core.uploads import upload_too_large_detail
+from ....services.excel_processor import excel_processor
+from ....services.import_jobs import import_job_service
 import logging
 from datetime import datetime, date
-import tempfile
-import os
+from email.utils import format_datetime, parsedate_to_datetime
+from pathlib import Path
+from uuid import uuid4
 
 logger = logging.getLogger(__name__)
 
@@ -23,13 +29,15 @@ router = APIRouter()
 def get_transport_requests(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(20, ge=1, le=100, description="Número de registros a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor de la respuesta anterior)"),
+    include_total: bool = Query(False, description="Incluir el total de registros (requiere un conteo adicional)"),
     numero_solicitud: Optional[str] = Query(None, description="Filtrar por número de solicitud"),
     solicitante: Optional[str] = Query(None, description="Filtrar por nombre del solicitante"),
     estado: Optional[RequestStatus] = Query(None, description="Filtrar por estado"),
     fecha_desde: Optional[date] = Query(None, description="Filtrar desde fecha de viaje"),
     fecha_hasta: Optional[date] = Query(None, description="Filtrar hasta fecha de viaje"),
     dependencia: Optional[str] = Query(None, description="Filtrar por dependencia"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene lista de solicitudes de transporte con filtros y paginación"""
     
@@ -50,28 +58,26 @@ def get_transport_requests(
         fecha_hasta_end = datetime.combine(fecha_hasta, datetime.max.time())
         query = query.filter(TransportRequest.fecha_viaje <= fecha_hasta_end)
     
-    # Ordenar por fecha de creación descendente
-    query = query.order_by(TransportRequest.created_at.desc())
-    
-    # Obtener total de registros
-    total = query.count()
-    
-    # Aplicar paginación
-    requests = query.offset(skip).limit(limit).all()
+    # Obtener total de registros solo si se pide
+    total = query.count() if include_total else None
     
-    # Calcular páginas
-    pages = (total + limit - 1) // limit
-    current_page = (skip // limit) + 1
+    # Ordenar por fecha de creación descendente y paginar por cursor
+    sort_columns = [TransportRequest.created_at]
+    requests = keyset_paginate(
+        query, TransportRequest, limit, cursor, skip, sort_columns, descending=True
+    ).all()
     
-    return PaginatedResponse(
-        items=[TransportRequestSchema.model_validate(r) for r in requests],
+    return build_page(
+        requests,
+        limit,
+        lambda r: TransportRequestSchema.model_validate(r).model_dump(),
+        sort_columns,
         total=total,
-        page=current_page,
-        pages=pages,
-        per_page=limit
+        skip=skip,
+        cursor=cursor
     )
 
-@router.get("/{request_id}", response_model=TransportRequestSchema)
+@router.get("/{request_id:int}", response_model=TransportRequestSchema)
 def get_transport_request(request_id: int, db: Session = Depends(get_db)):
     """Obtiene una solicitud de transporte específica por ID"""
     
@@ -129,7 +135,7 @@ def create_transport_request(request: TransportRequestCreate, db: Session = Depe
     
     return TransportRequestSchema.model_validate(db_request)
 
-@router.put("/{request_id}", response_model=TransportRequestSchema)
+@router.put("/{request_id:int}", response_model=TransportRequestSchema)
 def update_transport_request(
     request_id: int, 
     request_update: TransportRequestUpdate, 
@@ -177,7 +183,7 @@ def update_transport_request(
     
     return TransportRequestSchema.model_validate(db_request)
 
-@router.delete("/{request_id}")
+@router.delete("/{request_id:int}")
 def delete_transport_request(request_id: int, db: Session = Depends(get_db)):
     """Cancela una solicitud de transporte"""
     
@@ -208,60 +214,163 @@ def delete_transport_request(request_id: int, db: Session = Depends(get_db)):
     
     return {"message": "Solicitud de transporte cancelada exitosamente"}
 
-@router.post("/upload-excel")
+async def _save_upload(file: UploadFile, destination: Path) -> int:
+    """Copia el archivo recibido a `destination` por bloques y retorna su tamaño
+    
+    Cuando el endpoint se ejecuta, Starlette ya recibió el cuerpo completo en
+    un archivo temporal anónimo que se elimina al terminar la petición; el
+    trabajo en segundo plano necesita su propia copia. La copia se hace por
+    bloques, sin cargar el archivo en memoria.
+    
+    Las cargas con Content-Length excesivo se rechazan antes de recibirlas
+    (upload_size_middleware); aquí se aplica settings.MAX_FILE_SIZE al archivo
+    en sí, lo que cubre también las peticiones sin Content-Length.
+    """
+    too_large = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=upload_too_large_detail()
+    )
+    
+    # Tamaño del archivo temporal: rechazar sin copiarlo
+    if file.size is not None and file.size > settings.MAX_FILE_SIZE:
+        raise too_large
+    
+    written = 0
+    with open(destination, 'wb') as output:
+        while True:
+            block = await file.read(settings.UPLOAD_CHUNK_SIZE)
+            if not block:
+                break
+            
+            written += len(block)
+            if written > settings.MAX_FILE_SIZE:
+                raise too_large
+            
+            output.write(block)
+    
+    return written
+
+@router.post("/upload-excel", status_code=status.HTTP_202_ACCEPTED)
 async def upload_excel_file(
-    file: UploadFile = File(..., description="Archivo Excel con solicitudes de transporte"),
-    db: Session = Depends(get_db)
+    file: UploadFile = File(..., description="Archivo Excel, CSV, Parquet o .zip con solicitudes de transporte"),
+    all_sheets: bool = Query(False, description="Importar todas las hojas del libro, no solo la primera"),
+    validate_only: bool = Query(False, description="Solo validar el archivo, sin guardar solicitudes"),
+    report_format: Optional[str] = Query(None, pattern="^(xlsx|csv)$", description="Generar reporte de errores descargable (xlsx o csv)")
 ):
-    """Sube y procesa un archivo Excel con múltiples solicitudes de transporte"""
+    """Sube un archivo con múltiples solicitudes y encola su importación
+    
+    Se aceptan los formatos de settings.ALLOWED_EXTENSIONS (Excel, CSV y
+    Parquet), todos con las mismas columnas que la plantilla. Un .zip con
+    varios de estos archivos, o un libro con `all_sheets`, se importa como un
+    lote: las hojas se leen en paralelo y los errores indican la hoja.
+    El procesamiento se ejecuta en segundo plano; el avance y el resultado se
+    consultan en /requests/import-jobs/{job_id}.
+    
+    Con `validate_only` el archivo se revisa completo (incluyendo duplicados)
+    sin guardar nada y se genera un reporte con el error de cada fila
+    (xlsx por defecto), descargable desde /requests/import-reports/{report_id}.
+    """
     
     # Validar tipo de archivo
-    if not file.filename.lower().endswith(('.xlsx', '.xls')):
+    extension = Path(file.filename or "").suffix.lower()
+    if extension not in settings.ALLOWED_EXTENSIONS:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El archivo debe ser un Excel (.xlsx o .xls)"
+            detail=f"Formato no soportado. Extensiones permitidas: {', '.join(settings.ALLOWED_EXTENSIONS)}"
         )
     
-    # Validar tamaño del archivo (máximo 10 MB)
-    max_size = 10 * 1024 * 1024  # 10 MB
-    file_content = await file.read()
-    if len(file_content) > max_size:
+    bundle = all_sheets or extension == '.zip'
+    if bundle and report_format:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El archivo es demasiado grande. Máximo 10 MB"
+            detail="El reporte de errores solo está disponible para archivos de una hoja"
         )
     
-    # Guardar archivo temporalmente
+    if validate_only and not bundle:
+        report_format = report_format or "xlsx"
+    
+    # Guardar el archivo por bloques; el trabajo lo elimina al terminar
+    upload_dir = Path(settings.UPLOAD_DIR) / "imports"
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    file_path = upload_dir / f"{uuid4().hex}{extension}"
+    
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.xlsx') as tmp_file:
-            tmp_file.write(file_content)
-            tmp_file_path = tmp_file.name
-        
-        # Procesar archivo Excel
-        result = excel_processor.process_excel_file(tmp_file_path, db)
-        
-        # Limpiar archivo temporal
-        os.unlink(tmp_file_path)
-        
-        return {
-            "filename": file.filename,
-            "file_size": len(file_content),
-            "processing_result": result
-        }
-        
+        file_size = await _save_upload(file, file_path)
+        job = import_job_service.submit(
+            str(file_path),
+            file.filename,
+            file_size,
+            bundle=bundle,
+            validate_only=validate_only,
+            report_format=report_format
+        )
+    
     except Exception as e:
-        # Limpiar archivo temporal en caso de error
-        if 'tmp_file_path' in locals():
-            try:
-                os.unlink(tmp_file_path)
-            except:
-                pass
+        # Limpiar archivo en caso de error
+        file_path.unlink(missing_ok=True)
+        
+        if isinstance(e, HTTPException):
+            raise
         
-        logger.error(f"Error procesando archivo Excel: {e}")
+        logger.error(f"Error encolando archivo de importación: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error procesando archivo: {str(e)}"
         )
+    
+    return {
+        "filename": file.filename,
+        "file_size": file_size,
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "status_url": f"{settings.API_V1_STR}/requests/import-jobs/{job['job_id']}"
+    }
+
+@router.get("/import-jobs/{job_id}")
+def get_import_job(job_id: str):
+    """Obtiene el avance y, al terminar, el resultado de una importación
+    
+    El estado se guarda en la base de datos, así que cualquier worker responde.
+    El avance por bloque (`progress`) solo está al día en el worker que ejecuta
+    el trabajo; en los demás se ve "en_proceso" hasta que termina. Los reportes
+    de /import-reports se guardan en UPLOAD_DIR, que debe ser compartido si los
+    workers corren en distintas máquinas.
+    """
+    
+    job = import_job_service.get_job(job_id)
+    
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo de importación no encontrado"
+        )
+    
+    if job["result"] and job["result"].get("report_id"):
+        job["result"]["report_url"] = f"{settings.API_V1_STR}/requests/import-reports/{job['result']['report_id']}"
+    
+    return job
+
+@router.get("/import-reports/{report_id}")
+def download_import_report(report_id: str):
+    """Descarga el reporte de validación generado por una importación"""
+    
+    report_path = excel_processor.get_report_path(report_id)
+    
+    if not report_path:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Reporte no encontrado o expirado"
+        )
+    
+    media_type = (
+        'text/csv' if report_path.suffix == '.csv'
+        else 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+    return FileResponse(
+        report_path,
+        media_type=media_type,
+        filename=f"reporte_validacion{report_path.suffix}"
+    )
 
 @router.get("/excel-template/")
 def get_excel_template():
@@ -283,58 +392,60 @@ def get_excel_template():
     }
 
 @router.get("/download-template")
-async def download_excel_template():
-    """Descarga un archivo de template de Excel"""
+def download_excel_template(request: Request):
+    """Descarga un archivo de template de Excel
+    
+    El archivo se genera una sola vez y se sirve desde memoria. Soporta GET
+    condicional (If-None-Match / If-Modified-Since) respondiendo 304.
+    """
     
     try:
-        import pandas as pd
-        from fastapi.responses import StreamingResponse
-        import io
-        
-        # Crear DataFrame con el template
-        template_data = excel_processor.get_excel_template()
-        
-        # Crear DataFrame con las columnas y datos de ejemplo
-        columns = [col["name"] for col in template_data["columns"]]
-        example_data = template_data["example_data"]
-        
-        df = pd.DataFrame(example_data, columns=columns)
-        
-        # Crear archivo Excel en memoria
-        excel_buffer = io.BytesIO()
-        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Solicitudes')
-            
-            # Agregar hoja con instrucciones
-            instructions_data = {
-                'Campo': [col["name"] for col in template_data["columns"]],
-                'Requerido': [col["required"] for col in template_data["columns"]],
-                'Descripción': [col["description"] for col in template_data["columns"]]
-            }
-            instructions_df = pd.DataFrame(instructions_data)
-            instructions_df.to_excel(writer, index=False, sheet_name='Instrucciones')
-        
-        excel_buffer.seek(0)
-        
-        return StreamingResponse(
-            io.BytesIO(excel_buffer.getvalue()),
-            media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            headers={"Content-Disposition": "attachment; filename=template_solicitudes_transporte.xlsx"}
-        )
-        
+        template_file = excel_processor.get_template_file()
     except Exception as e:
         logger.error(f"Error generando template de Excel: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error generando template: {str(e)}"
         )
+    
+    headers = {
+        "ETag": template_file["etag"],
+        "Last-Modified": format_datetime(template_file["last_modified"], usegmt=True),
+        "Cache-Control": "public, max-age=3600"
+    }
+    
+    if _is_not_modified(request, template_file["etag"], template_file["last_modified"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    headers["Content-Disposition"] = "attachment; filename=template_solicitudes_transporte.xlsx"
+    return Response(
+        content=template_file["content"],
+        media_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        headers=headers
+    )
+
+def _is_not_modified(request: Request, etag: str, last_modified: datetime) -> bool:
+    """Evalúa las cabeceras condicionales del request (If-None-Match tiene prioridad)"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return last_modified <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    
+    return False
 
 @router.get("/pending/")
 def get_pending_requests(
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     prioridad: Optional[str] = Query(None, description="Filtrar por prioridad"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene solicitudes pendientes de asignación"""
     
@@ -372,7 +483,7 @@ def get_pending_requests(
 def get_requests_statistics(
     fecha_desde: Optional[date] = Query(None, description="Fecha inicio para estadísticas"),
     fecha_hasta: Optional[date] = Query(None, description="Fecha fin para estadísticas"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Obtiene estadísticas de las solicitudes de transporte"""
     
@@ -395,7 +506,7 @@ def get_requests_statistics(
     
     # Por prioridad
     stats_by_priority = {}
-    from ...database.models import AlertPriority
+    from ....database.models import AlertPriority
     for priority in AlertPriority:
         count = query.filter(TransportRequest.prioridad == priority).count()
         stats_by_priority[priority.value] = count
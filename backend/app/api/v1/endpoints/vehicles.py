@@ -1,7 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ....core.database import get_db
+from ....core.database import get_db, get_async_db, get_async_read_db
+from ....core.pagination import keyset_paginate, build_page
 from ....database.models import Vehicle, VehicleStatus, VehicleType
 from ....schemas.schemas import (
     Vehicle as VehicleSchema,
@@ -18,58 +21,59 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 @router.get("/", response_model=PaginatedResponse)
-def get_vehicles(
+async def get_vehicles(
     skip: int = Query(0, ge=0, description="Número de registros a omitir"),
     limit: int = Query(20, ge=1, le=100, description="Número de registros a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (next_cursor de la respuesta anterior)"),
+    include_total: bool = Query(False, description="Incluir el total de registros (requiere un conteo adicional)"),
     placa: Optional[str] = Query(None, description="Filtrar por placa"),
     estado: Optional[VehicleStatus] = Query(None, description="Filtrar por estado"),
     tipo: Optional[VehicleType] = Query(None, description="Filtrar por tipo de vehículo"),
     marca: Optional[str] = Query(None, description="Filtrar por marca"),
     activo: Optional[bool] = Query(None, description="Filtrar por estado activo/inactivo"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene lista de vehículos con filtros y paginación"""
     
-    query = db.query(Vehicle)
+    query = select(Vehicle)
     
     # Aplicar filtros
     if placa:
-        query = query.filter(Vehicle.placa.ilike(f"%{placa}%"))
+        query = query.where(Vehicle.placa.ilike(f"%{placa}%"))
     if estado:
-        query = query.filter(Vehicle.estado == estado)
+        query = query.where(Vehicle.estado == estado)
     if tipo:
-        query = query.filter(Vehicle.tipo_vehiculo == tipo)
+        query = query.where(Vehicle.tipo_vehiculo == tipo)
     if marca:
-        query = query.filter(Vehicle.marca.ilike(f"%{marca}%"))
+        query = query.where(Vehicle.marca.ilike(f"%{marca}%"))
     if activo is not None:
-        query = query.filter(Vehicle.activo == activo)
-    
-    # Obtener total de registros
-    total = query.count()
+        query = query.where(Vehicle.activo == activo)
     
-    # Aplicar paginación
-    vehicles = query.offset(skip).limit(limit).all()
+    # Obtener total de registros solo si se pide
+    total = None
+    if include_total:
+        total = await db.scalar(select(func.count()).select_from(query.subquery()))
     
-    # Calcular páginas
-    pages = (total + limit - 1) // limit
-    current_page = (skip // limit) + 1
+    # Paginar por cursor en orden de id
+    vehicles = (await db.scalars(keyset_paginate(query, Vehicle, limit, cursor, skip))).all()
     
-    return PaginatedResponse(
-        items=[VehicleSchema.model_validate(v) for v in vehicles],
+    return build_page(
+        vehicles,
+        limit,
+        lambda v: VehicleSchema.model_validate(v).model_dump(),
         total=total,
-        page=current_page,
-        pages=pages,
-        per_page=limit
+        skip=skip,
+        cursor=cursor
     )
 
 @router.get("/{vehicle_id}", response_model=VehicleSchema)
-def get_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
+async def get_vehicle(vehicle_id: int, db: AsyncSession = Depends(get_async_db)):
     """Obtiene un vehículo específico por ID"""
     
-    vehicle = db.query(Vehicle).filter(
+    vehicle = await db.scalar(select(Vehicle).where(
         Vehicle.id == vehicle_id,
         Vehicle.activo == True
-    ).first()
+    ))
     
     if not vehicle:
         raise HTTPException(
@@ -179,19 +183,19 @@ def delete_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
     return {"message": "Vehículo eliminado exitosamente"}
 
 @router.get("/{vehicle_id}/maintenance-history")
-def get_vehicle_maintenance_history(
+async def get_vehicle_maintenance_history(
     vehicle_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene el historial de mantenimiento de un vehículo"""
     
     # Verificar que el vehículo existe
-    vehicle = db.query(Vehicle).filter(
+    vehicle = await db.scalar(select(Vehicle).where(
         Vehicle.id == vehicle_id,
         Vehicle.activo == True
-    ).first()
+    ))
     
     if not vehicle:
         raise HTTPException(
@@ -200,14 +204,14 @@ def get_vehicle_maintenance_history(
         )
     
     # Obtener historial de mantenimiento
-    from ...database.models import Maintenance
+    from ....database.models import Maintenance
     
-    maintenance_query = db.query(Maintenance).filter(
+    maintenance_query = select(Maintenance).where(
         Maintenance.vehiculo_id == vehicle_id
     ).order_by(Maintenance.fecha_programada.desc())
     
-    total = maintenance_query.count()
-    maintenance_records = maintenance_query.offset(skip).limit(limit).all()
+    total = await db.scalar(select(func.count()).select_from(maintenance_query.subquery()))
+    maintenance_records = (await db.scalars(maintenance_query.offset(skip).limit(limit))).all()
     
     return {
         "vehicle": VehicleSchema.model_validate(vehicle),
@@ -218,18 +222,18 @@ def get_vehicle_maintenance_history(
     }
 
 @router.get("/{vehicle_id}/alerts")
-def get_vehicle_alerts(
+async def get_vehicle_alerts(
     vehicle_id: int,
     active_only: bool = Query(True, description="Solo alertas activas"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtiene las alertas de un vehículo específico"""
     
     # Verificar que el vehículo existe
-    vehicle = db.query(Vehicle).filter(
+    vehicle = await db.scalar(select(Vehicle).where(
         Vehicle.id == vehicle_id,
         Vehicle.activo == True
-    ).first()
+    ))
     
     if not vehicle:
         raise HTTPException(
@@ -238,19 +242,19 @@ def get_vehicle_alerts(
         )
     
     # Obtener alertas
-    from ...database.models import MaintenanceAlert
+    from ....database.models import MaintenanceAlert
     
-    alerts_query = db.query(MaintenanceAlert).filter(
+    alerts_query = select(MaintenanceAlert).where(
         MaintenanceAlert.vehiculo_id == vehicle_id
     )
     
     if active_only:
-        alerts_query = alerts_query.filter(MaintenanceAlert.activa == True)
+        alerts_query = alerts_query.where(MaintenanceAlert.activa == True)
     
-    alerts = alerts_query.order_by(
+    alerts = (await db.scalars(alerts_query.order_by(
         MaintenanceAlert.prioridad.desc(),
         MaintenanceAlert.fecha_creacion.desc()
-    ).all()
+    ))).all()
     
     return {
         "vehicle": VehicleSchema.model_validate(vehicle),
@@ -308,29 +312,29 @@ def update_vehicle_mileage(
     }
 
 @router.get("/available/")
-def get_available_vehicles(
+async def get_available_vehicles(
     fecha_inicio: datetime = Query(..., description="Fecha y hora de inicio del viaje"),
     fecha_fin: datetime = Query(..., description="Fecha y hora de fin del viaje"),
     tipo_vehiculo: Optional[VehicleType] = Query(None, description="Tipo de vehículo requerido"),
     capacidad_minima: Optional[int] = Query(None, ge=1, description="Capacidad mínima de pasajeros"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Obtiene vehículos disponibles para un período específico"""
     
     # TODO: Implementar lógica para verificar disponibilidad basada en asignaciones
     
-    query = db.query(Vehicle).filter(
+    query = select(Vehicle).where(
         Vehicle.activo == True,
         Vehicle.estado == VehicleStatus.DISPONIBLE
     )
     
     if tipo_vehiculo:
-        query = query.filter(Vehicle.tipo_vehiculo == tipo_vehiculo)
+        query = query.where(Vehicle.tipo_vehiculo == tipo_vehiculo)
     
     if capacidad_minima:
-        query = query.filter(Vehicle.capacidad_pasajeros >= capacidad_minima)
+        query = query.where(Vehicle.capacidad_pasajeros >= capacidad_minima)
     
-    available_vehicles = query.all()
+    available_vehicles = (await db.scalars(query)).all()
     
     return {
         "available_vehicles": [VehicleSchema.model_validate(v) for v in available_vehicles],
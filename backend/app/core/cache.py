@@ -0,0 +1,283 @@
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from collections import OrderedDict
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+import functools
+import inspect
+import json
+import logging
+import threading
+import time
+from .config import settings
+from .database import WRITE_METHODS, reads_from_primary
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # redis es opcional; solo se requiere con CACHE_BACKEND=redis
+    redis_asyncio = None
+
+logger = logging.getLogger(__name__)
+
+# Etiqueta de invalidación por recurso de la API: una escritura exitosa en
+# /api/v1/<recurso>/... invalida las respuestas que dependen de esa etiqueta
+RESOURCE_TAGS = {
+    "vehicles": "vehiculos",
+    "drivers": "conductores",
+    "requests": "solicitudes",
+    "assignments": "asignaciones",
+    "maintenance": "mantenimientos",
+    "alerts": "alertas",
+}
+ALL_TAGS = tuple(RESOURCE_TAGS.values())
+
+# Tipos de parámetro que forman parte de la clave (el resto, como la sesión de
+# base de datos, son dependencias)
+_KEY_TYPES = (str, int, float, bool, date, datetime, Enum, type(None))
+
+# Parámetro que `cached` agrega a los endpoints que no reciben el Request
+_REQUEST_PARAM = "_cache_request"
+
+class MemoryCacheBackend:
+    """LRU en memoria del proceso con expiración por entrada"""
+    
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # clave -> (expira, valor)
+        self._versions: Dict[str, int] = {}
+        # Seguro también si se usa desde otros hilos (scheduler, importaciones)
+        self._lock = threading.Lock()
+    
+    async def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+    
+    async def set(self, key: str, value: Any, ttl: int):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    async def versions(self, tags: Sequence[str]) -> List[int]:
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+    
+    async def bump(self, tags: Iterable[str]):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+    
+    async def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+    
+    def size(self) -> int:
+        return len(self._entries)
+
+class RedisCacheBackend:
+    """Caché compartida entre procesos/instancias en Redis; los valores se
+    guardan como JSON con expiración (SET EX)"""
+    
+    def __init__(self, url: str, prefix: str):
+        self.client = redis_asyncio.from_url(url)
+        self.prefix = prefix
+    
+    async def get(self, key: str) -> Optional[Any]:
+        value = await self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+    
+    async def set(self, key: str, value: Any, ttl: int):
+        await self.client.set(self.prefix + key, json.dumps(value), ex=ttl)
+    
+    async def versions(self, tags: Sequence[str]) -> List[int]:
+        if not tags:
+            return []
+        values = await self.client.mget([f"{self.prefix}version:{tag}" for tag in tags])
+        return [int(value or 0) for value in values]
+    
+    async def bump(self, tags: Iterable[str]):
+        async with self.client.pipeline(transaction=False) as pipeline:
+            for tag in tags:
+                pipeline.incr(f"{self.prefix}version:{tag}")
+            await pipeline.execute()
+    
+    async def clear(self):
+        async for key in self.client.scan_iter(match=f"{self.prefix}*"):
+            await self.client.delete(key)
+    
+    def size(self) -> Optional[int]:
+        return None  # no se consulta Redis para las métricas
+
+class ResponseCache:
+    """Caché de respuestas de endpoints de lectura, con TTL e invalidación
+    por etiquetas
+    
+    Cada etiqueta tiene un número de versión que forma parte de la clave;
+    invalidar la etiqueta incrementa su versión, de modo que las entradas
+    anteriores dejan de usarse (y expiran solas) sin recorrer la caché. Los
+    errores del backend (p. ej. Redis caído) se tratan como fallos de caché:
+    el endpoint responde igual, calculando la respuesta.
+    """
+    
+    def __init__(self, backend=None):
+        self.backend = backend
+        self._metrics: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+    
+    async def get_or_compute(self, name: str, params: Dict, tags: Sequence[str], ttl: int, compute):
+        """Respuesta en caché para `name` + `params`, o el resultado (ya
+        convertido a JSON) de `await compute()`"""
+        if not self.enabled or ttl <= 0:
+            return await compute()
+        
+        try:
+            key = self._key(name, params, await self.backend.versions(tags))
+            value = await self.backend.get(key)
+        except Exception as e:
+            logger.warning(f"Caché no disponible para {name}: {e}")
+            self._record(name, "errors")
+            return await compute()
+        
+        if value is not None:
+            self._record(name, "hits")
+            return value
+        
+        self._record(name, "misses")
+        value = jsonable_encoder(await compute())
+        
+        try:
+            await self.backend.set(key, value, ttl)
+        except Exception as e:
+            logger.warning(f"No se pudo guardar {name} en caché: {e}")
+        
+        return value
+    
+    async def invalidate(self, *tags: str):
+        """Descarta las respuestas que dependen de alguna de las etiquetas"""
+        if not self.enabled or not tags:
+            return
+        
+        try:
+            await self.backend.bump(tags)
+        except Exception as e:
+            logger.warning(f"No se pudo invalidar la caché ({', '.join(tags)}): {e}")
+    
+    async def clear(self):
+        """Vacía la caché y reinicia las métricas"""
+        if self.enabled:
+            await self.backend.clear()
+        with self._lock:
+            self._metrics.clear()
+    
+    def metrics(self) -> Dict:
+        """Aciertos, fallos y errores por endpoint, para monitoreo"""
+        with self._lock:
+            endpoints = {name: dict(counts) for name, counts in self._metrics.items()}
+        
+        for counts in endpoints.values():
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_ratio"] = round(counts["hits"] / lookups, 3) if lookups else None
+        
+        return {
+            "backend": type(self.backend).__name__ if self.enabled else None,
+            "entries": self.backend.size() if self.enabled else 0,
+            "endpoints": endpoints
+        }
+    
+    def _record(self, name: str, outcome: str):
+        with self._lock:
+            counts = self._metrics.setdefault(name, {"hits": 0, "misses": 0, "errors": 0})
+            counts[outcome] += 1
+    
+    @staticmethod
+    def _key(name: str, params: Dict, versions: List[int]) -> str:
+        encoded = json.dumps(jsonable_encoder(params), sort_keys=True, separators=(",", ":"))
+        return f"{name}:{'.'.join(map(str, versions))}:{encoded}"
+
+def _create_backend():
+    """Backend según CACHE_BACKEND; sin Redis disponible se usa la memoria del proceso"""
+    if settings.CACHE_BACKEND == "redis":
+        if redis_asyncio is None:
+            logger.warning("CACHE_BACKEND=redis pero el paquete redis no está instalado; se usa caché en memoria")
+        else:
+            return RedisCacheBackend(settings.CACHE_REDIS_URL, settings.CACHE_KEY_PREFIX)
+    
+    if settings.CACHE_BACKEND in ("redis", "memory"):
+        return MemoryCacheBackend(settings.CACHE_MAX_ENTRIES)
+    
+    return None
+
+# Instancia global de la caché de respuestas
+response_cache = ResponseCache(_create_backend())
+
+def cached(name: str, tags: Sequence[str], ttl: Optional[int] = None):
+    """Decorador para endpoints `async def` de lectura: cachea la respuesta
+    por nombre + parámetros de la petición, con las etiquetas de invalidación
+    de los datos que usa
+    
+    Las lecturas de un cliente que acaba de escribir (cookie de
+    read-your-writes) van al primario y usan entradas propias: nunca reciben
+    una respuesta calculada en la réplica, que puede no tener aún su escritura.
+    """
+    def decorator(endpoint):
+        signature = inspect.signature(endpoint)
+        request_param = next(
+            (param.name for param in signature.parameters.values() if param.annotation is Request),
+            None
+        )
+        
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request = kwargs[request_param] if request_param else kwargs.pop(_REQUEST_PARAM)
+            params = {key: value for key, value in kwargs.items() if isinstance(value, _KEY_TYPES)}
+            if reads_from_primary(request):
+                params[_REQUEST_PARAM] = "primario"
+            
+            return await response_cache.get_or_compute(
+                name, params, tags,
+                settings.CACHE_DEFAULT_TTL if ttl is None else ttl,
+                lambda: endpoint(*args, **kwargs)
+            )
+        
+        if request_param is None:
+            # FastAPI entrega el Request a los parámetros anotados con él
+            wrapper.__signature__ = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(_REQUEST_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Request)
+            ])
+        
+        return wrapper
+    
+    return decorator
+
+def resource_tag(path: str) -> Optional[str]:
+    """Etiqueta de invalidación del recurso de `path` (/api/v1/<recurso>/...)"""
+    if not path.startswith(settings.API_V1_STR + "/"):
+        return None
+    return RESOURCE_TAGS.get(path[len(settings.API_V1_STR) + 1:].split("/", 1)[0])
+
+async def cache_invalidation_middleware(request: Request, call_next):
+    """Invalida la caché de respuestas tras cada escritura exitosa en un recurso
+    (antes de entregar la respuesta: la siguiente lectura ya ve el cambio)"""
+    response = await call_next(request)
+    
+    if request.method in WRITE_METHODS and response.status_code < 400:
+        tag = resource_tag(request.url.path)
+        if tag:
+            await response_cache.invalidate(tag)
+    
+    return response
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Optional
 import os
 
 class Settings(BaseSettings):
@@ -7,9 +7,41 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Sistema de Gestión de Flota - Personería"
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
+    DEBUG: bool = False  # cabeceras de diagnóstico (consultas SQL, Server-Timing)
     
     # Configuración de la base de datos
     DATABASE_URL: str = "sqlite:///./fleet_management.db"
+    DB_ECHO: bool = False  # registrar las consultas SQL (solo para debug)
+    DB_SLOW_QUERY_MS: int = 200  # registrar consultas más lentas que esto (0 = no registrar)
+    DB_QUERY_STATS_TOP: int = 3  # consultas más lentas reportadas por petición
+    
+    # Acceso asíncrono (AsyncSession) para los endpoints de lectura. Sin
+    # DATABASE_ASYNC_URL se deriva de DATABASE_URL con aiosqlite / asyncpg
+    DB_ASYNC_ENABLED: bool = True
+    DATABASE_ASYNC_URL: Optional[str] = None
+    
+    # Réplica de lectura opcional para dashboard, estadísticas y listados.
+    # Tras una escritura el cliente lee del primario durante
+    # DB_REPLICA_STICKY_SECONDS (cubre el retraso de replicación)
+    DATABASE_REPLICA_URL: Optional[str] = None
+    DATABASE_REPLICA_ASYNC_URL: Optional[str] = None
+    DB_REPLICA_STICKY_SECONDS: int = 10
+    
+    # Configuración del pool de conexiones (sin valor: por defecto del motor,
+    # 5 + 10 de desborde en SQLite y 10 + 20 en PostgreSQL)
+    DB_POOL_SIZE: Optional[int] = None
+    DB_MAX_OVERFLOW: Optional[int] = None
+    DB_POOL_TIMEOUT: int = 30  # segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = 1800  # segundos antes de reabrir una conexión
+    DB_POOL_PRE_PING: bool = True  # verificar la conexión antes de entregarla
+    
+    # Perfil de SQLite, aplicado a cada conexión (valor vacío = no modificar)
+    SQLITE_JOURNAL_MODE: str = "WAL"  # lecturas concurrentes con una escritura
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT: int = 5000  # ms esperando un lock antes de fallar
+    SQLITE_CACHE_SIZE: int = -64000  # negativo = KiB (64 MB por conexión)
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024  # bytes
+    SQLITE_TEMP_STORE: str = "MEMORY"
     
     # Configuración de seguridad
     SECRET_KEY: str = "tu-clave-secreta-muy-segura-aqui-change-in-production"
@@ -30,6 +62,10 @@ class Settings(BaseSettings):
     ENABLE_NOTIFICATIONS: bool = True
     NOTIFICATION_CHECK_INTERVAL: int = 6  # horas
     
+    # Contadores materializados del dashboard: cada cuánto se recalculan
+    # desde las tablas de origen (0 = no reconciliar)
+    FLEET_COUNTERS_RECONCILE_MINUTES: int = 60
+    
     # Configuración de mantenimiento
     MAINTENANCE_KM_INTERVAL: int = 10000  # km
     MAINTENANCE_ALERT_KM_THRESHOLD: int = 1000  # km
@@ -41,7 +77,34 @@ class Settings(BaseSettings):
     # Configuración de archivos
     UPLOAD_DIR: str = "uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10 MB
-    ALLOWED_EXTENSIONS: List[str] = [".xlsx", ".xls", ".csv"]
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # bytes leídos por iteración al recibir archivos
+    UPLOAD_FORM_OVERHEAD: int = 64 * 1024  # margen del formulario multipart sobre MAX_FILE_SIZE
+    ALLOWED_EXTENSIONS: List[str] = [".xlsx", ".xls", ".csv", ".parquet", ".zip"]
+    
+    # Configuración de importación masiva
+    EXCEL_IMPORT_CHUNK_SIZE: int = 500  # filas por bloque
+    EXCEL_IMPORT_BATCH_SIZE: int = 500  # filas por INSERT en lote
+    IMPORT_JOB_WORKERS: int = 2  # importaciones simultáneas en segundo plano
+    IMPORT_JOB_RETENTION_HOURS: int = 24  # tiempo que se conserva el resultado
+    IMPORT_BUNDLE_WORKERS: int = 4  # procesos para leer hojas/archivos de un lote
+    IMPORT_BUNDLE_PARALLEL_MIN_BYTES: int = 1024 * 1024  # lotes menores se leen sin pool
+    IMPORT_BUNDLE_MAX_MEMBERS: int = 100  # archivos importables por .zip
+    IMPORT_BUNDLE_MAX_EXTRACTED_BYTES: int = 100 * 1024 * 1024  # total descomprimido por .zip
+    
+    # Caché de respuestas del dashboard: "memory" (LRU del proceso), "redis"
+    # (compartida entre instancias) o vacío para desactivarla. Se invalida
+    # con cada escritura en la API; el TTL acota el desfase de las escrituras
+    # que no pasan por ella (scheduler, importaciones en segundo plano)
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_KEY_PREFIX: str = "flota:cache:"
+    CACHE_DEFAULT_TTL: int = 10  # segundos
+    CACHE_MAX_ENTRIES: int = 1024  # entradas de la caché en memoria
+    
+    # Dashboard en vivo (/dashboard/stream, Server-Sent Events)
+    EVENT_BUS_QUEUE_SIZE: int = 1000  # eventos pendientes por suscriptor
+    DASHBOARD_STREAM_BATCH_SECONDS: float = 0.5  # espera para agrupar eventos seguidos
+    DASHBOARD_STREAM_PING_SECONDS: int = 15  # keep-alive para proxies
     
     # Configuración de paginación
     DEFAULT_PAGE_SIZE: int = 20
@@ -1,26 +1,217 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from fastapi import Request
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import StaticPool, QueuePool, AsyncAdaptedQueuePool
+from typing import Dict, Optional
+import logging
+import threading
+import time
 from .config import settings
+from .instrumentation import install_query_instrumentation
 
-# Crear engine de SQLAlchemy
-if settings.DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
-        echo=False  # Cambiar a True para debug
+logger = logging.getLogger(__name__)
+
+# Valores por defecto del pool según el motor; se sobrescriben con
+# DB_POOL_SIZE / DB_MAX_OVERFLOW
+POOL_DEFAULTS = {
+    "sqlite": {"pool_size": 5, "max_overflow": 10},
+    "postgresql": {"pool_size": 10, "max_overflow": 20}
+}
+
+# Driver asíncrono equivalente a cada motor
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg"
+}
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool que registra cuántas conexiones se entregan y cuánto se espera por ellas"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._metrics_lock = threading.Lock()
+        self._checkouts = 0
+        self._timeouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._metrics_lock:
+                self._timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics_lock:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+    
+    def metrics(self) -> Dict:
+        """Estado actual del pool y tiempos de espera acumulados"""
+        with self._metrics_lock:
+            checkouts = self._checkouts
+            return {
+                "pool_size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_out": self.checkedout(),
+                "checked_in": self.checkedin(),
+                "overflow": max(self.overflow(), 0),
+                "checkouts": checkouts,
+                "timeouts": self._timeouts,
+                "wait_avg_ms": round(self._wait_total / checkouts * 1000, 3) if checkouts else 0.0,
+                "wait_max_ms": round(self._wait_max * 1000, 3)
+            }
+
+class InstrumentedAsyncQueuePool(InstrumentedQueuePool, AsyncAdaptedQueuePool):
+    """InstrumentedQueuePool para el engine asíncrono (cola compatible con asyncio)"""
+
+def _is_memory_sqlite(url) -> bool:
+    """Una base SQLite en memoria vive en una sola conexión"""
+    return url.get_backend_name() == "sqlite" and (
+        url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
     )
-else:
-    engine = create_engine(
-        settings.DATABASE_URL,
-        echo=False  # Cambiar a True para debug
+
+def _engine_options(database_url: str, pool_class=InstrumentedQueuePool) -> Dict:
+    """Opciones de create_engine según el motor y la configuración del pool"""
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    options = {"echo": settings.DB_ECHO}
+    
+    if backend == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        
+        if _is_memory_sqlite(url):
+            # Todas las sesiones deben compartir la misma conexión
+            options["poolclass"] = StaticPool
+            return options
+    
+    defaults = POOL_DEFAULTS.get(backend, POOL_DEFAULTS["postgresql"])
+    options.update(
+        poolclass=pool_class,
+        pool_size=settings.DB_POOL_SIZE or defaults["pool_size"],
+        max_overflow=settings.DB_MAX_OVERFLOW if settings.DB_MAX_OVERFLOW is not None else defaults["max_overflow"],
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING
     )
+    return options
+
+def sqlite_pragmas() -> Dict:
+    """Perfil de rendimiento de SQLite según la configuración (omite valores vacíos)"""
+    pragmas = {
+        "journal_mode": settings.SQLITE_JOURNAL_MODE,
+        "synchronous": settings.SQLITE_SYNCHRONOUS,
+        "busy_timeout": settings.SQLITE_BUSY_TIMEOUT,
+        "cache_size": settings.SQLITE_CACHE_SIZE,
+        "mmap_size": settings.SQLITE_MMAP_SIZE,
+        "temp_store": settings.SQLITE_TEMP_STORE
+    }
+    return {name: value for name, value in pragmas.items() if value not in (None, "")}
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Aplica el perfil de SQLite a cada conexión nueva del pool
+    
+    Con journal_mode=WAL las lecturas no se bloquean mientras el scheduler
+    escribe; synchronous=NORMAL es seguro en WAL y evita un fsync por commit.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def _create_engine(database_url: str):
+    """Engine síncrono con el pool configurado y el perfil de SQLite"""
+    new_engine = create_engine(database_url, **_engine_options(database_url))
+    install_query_instrumentation(new_engine)
+    
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine, "connect", set_sqlite_pragmas)
+    
+    return new_engine
+
+# Crear engine de SQLAlchemy
+engine = _create_engine(settings.DATABASE_URL)
 
 # Crear SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Réplica de lectura; sin DATABASE_REPLICA_URL es el mismo engine primario
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = _create_engine(settings.DATABASE_REPLICA_URL)
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+else:
+    replica_engine = engine
+    ReplicaSessionLocal = SessionLocal
+
+def async_database_url(database_url: str, async_url: Optional[str] = None) -> str:
+    """URL del engine asíncrono: `async_url` explícita o `database_url` con el driver asíncrono"""
+    if async_url:
+        return async_url
+    
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No hay driver asíncrono configurado para {backend}; defina DATABASE_ASYNC_URL")
+    
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+def _create_async_engine(database_url: str, async_url: Optional[str] = None):
+    """Engine asíncrono opcional; None si está deshabilitado o falta el driver
+    
+    Usa el mismo pool instrumentado y el mismo perfil de SQLite que el engine
+    síncrono. Una base SQLite en memoria no se comparte entre ambos engines.
+    """
+    if not settings.DB_ASYNC_ENABLED:
+        return None
+    
+    try:
+        url = async_database_url(database_url, async_url)
+        new_engine = create_async_engine(url, **_engine_options(url, InstrumentedAsyncQueuePool))
+    except (ImportError, ValueError) as e:
+        logger.warning(f"Acceso asíncrono a la base de datos deshabilitado: {e}")
+        return None
+    
+    install_query_instrumentation(new_engine.sync_engine)
+    
+    if new_engine.dialect.name == "sqlite":
+        event.listen(new_engine.sync_engine, "connect", set_sqlite_pragmas)
+    
+    return new_engine
+
+def _async_session_factory(bind):
+    if bind is None:
+        return None
+    
+    return async_sessionmaker(
+        bind=bind,
+        autoflush=False,
+        # Los objetos se serializan después del commit, sin lazy loads
+        expire_on_commit=False
+    )
+
+async_engine = _create_async_engine(settings.DATABASE_URL, settings.DATABASE_ASYNC_URL)
+AsyncSessionLocal = _async_session_factory(async_engine)
+
+if settings.DATABASE_REPLICA_URL:
+    async_replica_engine = _create_async_engine(settings.DATABASE_REPLICA_URL, settings.DATABASE_REPLICA_ASYNC_URL)
+    AsyncReplicaSessionLocal = _async_session_factory(async_replica_engine)
+else:
+    async_replica_engine = async_engine
+    AsyncReplicaSessionLocal = AsyncSessionLocal
+
+# Cookie que mantiene las lecturas de un cliente en el primario justo después
+# de que escribió (read-your-writes mientras la réplica se pone al día)
+PRIMARY_STICKY_COOKIE = "db_primary"
+WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
 # Base para los modelos
 Base = declarative_base()
 
@@ -32,6 +223,83 @@ def get_db():
     finally:
         db.close()
 
+# Dependency asíncrona, para endpoints `async def`
+async def get_async_db():
+    if AsyncSessionLocal is None:
+        raise RuntimeError("El acceso asíncrono a la base de datos no está disponible (DB_ASYNC_ENABLED o driver asíncrono)")
+    
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def reads_from_primary(request: Request) -> bool:
+    """El cliente escribió hace poco: sus lecturas van al primario"""
+    return PRIMARY_STICKY_COOKIE in request.cookies
+
+# Dependencies para endpoints de solo lectura (dashboard, estadísticas, listados)
+def get_read_db(request: Request):
+    session_factory = SessionLocal if reads_from_primary(request) else ReplicaSessionLocal
+    db = session_factory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_read_db(request: Request):
+    session_factory = AsyncSessionLocal if reads_from_primary(request) else AsyncReplicaSessionLocal
+    if session_factory is None:
+        raise RuntimeError("El acceso asíncrono a la base de datos no está disponible (DB_ASYNC_ENABLED o driver asíncrono)")
+    
+    async with session_factory() as db:
+        yield db
+
+async def read_your_writes_middleware(request: Request, call_next):
+    """Marca con PRIMARY_STICKY_COOKIE a los clientes que acaban de escribir"""
+    response = await call_next(request)
+    
+    if (
+        replica_engine is not engine
+        and request.method in WRITE_METHODS
+        and response.status_code < 400
+    ):
+        response.set_cookie(
+            PRIMARY_STICKY_COOKIE,
+            "1",
+            max_age=settings.DB_REPLICA_STICKY_SECONDS,
+            httponly=True,
+            samesite="lax"
+        )
+    
+    return response
+
+async def dispose_async_engine():
+    """Cierra las conexiones de los engines asíncronos (al apagar la aplicación)"""
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_replica_engine is not None and async_replica_engine is not async_engine:
+        await async_replica_engine.dispose()
+
+def _pool_metrics(pool) -> Dict:
+    metrics = {"pool_class": type(pool).__name__}
+    
+    if isinstance(pool, InstrumentedQueuePool):
+        metrics.update(pool.metrics())
+    
+    return metrics
+
+def get_pool_metrics() -> Dict:
+    """Métricas del pool de conexiones para monitoreo"""
+    metrics = _pool_metrics(engine.pool)
+    
+    if async_engine is not None:
+        metrics["async"] = _pool_metrics(async_engine.pool)
+    
+    if replica_engine is not engine:
+        metrics["replica"] = _pool_metrics(replica_engine.pool)
+        if async_replica_engine is not None:
+            metrics["replica_async"] = _pool_metrics(async_replica_engine.pool)
+    
+    return metrics
+
 # Función para crear las tablas
 def create_tables():
     """Crea todas las tablas en la base de datos"""
@@ -40,4 +308,4 @@ def create_tables():
 # Función para limpiar la base de datos (solo para desarrollo)
 def drop_tables():
     """Elimina todas las tablas (solo para desarrollo)"""
-    Base.metadata.drop_all(bind=engine)
\ No newline at end of file
+    Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,77 @@
+from fastapi.encoders import jsonable_encoder
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, Optional
+import asyncio
+import json
+import logging
+import threading
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+class EventBus:
+    """Bus de eventos en memoria del proceso (publicar / suscribirse)
+    
+    publish() se puede llamar desde cualquier hilo: endpoints síncronos en el
+    threadpool, el scheduler o el event loop. Cada suscriptor recibe los
+    eventos en una cola acotada en su propio event loop; si no los consume a
+    tiempo se descartan los más antiguos.
+    """
+    
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: Dict[asyncio.Queue, asyncio.AbstractEventLoop] = {}
+        self._lock = threading.Lock()
+    
+    def publish(self, event_type: str, data: Optional[Dict[str, Any]] = None):
+        event = {
+            "type": event_type,
+            "data": jsonable_encoder(data or {}),
+            "timestamp": datetime.now().isoformat()
+        }
+        
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        
+        for queue, loop in subscribers:
+            if loop is current_loop:
+                self._deliver(queue, event)
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+    
+    @asynccontextmanager
+    async def subscribe(self):
+        """Cola con los eventos publicados mientras dure el contexto"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+        
+        try:
+            yield queue
+        finally:
+            with self._lock:
+                self._subscribers.pop(queue, None)
+    
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subscribers)
+    
+    @staticmethod
+    def _deliver(queue: asyncio.Queue, event: Dict):
+        if queue.full():
+            queue.get_nowait()
+            logger.warning("Suscriptor del bus de eventos saturado: se descarta el evento más antiguo")
+        queue.put_nowait(event)
+
+def sse_message(event: str, data: Any) -> str:
+    """Mensaje en formato Server-Sent Events"""
+    return f"event: {event}\ndata: {json.dumps(jsonable_encoder(data), separators=(',', ':'))}\n\n"
+
+# Instancia global del bus de eventos
+event_bus = EventBus(settings.EVENT_BUS_QUEUE_SIZE)
\ No newline at end of file
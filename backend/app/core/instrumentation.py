@@ -0,0 +1,113 @@
+from fastapi import Request
+from sqlalchemy import event
+from contextvars import ContextVar
+from typing import List, Optional
+import logging
+import threading
+import time
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# Clave en connection.info con los tiempos de inicio de las sentencias en curso
+_START_TIMES_KEY = "query_start_times"
+
+class QueryStats:
+    """Consultas SQL ejecutadas durante una petición: número, tiempo total y
+    las más lentas"""
+    
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.count = 0
+        self.total_time = 0.0
+        self.slowest: List[tuple] = []  # (segundos, sentencia), de mayor a menor
+        # Los endpoints síncronos corren en el threadpool
+        self._lock = threading.Lock()
+    
+    def record(self, statement: str, elapsed: float):
+        with self._lock:
+            self.count += 1
+            self.total_time += elapsed
+            
+            if len(self.slowest) < settings.DB_QUERY_STATS_TOP or elapsed > self.slowest[-1][0]:
+                self.slowest.append((elapsed, statement))
+                self.slowest.sort(key=lambda item: item[0], reverse=True)
+                del self.slowest[settings.DB_QUERY_STATS_TOP:]
+
+# Estadísticas de la petición en curso (None fuera de una petición, p. ej. en el scheduler)
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def current_query_stats() -> Optional[QueryStats]:
+    """Estadísticas de consultas de la petición en curso"""
+    return _current_stats.get()
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info[_START_TIMES_KEY].pop()
+    stats = _current_stats.get()
+    
+    if stats is not None:
+        stats.record(statement, elapsed)
+    
+    if settings.DB_SLOW_QUERY_MS and elapsed * 1000 >= settings.DB_SLOW_QUERY_MS:
+        logger.warning(
+            f"Consulta lenta ({elapsed * 1000:.1f} ms) en "
+            f"{stats.endpoint if stats else 'tarea en segundo plano'}: {_one_line(statement)}"
+        )
+
+def _on_error(exception_context):
+    # La sentencia falló: descartar su tiempo de inicio
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_START_TIMES_KEY):
+        connection.info[_START_TIMES_KEY].pop()
+
+def install_query_instrumentation(bind):
+    """Registra los eventos de tiempo por sentencia en un engine síncrono
+    (para uno asíncrono, pasar `async_engine.sync_engine`)"""
+    if event.contains(bind, "before_cursor_execute", _before_cursor_execute):
+        return
+    
+    event.listen(bind, "before_cursor_execute", _before_cursor_execute)
+    event.listen(bind, "after_cursor_execute", _after_cursor_execute)
+    event.listen(bind, "handle_error", _on_error)
+
+async def query_stats_middleware(request: Request, call_next):
+    """Acumula las consultas de cada petición; con DEBUG las expone en las
+    cabeceras X-DB-Query-Count / X-DB-Time-ms y en Server-Timing"""
+    stats = QueryStats(f"{request.method} {request.url.path}")
+    token = _current_stats.set(stats)
+    start = time.perf_counter()
+    
+    try:
+        response = await call_next(request)
+    finally:
+        _current_stats.reset(token)
+    
+    if settings.DEBUG:
+        total_ms = (time.perf_counter() - start) * 1000
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Time-ms"] = f"{stats.total_time * 1000:.3f}"
+        response.headers["Server-Timing"] = server_timing(stats, total_ms)
+    
+    return response
+
+def server_timing(stats: QueryStats, total_ms: float) -> str:
+    """Cabecera Server-Timing: total de la petición, base de datos y las
+    sentencias más lentas (visible en las herramientas de desarrollo del navegador)"""
+    metrics = [
+        f"total;dur={total_ms:.3f}",
+        f'db;dur={stats.total_time * 1000:.3f};desc="{stats.count} consultas"'
+    ]
+    
+    for position, (elapsed, statement) in enumerate(stats.slowest, start=1):
+        # Las cabeceras HTTP solo admiten latin-1; se dejan en ASCII
+        description = _one_line(statement)[:100].replace('"', "'").replace("\\", "/")
+        description = description.encode("ascii", "replace").decode()
+        metrics.append(f'db-slow-{position};dur={elapsed * 1000:.3f};desc="{description}"')
+    
+    return ", ".join(metrics)
+
+def _one_line(statement: str) -> str:
+    return " ".join(statement.split())
\ No newline at end of file
@@ -0,0 +1,125 @@
+from fastapi import HTTPException, status
+from sqlalchemy import select, func, literal, tuple_
+from sqlalchemy.orm import aliased
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+import base64
+import binascii
+import json
+from ..schemas.schemas import PaginatedResponse
+
+def encode_cursor(item, sort_columns: Sequence) -> str:
+    """Cursor opaco con la posición de `item` en el orden (columnas + id)"""
+    values = [_to_json(getattr(item, column.key)) for column in sort_columns]
+    payload = json.dumps({"id": item.id, "v": values}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_columns: Sequence) -> Dict:
+    """Posición codificada en un cursor; HTTP 400 si no corresponde a este listado"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        values = payload["v"]
+        if len(values) != len(sort_columns):
+            raise ValueError("número de columnas distinto")
+        return {
+            "id": int(payload["id"]),
+            "values": [_from_json(column, value) for column, value in zip(sort_columns, values)]
+        }
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor de paginación inválido"
+        )
+
+def keyset_paginate(
+    query,
+    model,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    sort_columns: Sequence = (),
+    descending: bool = False
+):
+    """Ordena `query` por sort_columns + id y limita a la página pedida
+    
+    Con `cursor` se filtran las filas posteriores a la posición del cursor
+    (keyset), de modo que el costo no crece con la profundidad de la página;
+    sin él se usa `skip` (offset), que se mantiene por compatibilidad. Se pide
+    una fila extra para saber si hay más páginas (ver build_page).
+    Funciona tanto con Query (Session) como con select (AsyncSession).
+    """
+    order = [*sort_columns, model.id]
+    
+    if cursor:
+        query = query.where(_after_cursor(model, sort_columns, decode_cursor(cursor, sort_columns), descending))
+    
+    query = query.order_by(None).order_by(
+        *[column.desc() if descending else column.asc() for column in order]
+    ).limit(limit + 1)
+    
+    if skip and not cursor:
+        query = query.offset(skip)
+    
+    return query
+
+def build_page(
+    rows: List,
+    limit: int,
+    serialize: Callable[[Any], Dict],
+    sort_columns: Sequence = (),
+    total: Optional[int] = None,
+    skip: int = 0,
+    cursor: Optional[str] = None
+) -> PaginatedResponse:
+    """Arma la respuesta paginada a partir de las limit + 1 filas de keyset_paginate"""
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    
+    return PaginatedResponse(
+        items=[serialize(row) for row in rows],
+        per_page=limit,
+        has_more=has_more,
+        next_cursor=encode_cursor(rows[-1], sort_columns) if has_more else None,
+        total=total,
+        # Número de página solo en modo offset; con cursor no se conoce
+        page=None if cursor else (skip // limit) + 1,
+        pages=(total + limit - 1) // limit if total is not None else None
+    )
+
+def _after_cursor(model, sort_columns: Sequence, position: Dict, descending: bool):
+    """Condición (c1, ..., id) > o < la posición del cursor (comparación de tuplas,
+    que SQLite y PostgreSQL resuelven con el índice del orden)
+    
+    Los valores se toman de la fila del cursor en la propia base de datos, con
+    el mismo formato almacenado (en SQLite las fechas son texto y
+    CURRENT_TIMESTAMP no guarda microsegundos); si la fila ya no existe se
+    usan los valores del cursor.
+    """
+    cursor_row = aliased(model)
+    bounds = []
+    
+    for column, value in zip(sort_columns, position["values"]):
+        stored = select(getattr(cursor_row, column.key)).where(cursor_row.id == position["id"]).scalar_subquery()
+        bounds.append(func.coalesce(stored, literal(value, type_=column.type)))
+    bounds.append(literal(position["id"]))
+    
+    columns = tuple_(*sort_columns, model.id)
+    return columns < tuple_(*bounds) if descending else columns > tuple_(*bounds)
+
+def _to_json(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "value"):
+        return value.value
+    return value
+
+def _from_json(column, value):
+    if value is None:
+        return None
+    
+    python_type = column.type.python_type
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from fastapi import Request, status
+from fastapi.responses import JSONResponse
+from .config import settings
+
+def upload_too_large_detail() -> str:
+    """Mensaje de error para archivos que superan settings.MAX_FILE_SIZE"""
+    return f"El archivo es demasiado grande. Máximo {settings.MAX_FILE_SIZE // (1024 * 1024)} MB"
+
+async def upload_size_middleware(request: Request, call_next):
+    """Rechaza con 413 los formularios multipart cuyo Content-Length supera
+    MAX_FILE_SIZE (más UPLOAD_FORM_OVERHEAD para los encabezados del formulario)
+    
+    Starlette copia el cuerpo completo a un archivo temporal antes de llamar al
+    endpoint: este es el único punto en que se puede rechazar sin recibirlo.
+    Las peticiones sin Content-Length (transfer-encoding chunked) se controlan
+    después, al copiar el archivo (ver _save_upload).
+    """
+    content_type = request.headers.get("content-type", "")
+    content_length = request.headers.get("content-length", "")
+    
+    if (
+        content_type.startswith("multipart/form-data")
+        and content_length.isdigit()
+        and int(content_length) > settings.MAX_FILE_SIZE + settings.UPLOAD_FORM_OVERHEAD
+    ):
+        return JSONResponse(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            content={"detail": upload_too_large_detail()},
+            headers={"Connection": "close"}
+        )
+    
+    return await call_next(request)
\ No newline at end of file
@@ -1,39 +1,6 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
-import os
-from dotenv import load_dotenv
+"""Compatibilidad: el engine, la sesión y la Base viven en app.core.database
 
-load_dotenv()
-
-# URL de la base de datos desde variables de entorno
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./fleet_management.db")
-
-# Crear engine de SQLAlchemy
-if DATABASE_URL.startswith("sqlite"):
-    engine = create_engine(
-        DATABASE_URL, 
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool
-    )
-else:
-    engine = create_engine(DATABASE_URL)
-
-# Crear SessionLocal class
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Base para los modelos
-Base = declarative_base()
-
-# Dependency para obtener la sesión de DB
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
-# Función para crear las tablas
-def create_tables():
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+Este módulo solo reexporta esos objetos para que existan un único pool de
+conexiones y una única metadata en toda la aplicación.
+"""
+from ..core.database import engine, SessionLocal, Base, get_db, create_tables
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""Historial de valores anteriores de atributos de los modelos
+
+Los servicios que reaccionan a cambios en un flush (contadores del dashboard,
+eventos en vivo) necesitan el valor que tenía el atributo antes de
+modificarlo. Con active_history el valor anterior queda en el historial aunque
+el atributo estuviera expirado al asignarlo (p. ej. después de un commit).
+"""
+from sqlalchemy import event
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+def track_previous_values(*attributes):
+    """Activa active_history en los atributos (el listener se registra una sola vez por atributo)"""
+    for attribute in attributes:
+        if not event.contains(attribute, "set", _keep_old_value):
+            event.listen(attribute, "set", _keep_old_value, active_history=True)
\ No newline at end of file
@@ -0,0 +1,40 @@
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from pathlib import Path
+import logging
+from ..core.database import engine
+
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Revisión equivalente al esquema que creaba create_all antes de usar Alembic
+BASELINE_REVISION = "0001"
+
+def get_alembic_config() -> Config:
+    """Configuración de Alembic independiente del directorio de trabajo"""
+    config = Config(str(BACKEND_DIR / "alembic.ini"))
+    config.set_main_option("script_location", str(BACKEND_DIR / "alembic"))
+    # El logging lo configura la aplicación, no alembic.ini
+    config.attributes["configure_logger"] = False
+    return config
+
+def upgrade_database(bind=engine, revision: str = "head"):
+    """Aplica las migraciones pendientes hasta `revision`
+    
+    Las bases de datos creadas con create_all (tablas sin alembic_version) se
+    marcan primero en la revisión base para no volver a crear sus tablas.
+    """
+    config = get_alembic_config()
+    
+    inspector = inspect(bind)
+    if inspector.has_table("vehicles") and not inspector.has_table("alembic_version"):
+        logger.info(f"Base de datos existente sin versión: marcando revisión {BASELINE_REVISION}")
+        with bind.connect() as connection:
+            config.attributes["connection"] = connection
+            command.stamp(config, BASELINE_REVISION)
+    
+    with bind.connect() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
\ No newline at end of file
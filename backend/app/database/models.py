@@ -1,11 +1,9 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Date, Numeric
-from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Enum, Date, Numeric, Index, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
 from datetime import datetime
-
-Base = declarative_base()
+from ..core.database import Base
 
 class VehicleStatus(str, enum.Enum):
     DISPONIBLE = "disponible"
@@ -56,6 +54,12 @@ class AlertPriority(str, enum.Enum):
     ALTA = "alta"
     CRITICA = "critica"
 
+class ImportJobStatus(str, enum.Enum):
+    PENDIENTE = "pendiente"
+    EN_PROCESO = "en_proceso"
+    COMPLETADO = "completado"
+    FALLIDO = "fallido"
+
 # Modelo de Vehículos
 class Vehicle(Base):
     __tablename__ = "vehicles"
@@ -90,6 +94,11 @@ class Vehicle(Base):
     mantenimientos = relationship("Maintenance", back_populates="vehiculo")
     asignaciones = relationship("Assignment", back_populates="vehiculo")
     alertas = relationship("MaintenanceAlert", back_populates="vehiculo")
+    
+    # Índices: conteos del dashboard y listados filtran por activo + estado
+    __table_args__ = (
+        Index("ix_vehicles_activo_estado", "activo", "estado"),
+    )
 
 # Modelo de Conductores
 class Driver(Base):
@@ -120,6 +129,11 @@ class Driver(Base):
     
     # Relaciones
     asignaciones = relationship("Assignment", back_populates="conductor")
+    
+    # Índices: conductores disponibles (activo + estado + licencia vigente)
+    __table_args__ = (
+        Index("ix_drivers_activo_estado_licencia", "activo", "estado", "fecha_vencimiento_licencia"),
+    )
 
 # Modelo de Mantenimientos
 class Maintenance(Base):
@@ -155,6 +169,14 @@ class Maintenance(Base):
     
     # Relaciones
     vehiculo = relationship("Vehicle", back_populates="mantenimientos")
+    
+    # Índices: historial por vehículo, mantenimientos programados/vencidos por
+    # fecha y orden del listado paginado por cursor (fecha + id)
+    __table_args__ = (
+        Index("ix_maintenance_vehiculo_estado_fecha", "vehiculo_id", "estado", "fecha_programada"),
+        Index("ix_maintenance_estado_fecha", "estado", "fecha_programada"),
+        Index("ix_maintenance_fecha_id", "fecha_programada", "id"),
+    )
 
 # Modelo de Solicitudes de Transporte
 class TransportRequest(Base):
@@ -190,6 +212,13 @@ class TransportRequest(Base):
     
     # Relaciones
     asignacion = relationship("Assignment", back_populates="solicitud", uselist=False)
+    
+    # Índices: solicitudes por estado en un rango de fechas de viaje y orden del
+    # listado paginado por cursor (creación + id)
+    __table_args__ = (
+        Index("ix_transport_requests_estado_fecha_viaje", "estado", "fecha_viaje"),
+        Index("ix_transport_requests_created_id", "created_at", "id"),
+    )
 
 # Modelo de Asignaciones
 class Assignment(Base):
@@ -220,6 +249,15 @@ class Assignment(Base):
     solicitud = relationship("TransportRequest", back_populates="asignacion")
     vehiculo = relationship("Vehicle", back_populates="asignaciones")
     conductor = relationship("Driver", back_populates="asignaciones")
+    
+    # Índices: asignaciones por vehículo/conductor (más recientes primero), por
+    # solicitud y orden del listado paginado por cursor (fecha + id)
+    __table_args__ = (
+        Index("ix_assignments_vehiculo_fecha", "vehiculo_id", "fecha_asignacion"),
+        Index("ix_assignments_conductor_fecha", "conductor_id", "fecha_asignacion"),
+        Index("ix_assignments_solicitud", "solicitud_id"),
+        Index("ix_assignments_fecha_id", "fecha_asignacion", "id"),
+    )
 
 # Modelo de Alertas de Mantenimiento
 class MaintenanceAlert(Base):
@@ -239,6 +277,50 @@ class MaintenanceAlert(Base):
     
     # Relaciones
     vehiculo = relationship("Vehicle", back_populates="alertas")
+    
+    # Índices: búsqueda de alerta existente al generar alertas y, solo sobre las
+    # alertas activas (índice parcial), conteos y listados por fecha
+    __table_args__ = (
+        Index("ix_maintenance_alerts_vehiculo_tipo_activa", "vehiculo_id", "tipo_alerta", "activa"),
+        Index(
+            "ix_maintenance_alerts_activas_fecha",
+            "fecha_creacion",
+            sqlite_where=activa == True,
+            postgresql_where=activa == True
+        ),
+    )
+
+# Contadores del dashboard, mantenidos en cada escritura (ver services/fleet_counters.py)
+class FleetCounter(Base):
+    __tablename__ = "fleet_counters"
+    
+    grupo = Column(String(30), primary_key=True)  # "vehiculos", "conductores", "solicitudes", "alertas"
+    clave = Column(String(60), primary_key=True)  # p. ej. "sedan:disponible" o "pendiente"
+    valor = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+# Trabajos de importación masiva en segundo plano (ver services/import_jobs.py)
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+    
+    job_id = Column(String(32), primary_key=True)
+    status = Column(Enum(ImportJobStatus), nullable=False, default=ImportJobStatus.PENDIENTE)
+    filename = Column(String(255))
+    file_size = Column(Integer)
+    bundle = Column(Boolean, default=False)
+    validate_only = Column(Boolean, default=False)
+    
+    created_at = Column(DateTime, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    progress = Column(JSON)  # {"rows_read", "created", "rejected"}
+    result = Column(JSON)  # resultado del procesador al terminar
+    
+    # Purga de trabajos vencidos
+    __table_args__ = (
+        Index("ix_import_jobs_created_at", "created_at"),
+    )
 
 # Modelo de Usuarios del Sistema
 class User(Base):
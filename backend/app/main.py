@@ -1,6 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 import logging
+from .core.database import (
+    engine, replica_engine, get_pool_metrics, dispose_async_engine, read_your_writes_middleware
+)
+from .core.instrumentation import query_stats_middleware
+from .core.cache import response_cache, cache_invalidation_middleware
+from .core.uploads import upload_size_middleware
 
 # Configurar logging simple
 logging.basicConfig(level=logging.INFO)
@@ -24,6 +31,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Lecturas del cliente al primario justo después de escribir (réplica de lectura)
+app.middleware("http")(read_your_writes_middleware)
+
+# Conteo y tiempo de las consultas SQL por petición (cabeceras con DEBUG)
+app.middleware("http")(query_stats_middleware)
+
+# Invalidación de la caché de respuestas del dashboard tras cada escritura
+app.middleware("http")(cache_invalidation_middleware)
+
+# Cargas mayores que MAX_FILE_SIZE rechazadas antes de recibir el cuerpo
+app.middleware("http")(upload_size_middleware)
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Cierra las conexiones de los engines asíncronos"""
+    await dispose_async_engine()
+
 # Endpoints básicos
 @app.get("/")
 def root():
@@ -43,6 +67,31 @@ def health_check():
         "version": "1.0.0"
     }
 
+@app.get("/health/db")
+def database_health_check():
+    """Estado de la base de datos (y de la réplica) y métricas del pool de conexiones"""
+    result = {"status": _ping(engine)}
+    
+    if replica_engine is not engine:
+        result["replica_status"] = _ping(replica_engine)
+    
+    result["pool"] = get_pool_metrics()
+    return result
+
+@app.get("/health/cache")
+def cache_health_check():
+    """Aciertos y fallos de la caché de respuestas por endpoint"""
+    return response_cache.metrics()
+
+def _ping(bind) -> str:
+    try:
+        with bind.connect() as connection:
+            connection.execute(text("SELECT 1"))
+        return "healthy"
+    except Exception as e:
+        logger.error(f"Error verificando la base de datos {bind.url.render_as_string()}: {e}")
+        return "unhealthy"
+
 @app.get("/api/v1/test")
 def test_endpoint():
     """Endpoint de prueba"""
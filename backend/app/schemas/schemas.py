@@ -361,7 +361,9 @@ class VehicleAvailability(BaseModel):
 # Schemas para respuestas paginadas
 class PaginatedResponse(BaseModel):
     items: List[dict]
-    total: int
-    page: int
-    pages: int
-    per_page: int
\ No newline at end of file
+    per_page: int
+    has_more: bool = False
+    next_cursor: Optional[str] = None  # pasar como ?cursor= para la página siguiente
+    total: Optional[int] = None  # solo con include_total
+    page: Optional[int] = None  # solo en modo offset (skip)
+    pages: Optional[int] = None
\ No newline at end of file
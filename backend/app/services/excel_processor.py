@@ -1,19 +1,80 @@
 import pandas as pd
+import numpy as np
 import openpyxl
-from typing import List, Dict, Optional, Tuple
-from datetime import datetime, date
+from typing import List, Dict, Optional, Tuple, Iterator, Iterable, Callable
+from datetime import datetime, timezone
+from contextlib import contextmanager
+from collections import Counter, defaultdict
+import itertools
 import logging
+import hashlib
+import json
+import threading
+from uuid import uuid4
+import csv
+import io
+import multiprocessing
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import insert, tuple_
 from sqlalchemy.orm import Session
+from ..core.config import settings
 from ..database.models import TransportRequest, RequestStatus, AlertPriority
 from ..schemas.schemas import TransportRequestCreate
+from . import fleet_counters
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
 import re
 from pathlib import Path
 
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow es opcional; solo se requiere para archivos Parquet
+    pq = None
+
 logger = logging.getLogger(__name__)
 
+# Formatos de archivo soportados por la importación masiva
+SUPPORTED_EXTENSIONS = ('.xlsx', '.xls', '.csv', '.parquet')
+
+# Formatos que pueden venir dentro de un .zip de importación por lotes
+BUNDLE_EXTENSIONS = SUPPORTED_EXTENSIONS + ('.zip',)
+
+# Separadores probados al detectar el dialecto de un CSV
+CSV_DELIMITERS = ',;\t|'
+
+# Formatos de fecha aceptados en celdas de texto, en orden de prioridad
+DATETIME_FORMATS = [
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d",
+    "%d/%m/%Y %H:%M:%S",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y",
+    "%d-%m-%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M",
+    "%d-%m-%Y"
+]
+
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+PRIORITY_MAP = {
+    'baja': AlertPriority.BAJA,
+    'media': AlertPriority.MEDIA,
+    'alta': AlertPriority.ALTA,
+    'critica': AlertPriority.CRITICA,
+    'crítica': AlertPriority.CRITICA
+}
+
+TRUE_VALUES = ['si', 'sí', 'yes', 'true', '1']
+
 class ExcelProcessorService:
     """Servicio para procesar archivos Excel con solicitudes de transporte"""
     
+    # Llaves por consulta de duplicados (3 parámetros por llave)
+    DEDUP_QUERY_BATCH = 300
+    
     def __init__(self):
         self.required_columns = [
             'nombre_solicitante', 'fecha_viaje', 'origen', 'destino'
@@ -23,45 +84,84 @@ class ExcelProcessorService:
             'proposito_viaje', 'numero_pasajeros', 'prioridad',
             'observaciones', 'requiere_vehiculo_especial'
         ]
+        # Valores por defecto para columnas opcionales en inserciones en lote,
+        # todas las filas de un executemany deben tener las mismas llaves
+        self.insert_defaults = {
+            'dependencia': None,
+            'telefono_contacto': None,
+            'email_contacto': None,
+            'proposito_viaje': None,
+            'numero_pasajeros': 1,
+            'prioridad': AlertPriority.MEDIA,
+            'observaciones': None,
+            'requiere_vehiculo_especial': False
+        }
+        
+        # Template de Excel renderizado una sola vez (ver get_template_file)
+        self._template_file: Optional[Dict] = None
+        self._template_lock = threading.Lock()
     
-    def validate_excel_file(self, file_path: str) -> Tuple[bool, str]:
-        """Valida que el archivo Excel tenga el formato correcto"""
+    def validate_excel_file(self, file_path: str, filename: Optional[str] = None) -> Tuple[bool, str]:
+        """Valida que el archivo Excel tenga el formato correcto
+        
+        `filename` es el nombre original del archivo, si la extensión de
+        `file_path` no lo identifica.
+        """
         try:
-            if not Path(file_path).exists():
-                return False, "El archivo no existe"
-            
-            # Verificar extensión
-            if not file_path.lower().endswith(('.xlsx', '.xls')):
-                return False, "El archivo debe ser un Excel (.xlsx o .xls)"
-            
-            # Intentar leer el archivo
-            df = pd.read_excel(file_path)
-            
-            if df.empty:
-                return False, "El archivo está vacío"
-            
-            # Verificar columnas requeridas
-            missing_columns = []
-            df_columns = [col.lower().replace(' ', '_') for col in df.columns]
-            
-            for required_col in self.required_columns:
-                if required_col not in df_columns:
-                    missing_columns.append(required_col)
-            
-            if missing_columns:
-                return False, f"Faltan las siguientes columnas: {', '.join(missing_columns)}"
-            
-            return True, "Archivo válido"
+            is_valid, message = self._validate_path(file_path, filename)
+            if not is_valid:
+                return False, message
             
+            # Leer solo el encabezado y la primera fila, sin cargar todo el libro
+            with self._open_rows(file_path, filename) as (columns, rows):
+                if next(rows, None) is None:
+                    return False, "El archivo está vacío"
+                
+                return self._validate_columns(columns)
+        
         except Exception as e:
             logger.error(f"Error validando archivo Excel: {e}")
             return False, f"Error leyendo el archivo: {str(e)}"
     
-    def process_excel_file(self, file_path: str, db: Session) -> Dict:
-        """Procesa un archivo Excel y crea las solicitudes de transporte"""
+    def process_excel_file(
+        self,
+        file_path: str,
+        db: Session,
+        chunk_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        filename: Optional[str] = None,
+        validate_only: bool = False,
+        report_format: Optional[str] = None
+    ) -> Dict:
+        """Procesa un archivo Excel y crea las solicitudes de transporte
+        
+        El archivo se recorre en modo streaming (openpyxl read-only) y las filas
+        se procesan en bloques de `chunk_size`, de modo que el consumo de memoria
+        no depende del tamaño del archivo. Las solicitudes de cada bloque se
+        insertan en lotes de `batch_size` filas.
+        
+        Si se indica `progress_callback`, se invoca después de cada bloque con
+        las filas leídas, creadas y rechazadas hasta el momento.
+        
+        `filename` es el nombre original del archivo, si la extensión de
+        `file_path` no lo identifica.
+        
+        Con `validate_only` se ejecutan la lectura, la normalización y la
+        detección de duplicados completas, pero no se escribe nada en la base de
+        datos. Con `report_format` ("xlsx" o "csv") se genera además un reporte
+        descargable con cada fila del archivo y su error (ver get_report_path).
+        """
+        chunk_size = chunk_size or settings.EXCEL_IMPORT_CHUNK_SIZE
+        batch_size = batch_size or settings.EXCEL_IMPORT_BATCH_SIZE
+        
+        # Llaves ya vistas en el archivo: sin inserciones, los duplicados entre
+        # bloques no se pueden detectar consultando la base de datos
+        seen = {} if validate_only else None
+        
         try:
             # Validar archivo
-            is_valid, message = self.validate_excel_file(file_path)
+            is_valid, message = self._validate_path(file_path, filename)
             if not is_valid:
                 return {
                     "success": False,
@@ -70,65 +170,76 @@ class ExcelProcessorService:
                     "errors": []
                 }
             
-            # Leer archivo Excel
-            df = pd.read_excel(file_path)
-            
-            # Normalizar nombres de columnas
-            df.columns = [col.lower().replace(' ', '_').replace('-', '_') for col in df.columns]
-            
             processed_count = 0
+            rows_read = 0
             errors = []
             created_requests = []
+            request_prefix = self._request_prefix()
             
-            for index, row in df.iterrows():
-                try:
-                    # Crear solicitud desde la fila
-                    request_data = self._create_request_from_row(row, index + 2)  # +2 porque Excel empieza en 1 y header es 1
-                    
-                    if request_data:
-                        # Verificar si ya existe una solicitud similar
-                        existing = self._find_similar_request(db, request_data)
-                        
-                        if not existing:
-                            # Crear nueva solicitud
-                            new_request = TransportRequest(**request_data)
-                            db.add(new_request)
-                            db.flush()  # Para obtener el ID
-                            
-                            created_requests.append({
-                                "id": new_request.id,
-                                "numero_solicitud": new_request.numero_solicitud,
-                                "solicitante": new_request.nombre_solicitante,
-                                "fecha_viaje": new_request.fecha_viaje.strftime("%Y-%m-%d %H:%M")
-                            })
-                            processed_count += 1
-                        else:
-                            errors.append({
-                                "fila": index + 2,
-                                "error": f"Solicitud similar ya existe (ID: {existing.id})"
-                            })
+            # Leer el archivo una sola vez: encabezado primero, filas bajo demanda
+            with self._open_rows(file_path, filename) as (columns, rows):
+                first_row = next(rows, None)
+                if first_row is None:
+                    is_valid, message = False, "El archivo está vacío"
+                else:
+                    is_valid, message = self._validate_columns(columns)
                 
-                except Exception as e:
-                    errors.append({
-                        "fila": index + 2,
-                        "error": str(e)
-                    })
-                    logger.error(f"Error procesando fila {index + 2}: {e}")
+                if not is_valid:
+                    return {
+                        "success": False,
+                        "message": message,
+                        "processed": 0,
+                        "errors": []
+                    }
+                
+                rows = itertools.chain([first_row], rows)
+                
+                for chunk in self._iter_chunks(rows, chunk_size):
+                    chunk_created, chunk_errors = self._process_chunk(db, chunk, request_prefix, batch_size, seen)
+                    created_requests.extend(chunk_created)
+                    errors.extend(chunk_errors)
+                    processed_count += len(chunk_created)
+                    rows_read += len(chunk)
+                    
+                    if progress_callback:
+                        progress_callback({
+                            "rows_read": rows_read,
+                            "created": processed_count,
+                            "rejected": len(errors)
+                        })
             
             # Confirmar cambios si todo salió bien
-            if processed_count > 0:
+            if processed_count > 0 and not validate_only:
                 db.commit()
             else:
                 db.rollback()
             
-            return {
-                "success": True,
-                "message": f"Procesamiento completado. {processed_count} solicitudes creadas.",
-                "processed": processed_count,
-                "errors": errors,
-                "created_requests": created_requests
-            }
+            if validate_only:
+                result = {
+                    "success": True,
+                    "message": (
+                        f"Validación completada. {processed_count} solicitudes válidas y "
+                        f"{len(errors)} filas con errores. No se guardaron cambios."
+                    ),
+                    "processed": processed_count,
+                    "errors": errors,
+                    "created_requests": [],
+                    "validate_only": True
+                }
+            else:
+                result = {
+                    "success": True,
+                    "message": f"Procesamiento completado. {processed_count} solicitudes creadas.",
+                    "processed": processed_count,
+                    "errors": errors,
+                    "created_requests": created_requests
+                }
+            
+            if report_format:
+                result["report_id"] = self._write_error_report(file_path, filename, errors, report_format)
             
+            return result
+        
         except Exception as e:
             db.rollback()
             logger.error(f"Error procesando archivo Excel: {e}")
@@ -139,151 +250,796 @@ class ExcelProcessorService:
                 "errors": [{"fila": "General", "error": str(e)}]
             }
     
-    def _create_request_from_row(self, row: pd.Series, row_number: int) -> Optional[Dict]:
-        """Crea un diccionario de datos de solicitud desde una fila de Excel"""
+    def process_excel_bundle(
+        self,
+        file_path: str,
+        db: Session,
+        filename: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        max_workers: Optional[int] = None,
+        progress_callback: Optional[Callable[[Dict], None]] = None,
+        validate_only: bool = False
+    ) -> Dict:
+        """Importa todas las hojas de un libro o todos los archivos de un .zip
+        
+        Cada hoja/archivo se lee y valida en un proceso independiente
+        (hasta `max_workers`). Los resultados se combinan luego en el orden del
+        libro o del .zip: los duplicados se resuelven contra la base de datos y
+        entre hojas, y las filas válidas se insertan en lotes en una sola
+        transacción. Cada error indica la hoja ("hoja") en que se encontró.
+        Con `validate_only` se reportan los mismos errores sin escribir nada.
+        """
+        chunk_size = chunk_size or settings.EXCEL_IMPORT_CHUNK_SIZE
+        batch_size = batch_size or settings.EXCEL_IMPORT_BATCH_SIZE
+        max_workers = max_workers or settings.IMPORT_BUNDLE_WORKERS
+        seen = {} if validate_only else None
+        
         try:
-            # Campos obligatorios
-            nombre_solicitante = self._clean_string(row.get('nombre_solicitante'))
-            if not nombre_solicitante:
-                raise ValueError("Nombre del solicitante es obligatorio")
+            name = self._source_name(file_path, filename)
+            if not Path(file_path).exists():
+                return {"success": False, "message": "El archivo no existe", "processed": 0, "errors": []}
             
-            fecha_viaje = self._parse_datetime(row.get('fecha_viaje'))
-            if not fecha_viaje:
-                raise ValueError("Fecha del viaje es obligatoria y debe ser válida")
+            if not name.endswith(BUNDLE_EXTENSIONS):
+                return {
+                    "success": False,
+                    "message": "El archivo debe ser un libro Excel o un .zip con archivos Excel, CSV o Parquet",
+                    "processed": 0,
+                    "errors": []
+                }
             
-            origen = self._clean_string(row.get('origen'))
-            if not origen:
-                raise ValueError("Origen es obligatorio")
+            with tempfile.TemporaryDirectory(prefix="import-bundle-") as workdir:
+                units = self._list_bundle_units(file_path, name, workdir)
+                if not units:
+                    return {
+                        "success": False,
+                        "message": "El archivo no contiene hojas ni archivos para importar",
+                        "processed": 0,
+                        "errors": []
+                    }
+                
+                # Los números de fila se repiten entre hojas: cada una lleva su
+                # propio sufijo en el número de solicitud
+                request_prefix = self._request_prefix()
+                tasks = [
+                    (f"{request_prefix}{index + 1}-", path, sheet_name, unit_filename, chunk_size)
+                    for index, (path, sheet_name, unit_filename, _) in enumerate(units)
+                ]
+                
+                # Lectura y validación en paralelo; map conserva el orden de las hojas.
+                # Lotes pequeños se leen en el mismo proceso: arrancar el pool
+                # cuesta más que leerlos
+                workers = min(max_workers, len(tasks))
+                if workers > 1 and Path(file_path).stat().st_size >= settings.IMPORT_BUNDLE_PARALLEL_MIN_BYTES:
+                    # spawn: el pool puede crearse desde un hilo de trabajo y los
+                    # procesos no deben heredar conexiones ni locks del proceso padre
+                    with ProcessPoolExecutor(
+                        max_workers=workers,
+                        mp_context=multiprocessing.get_context("spawn")
+                    ) as executor:
+                        results = list(executor.map(_parse_bundle_unit, tasks))
+                else:
+                    results = [_parse_bundle_unit(task) for task in tasks]
             
-            destino = self._clean_string(row.get('destino'))
-            if not destino:
-                raise ValueError("Destino es obligatorio")
+            processed_count = 0
+            rows_read = 0
+            errors = []
+            created_requests = []
+            sheets = []
             
-            # Generar número de solicitud único
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            numero_solicitud = f"SOL-{timestamp}-{row_number}"
+            for (_, _, _, label), result in zip(units, results):
+                unit_errors = result["errors"]
+                unit_created = []
+                
+                # Insertar por bloques para acotar las consultas de duplicados
+                candidates = result["candidates"]
+                for start in range(0, len(candidates), chunk_size):
+                    chunk_created, duplicate_errors = self._store_candidates(
+                        db, candidates[start:start + chunk_size], batch_size, seen
+                    )
+                    unit_created.extend(chunk_created)
+                    unit_errors.extend(duplicate_errors)
+                
+                unit_errors.sort(key=lambda error: error["fila"])
+                for error in unit_errors:
+                    error["hoja"] = label
+                
+                sheets.append({
+                    "hoja": label,
+                    "rows_read": result["rows_read"],
+                    "created": len(unit_created),
+                    "rejected": len(unit_errors)
+                })
+                
+                created_requests.extend(unit_created)
+                errors.extend(unit_errors)
+                processed_count += len(unit_created)
+                rows_read += result["rows_read"]
+                
+                if progress_callback:
+                    progress_callback({
+                        "rows_read": rows_read,
+                        "created": processed_count,
+                        "rejected": len(errors)
+                    })
             
-            # Crear diccionario base
-            request_data = {
-                "numero_solicitud": numero_solicitud,
-                "nombre_solicitante": nombre_solicitante,
-                "fecha_solicitud": datetime.now(),
-                "fecha_viaje": fecha_viaje,
-                "origen": origen,
-                "destino": destino,
-                "estado": RequestStatus.PENDIENTE
-            }
+            # Confirmar cambios si todo salió bien
+            if processed_count > 0 and not validate_only:
+                db.commit()
+            else:
+                db.rollback()
             
-            # Campos opcionales
-            if pd.notna(row.get('dependencia')):
-                request_data["dependencia"] = self._clean_string(row.get('dependencia'))
+            if validate_only:
+                return {
+                    "success": True,
+                    "message": (
+                        f"Validación completada. {processed_count} solicitudes válidas y "
+                        f"{len(errors)} filas con errores en {len(sheets)} hojas. No se guardaron cambios."
+                    ),
+                    "processed": processed_count,
+                    "errors": errors,
+                    "created_requests": [],
+                    "sheets": sheets,
+                    "validate_only": True
+                }
             
-            if pd.notna(row.get('telefono_contacto')):
-                request_data["telefono_contacto"] = self._clean_string(row.get('telefono_contacto'))
+            return {
+                "success": True,
+                "message": f"Procesamiento completado. {processed_count} solicitudes creadas en {len(sheets)} hojas.",
+                "processed": processed_count,
+                "errors": errors,
+                "created_requests": created_requests,
+                "sheets": sheets
+            }
+        
+        except Exception as e:
+            db.rollback()
+            logger.error(f"Error procesando importación por lotes: {e}")
+            return {
+                "success": False,
+                "message": f"Error procesando archivo: {str(e)}",
+                "processed": 0,
+                "errors": [{"fila": "General", "error": str(e)}]
+            }
+    
+    def _list_bundle_units(self, file_path: str, name: str, workdir: str) -> List[Tuple[str, Optional[str], str, str]]:
+        """Enumera las hojas/archivos de un lote como (ruta, hoja, nombre de archivo, etiqueta)
+        
+        Los miembros de un .zip se extraen en `workdir` con un nombre propio
+        (nunca con la ruta que trae el .zip) y se recorren en orden alfabético.
+        Se rechazan los .zip con más de IMPORT_BUNDLE_MAX_MEMBERS archivos o
+        que descomprimidos superan IMPORT_BUNDLE_MAX_EXTRACTED_BYTES. El total
+        declarado en el índice del .zip se revisa antes de extraer y, como el
+        índice puede estar alterado, también se cuentan los bytes escritos.
+        """
+        if not name.endswith('.zip'):
+            return [
+                (file_path, sheet_name, name, label)
+                for sheet_name, label in self._list_sheets(file_path, name)
+            ]
+        
+        units = []
+        with zipfile.ZipFile(file_path) as archive:
+            members = sorted(
+                (
+                    member for member in archive.infolist()
+                    if not member.is_dir()
+                    and not Path(member.filename).name.startswith(('.', '~$'))
+                    and member.filename.lower().endswith(SUPPORTED_EXTENSIONS)
+                ),
+                key=lambda member: member.filename
+            )
             
-            if pd.notna(row.get('email_contacto')):
-                email = self._clean_string(row.get('email_contacto'))
-                if email and self._validate_email(email):
-                    request_data["email_contacto"] = email
+            max_bytes = settings.IMPORT_BUNDLE_MAX_EXTRACTED_BYTES
+            if len(members) > settings.IMPORT_BUNDLE_MAX_MEMBERS:
+                raise ValueError(
+                    f"El .zip contiene {len(members)} archivos; el máximo es {settings.IMPORT_BUNDLE_MAX_MEMBERS}"
+                )
+            if sum(member.file_size for member in members) > max_bytes:
+                raise ValueError(self._bundle_too_large_message())
             
-            if pd.notna(row.get('proposito_viaje')):
-                request_data["proposito_viaje"] = self._clean_string(row.get('proposito_viaje'))
+            extracted = 0
+            for index, member in enumerate(members):
+                member_name = Path(member.filename).name
+                target = Path(workdir) / f"{index}-{member_name}"
+                with archive.open(member) as source, open(target, 'wb') as output:
+                    while True:
+                        block = source.read(settings.UPLOAD_CHUNK_SIZE)
+                        if not block:
+                            break
+                        
+                        extracted += len(block)
+                        if extracted > max_bytes:
+                            raise ValueError(self._bundle_too_large_message())
+                        
+                        output.write(block)
+                
+                for sheet_name, label in self._list_sheets(str(target), member_name.lower()):
+                    units.append((str(target), sheet_name, member_name.lower(), f"{member_name}:{label}" if sheet_name else member_name))
+        
+        return units
+    
+    def _bundle_too_large_message(self) -> str:
+        return (
+            "El .zip supera el máximo de "
+            f"{settings.IMPORT_BUNDLE_MAX_EXTRACTED_BYTES // (1024 * 1024)} MB descomprimidos"
+        )
+    
+    def _list_sheets(self, file_path: str, name: str) -> List[Tuple[Optional[str], str]]:
+        """Hojas de un libro Excel como (hoja, etiqueta); otros formatos son una sola unidad"""
+        if name.endswith('.xlsx'):
+            workbook = openpyxl.load_workbook(file_path, read_only=True)
+            try:
+                return [(sheet_name, sheet_name) for sheet_name in workbook.sheetnames]
+            finally:
+                workbook.close()
+        
+        if name.endswith('.xls'):
+            return [(sheet_name, str(sheet_name)) for sheet_name in pd.ExcelFile(file_path).sheet_names]
+        
+        return [(None, Path(name).name)]
+    
+    def _parse_unit(
+        self,
+        request_prefix: str,
+        file_path: str,
+        sheet_name: Optional[str],
+        filename: str,
+        chunk_size: int
+    ) -> Dict:
+        """Lee y normaliza una hoja/archivo completo sin tocar la base de datos"""
+        candidates = []
+        errors = []
+        rows_read = 0
+        
+        with self._open_rows(file_path, filename, sheet_name) as (columns, rows):
+            first_row = next(rows, None)
+            if first_row is None:
+                # Hojas vacías (p. ej. "Hoja2" sin usar) no son un error
+                return {"candidates": [], "errors": [], "rows_read": 0}
             
-            if pd.notna(row.get('numero_pasajeros')):
-                try:
-                    pasajeros = int(row.get('numero_pasajeros', 1))
-                    request_data["numero_pasajeros"] = max(1, pasajeros)
-                except (ValueError, TypeError):
-                    request_data["numero_pasajeros"] = 1
+            is_valid, message = self._validate_columns(columns)
+            if not is_valid:
+                return {"candidates": [], "errors": [{"fila": "General", "error": message}], "rows_read": 0}
             
-            if pd.notna(row.get('prioridad')):
-                prioridad_str = self._clean_string(row.get('prioridad')).lower()
-                prioridad_map = {
-                    'baja': AlertPriority.BAJA,
-                    'media': AlertPriority.MEDIA,
-                    'alta': AlertPriority.ALTA,
-                    'critica': AlertPriority.CRITICA,
-                    'crítica': AlertPriority.CRITICA
-                }
-                request_data["prioridad"] = prioridad_map.get(prioridad_str, AlertPriority.MEDIA)
+            for chunk in self._iter_chunks(itertools.chain([first_row], rows), chunk_size):
+                chunk_candidates, chunk_errors = self._normalize_chunk(chunk, request_prefix)
+                candidates.extend(chunk_candidates)
+                errors.extend(chunk_errors)
+                rows_read += len(chunk)
+        
+        return {"candidates": candidates, "errors": errors, "rows_read": rows_read}
+    
+    def _process_chunk(
+        self,
+        db: Session,
+        chunk: List[Tuple[int, Dict]],
+        request_prefix: str,
+        batch_size: int,
+        seen: Optional[Dict[Tuple, int]] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Valida, convierte e inserta un bloque de filas del archivo"""
+        # Validar y normalizar el bloque completo por columnas
+        candidates, errors = self._normalize_chunk(chunk, request_prefix)
+        
+        created_requests, duplicate_errors = self._store_candidates(db, candidates, batch_size, seen)
+        
+        errors.extend(duplicate_errors)
+        errors.sort(key=lambda error: error["fila"])
+        return created_requests, errors
+    
+    def _store_candidates(
+        self,
+        db: Session,
+        candidates: List[Tuple[int, Dict]],
+        batch_size: int,
+        seen: Optional[Dict[Tuple, int]] = None
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """Descarta duplicados e inserta en lote filas ya normalizadas
+        
+        Retorna las solicitudes creadas y los errores de las filas duplicadas.
+        Si se indica `seen` (validación sin escritura) no se inserta nada: las
+        filas válidas se registran en `seen` (llave -> fila) para detectar las
+        repetidas en bloques posteriores, y se retornan sin ID.
+        """
+        errors = []
+        
+        # Resolver duplicados del bloque contra la base de datos en una sola consulta
+        existing = self._find_existing_requests(db, [data for _, data in candidates])
+        
+        to_insert = []
+        pending = {}  # llave -> posición en to_insert
+        repeated = []  # filas repetidas dentro del bloque
+        
+        for row_number, request_data in candidates:
+            key = self._duplicate_key(request_data)
+            
+            if key in existing:
+                errors.append({
+                    "fila": row_number,
+                    "error": f"Solicitud similar ya existe (ID: {existing[key]})"
+                })
+            elif seen is not None and key in seen:
+                errors.append({
+                    "fila": row_number,
+                    "error": f"Solicitud repetida en el archivo (fila {seen[key]})"
+                })
+            elif key in pending:
+                repeated.append((row_number, key))
+            else:
+                pending[key] = len(to_insert)
+                to_insert.append(request_data)
+                if seen is not None:
+                    seen[key] = row_number
+        
+        if seen is not None:
+            new_ids = [None] * len(to_insert)
+        else:
+            # Insertar en lotes y recuperar los IDs generados
+            new_ids = self._bulk_insert_requests(db, to_insert, batch_size)
+        
+        created_requests = [
+            {
+                "id": new_id,
+                "numero_solicitud": request_data["numero_solicitud"],
+                "solicitante": request_data["nombre_solicitante"],
+                "fecha_viaje": request_data["fecha_viaje"].strftime("%Y-%m-%d %H:%M")
+            }
+            for new_id, request_data in zip(new_ids, to_insert)
+        ]
+        
+        # Filas repetidas dentro del mismo archivo apuntan a la recién creada
+        for row_number, key in repeated:
+            errors.append({
+                "fila": row_number,
+                "error": f"Solicitud similar ya existe (ID: {new_ids[pending[key]]})"
+            })
+        
+        return created_requests, errors
+    
+    def _bulk_insert_requests(self, db: Session, requests_data: List[Dict], batch_size: int) -> List[int]:
+        """Inserta solicitudes en lotes (executemany) y retorna sus IDs en el mismo orden"""
+        new_ids = []
+        supports_returning = db.get_bind().dialect.insert_executemany_returning
+        
+        for start in range(0, len(requests_data), batch_size):
+            # render_nulls mantiene un único conjunto de columnas por lote;
+            # sin él la sesión agrupa las filas según qué campos vienen vacíos
+            batch = [
+                {**self.insert_defaults, **data}
+                for data in requests_data[start:start + batch_size]
+            ]
             
-            if pd.notna(row.get('observaciones')):
-                request_data["observaciones"] = self._clean_string(row.get('observaciones'))
+            numeros = [data["numero_solicitud"] for data in batch]
             
-            if pd.notna(row.get('requiere_vehiculo_especial')):
-                especial = str(row.get('requiere_vehiculo_especial')).lower()
-                request_data["requiere_vehiculo_especial"] = especial in ['si', 'sí', 'yes', 'true', '1']
+            if supports_returning:
+                # INSERT ... RETURNING en lote (PostgreSQL, SQLite >= 3.35). Los IDs se
+                # asocian por número de solicitud (único), así no se exige que el
+                # motor devuelva las filas en el orden de los parámetros: con
+                # sort_by_parameter_order SQLite vuelve a un INSERT por fila
+                result = db.execute(
+                    insert(TransportRequest).returning(
+                        TransportRequest.numero_solicitud, TransportRequest.id
+                    ),
+                    batch,
+                    execution_options={"render_nulls": True}
+                )
+                id_by_numero = dict(result.all())
+            else:
+                db.execute(
+                    insert(TransportRequest),
+                    batch,
+                    execution_options={"render_nulls": True}
+                )
+                
+                # Recuperar IDs por el número de solicitud
+                id_by_numero = dict(
+                    db.query(TransportRequest.numero_solicitud, TransportRequest.id).filter(
+                        TransportRequest.numero_solicitud.in_(numeros)
+                    ).all()
+                )
             
-            return request_data
+            new_ids.extend(id_by_numero[numero] for numero in numeros)
             
-        except Exception as e:
-            raise ValueError(f"Error en fila {row_number}: {str(e)}")
+            # El INSERT en lote no pasa por el flush: ajustar los contadores del dashboard
+            fleet_counters.adjust(db.connection(), Counter(
+                (fleet_counters.REQUESTS, fleet_counters.request_key(data.get("estado", RequestStatus.PENDIENTE)))
+                for data in batch
+            ))
+        
+        return new_ids
     
-    def _clean_string(self, value) -> Optional[str]:
-        """Limpia y normaliza strings"""
-        if pd.isna(value):
-            return None
-        return str(value).strip()
+    def _validate_path(self, file_path: str, filename: Optional[str] = None) -> Tuple[bool, str]:
+        """Verifica existencia y extensión del archivo"""
+        if not Path(file_path).exists():
+            return False, "El archivo no existe"
+        
+        # Verificar extensión
+        name = self._source_name(file_path, filename)
+        if not name.endswith(SUPPORTED_EXTENSIONS):
+            return False, "El archivo debe ser Excel (.xlsx o .xls), CSV (.csv) o Parquet (.parquet)"
+        
+        if name.endswith('.parquet') and pq is None:
+            return False, "La importación de archivos Parquet requiere el paquete pyarrow"
+        
+        return True, "Archivo válido"
     
-    def _parse_datetime(self, value) -> Optional[datetime]:
-        """Parsea una fecha/hora desde Excel"""
-        if pd.isna(value):
-            return None
+    def _validate_columns(self, columns: List[str]) -> Tuple[bool, str]:
+        """Verifica que el encabezado contenga las columnas requeridas"""
+        missing_columns = [col for col in self.required_columns if col not in columns]
+        
+        if missing_columns:
+            return False, f"Faltan las siguientes columnas: {', '.join(missing_columns)}"
+        
+        return True, "Archivo válido"
+    
+    def _normalize_column(self, name) -> str:
+        """Normaliza el nombre de una columna del encabezado"""
+        return str(name).strip().lower().replace(' ', '_').replace('-', '_')
+    
+    def _source_name(self, file_path: str, filename: Optional[str] = None) -> str:
+        """Nombre usado para identificar el formato del archivo"""
+        return str(filename or file_path).lower()
+    
+    @contextmanager
+    def _open_rows(
+        self,
+        file_path: str,
+        filename: Optional[str] = None,
+        sheet_name: Optional[str] = None
+    ) -> Iterator[Tuple[List[str], Iterator[Tuple[int, Dict]]]]:
+        """Abre el archivo en modo streaming y entrega (columnas, iterador de filas)
+        
+        Cada fila se entrega como (número de fila en el archivo, diccionario
+        columna -> valor). Excel, CSV y Parquet comparten este formato, de modo
+        que el resto de la validación no depende del tipo de archivo. En libros
+        Excel se lee `sheet_name` o, si no se indica, la primera hoja.
+        """
+        name = self._source_name(file_path, filename)
+        
+        if name.endswith('.csv'):
+            with self._open_csv_rows(file_path) as result:
+                yield result
+            return
+        
+        if name.endswith('.parquet'):
+            parquet_file = pq.ParquetFile(file_path)
+            try:
+                columns = [self._normalize_column(col) for col in parquet_file.schema_arrow.names]
+                yield columns, self._iter_data_rows(columns, self._iter_parquet_values(parquet_file))
+            finally:
+                parquet_file.close()
+            return
+        
+        if name.endswith('.xls'):
+            # openpyxl no soporta el formato binario .xls; se usa pandas como respaldo
+            df = pd.read_excel(file_path, sheet_name=sheet_name or 0, dtype=object)
+            columns = [self._normalize_column(col) for col in df.columns]
+            yield columns, self._iter_data_rows(columns, df.itertuples(index=False, name=None))
+            return
         
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
         try:
-            # Si ya es datetime
-            if isinstance(value, datetime):
-                return value
+            sheet = workbook[sheet_name] if sheet_name else workbook.worksheets[0]
+            row_iter = sheet.iter_rows(values_only=True)
+            header = next(row_iter, None) or ()
+            columns = [
+                self._normalize_column(col) if col is not None else f"unnamed_{i}"
+                for i, col in enumerate(header)
+            ]
+            yield columns, self._iter_data_rows(columns, row_iter)
+        finally:
+            workbook.close()
+    
+    @contextmanager
+    def _open_csv_rows(self, file_path: str) -> Iterator[Tuple[List[str], Iterator[Tuple[int, Dict]]]]:
+        """Lee un CSV fila a fila detectando el separador en la primera línea
+        
+        Se acepta UTF-8 con o sin BOM (el que genera Excel al exportar). Las
+        celdas vacías se tratan como nulas, igual que en Excel.
+        """
+        with open(file_path, newline='', encoding='utf-8-sig') as text:
+            first_line = text.readline()
+            try:
+                dialect = csv.Sniffer().sniff(first_line, delimiters=CSV_DELIMITERS)
+            except csv.Error:
+                dialect = csv.excel
             
-            # Si es date, convertir a datetime
-            if isinstance(value, date):
-                return datetime.combine(value, datetime.min.time())
+            reader = csv.reader(itertools.chain([first_line], text), dialect)
+            header = next(reader, None) or []
+            columns = [
+                self._normalize_column(col) if col.strip() else f"unnamed_{i}"
+                for i, col in enumerate(header)
+            ]
+            values_iter = (tuple(value if value != '' else None for value in row) for row in reader)
+            yield columns, self._iter_data_rows(columns, values_iter)
+    
+    def _iter_parquet_values(self, parquet_file) -> Iterator[tuple]:
+        """Recorre un archivo Parquet por lotes de registros, sin cargarlo completo"""
+        for batch in parquet_file.iter_batches(batch_size=settings.EXCEL_IMPORT_CHUNK_SIZE):
+            yield from zip(*(column.to_pylist() for column in batch.columns))
+    
+    def _iter_data_rows(self, columns: List[str], values_iter: Iterable[tuple]) -> Iterator[Tuple[int, Dict]]:
+        """Convierte tuplas de valores en diccionarios, omitiendo filas vacías"""
+        for index, values in enumerate(values_iter):
+            if all(value is None or (isinstance(value, float) and pd.isna(value)) for value in values):
+                continue
+            yield index + 2, dict(zip(columns, values))  # +2 porque la fila 1 es el encabezado
+    
+    def _iter_chunks(self, rows: Iterable[Tuple[int, Dict]], chunk_size: int) -> Iterator[List[Tuple[int, Dict]]]:
+        """Agrupa el iterador de filas en bloques de tamaño acotado"""
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+    
+    def _normalize_chunk(
+        self,
+        chunk: List[Tuple[int, Dict]],
+        request_prefix: str
+    ) -> Tuple[List[Tuple[int, Dict]], List[Dict]]:
+        """Valida y normaliza un bloque de filas operando sobre columnas completas
+        
+        Cada regla se aplica con operaciones vectorizadas de pandas sobre la
+        columna completa, no fila a fila. Retorna las filas válidas como
+        (número de fila, datos de la solicitud) y la lista de errores por fila.
+        
+        El número de solicitud es `request_prefix` (ver `_request_prefix`)
+        seguido del número de fila.
+        """
+        row_numbers = [row_number for row_number, _ in chunk]
+        df = pd.DataFrame([row for _, row in chunk], index=row_numbers, dtype=object)
+        df = df.reindex(columns=self.required_columns + self.optional_columns)
+        
+        # Campos obligatorios
+        nombre_solicitante = self._clean_column(df['nombre_solicitante'])
+        fecha_viaje = self._parse_datetime_column(df['fecha_viaje'])
+        origen = self._clean_column(df['origen'])
+        destino = self._clean_column(df['destino'])
+        
+        # Máscara de error por fila; se reporta la primera regla que falla
+        error_messages = pd.Series(
+            np.select(
+                [
+                    self._is_blank(nombre_solicitante),
+                    fecha_viaje.isna(),
+                    self._is_blank(origen),
+                    self._is_blank(destino)
+                ],
+                [
+                    "Nombre del solicitante es obligatorio",
+                    "Fecha del viaje es obligatoria y debe ser válida",
+                    "Origen es obligatorio",
+                    "Destino es obligatorio"
+                ],
+                default=""
+            ),
+            index=df.index
+        )
+        invalid = error_messages != ""
+        
+        errors = [
+            {"fila": row_number, "error": f"Error en fila {row_number}: {message}"}
+            for row_number, message in error_messages[invalid].items()
+        ]
+        if errors:
+            logger.warning(f"{len(errors)} filas con errores entre las filas {row_numbers[0]} y {row_numbers[-1]}")
+        
+        # Campos opcionales
+        email_contacto = self._clean_column(df['email_contacto'])
+        email_contacto = email_contacto.where(
+            email_contacto.str.match(EMAIL_PATTERN).fillna(False).astype(bool)
+        )
+        
+        numero_pasajeros = self._parse_passengers_column(df['numero_pasajeros'])
+        
+        # Mapeo categórico: se traduce cada valor distinto una sola vez
+        prioridad = self._clean_column(df['prioridad']).str.lower().fillna('media')
+        prioridad = prioridad.astype('category').map(
+            defaultdict(lambda: AlertPriority.MEDIA, PRIORITY_MAP)
+        ).astype(object)
+        
+        especial = df['requiere_vehiculo_especial']
+        requiere_vehiculo_especial = especial.notna() & especial.astype(str).str.lower().isin(TRUE_VALUES)
+        
+        # Número de solicitud único y fecha de solicitud común al bloque
+        numero_solicitud = request_prefix + df.index.astype(str)
+        now = datetime.now()
+        
+        normalized = pd.DataFrame({
+            "numero_solicitud": numero_solicitud,
+            "nombre_solicitante": nombre_solicitante,
+            "fecha_viaje": fecha_viaje.astype(object),
+            "origen": origen,
+            "destino": destino,
+            "dependencia": self._clean_column(df['dependencia']),
+            "telefono_contacto": self._clean_column(df['telefono_contacto']),
+            "email_contacto": email_contacto,
+            "proposito_viaje": self._clean_column(df['proposito_viaje']),
+            "numero_pasajeros": numero_pasajeros,
+            "prioridad": prioridad,
+            "observaciones": self._clean_column(df['observaciones']),
+            "requiere_vehiculo_especial": requiere_vehiculo_especial
+        }, index=df.index)[~invalid]
+        
+        # Valores faltantes como None para la base de datos
+        normalized = normalized.astype(object).where(normalized.notna(), None)
+        
+        candidates = [
+            (row_number, {**record, "fecha_solicitud": now, "estado": RequestStatus.PENDIENTE})
+            for row_number, record in zip(normalized.index, normalized.to_dict('records'))
+        ]
+        return candidates, errors
+    
+    def _request_prefix(self) -> str:
+        """Prefijo de los números de solicitud de una importación
+        
+        Incluye la hora de inicio y un identificador aleatorio propio de la
+        importación: dos importaciones iniciadas en el mismo segundo no generan
+        números repetidos.
+        """
+        return f"SOL-{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid4().hex[:8]}-"
+    
+    def _clean_column(self, values: pd.Series) -> pd.Series:
+        """Texto sin espacios al inicio ni al final; las celdas vacías quedan nulas"""
+        return values.astype(str).str.strip().where(values.notna())
+    
+    def _is_blank(self, values: pd.Series) -> pd.Series:
+        """Máscara de valores nulos o vacíos"""
+        return (values.isna() | (values == "")).to_numpy()
+    
+    def _parse_datetime_column(self, values: pd.Series) -> pd.Series:
+        """Convierte la columna de fechas del viaje
+        
+        Las celdas con fecha se convierten directamente; las de texto se
+        prueban contra DATETIME_FORMATS, cada formato aplicado sobre toda la
+        columna. Los números y textos no reconocidos quedan como NaT.
+        """
+        # Solo las celdas de texto pasan por .str: una columna de fechas nativas
+        # (celdas de fecha en xlsx, timestamps de Parquet) no admite ese accesor
+        is_text = self._is_text(values)
+        text = values[is_text].astype(str).str.strip().reindex(values.index)
+        
+        non_text = values.where(~is_text)
+        is_number = pd.to_numeric(non_text, errors='coerce').notna()
+        parsed = pd.to_datetime(non_text.where(~is_number), errors='coerce')
+        
+        for fmt in DATETIME_FORMATS:
+            pending = is_text & parsed.isna()
+            if not pending.any():
+                break
+            parsed = parsed.fillna(pd.to_datetime(text.where(pending), format=fmt, errors='coerce'))
+        
+        return parsed
+    
+    def _parse_passengers_column(self, values: pd.Series) -> pd.Series:
+        """Convierte la columna numero_pasajeros
+        
+        Se siguen las reglas de int(): los números se truncan y los textos solo
+        se aceptan si son enteros ("2", " 3 "); un texto como "2.7" o "dos"
+        vale 1, al igual que las celdas vacías. El mínimo es 1. Los infinitos,
+        que int() rechaza, también valen 1.
+        """
+        is_text = self._is_text(values)
+        text = values[is_text].astype(str).str.strip()
+        integer_text = text[text.str.fullmatch(r"[+-]?\d+")]
+        
+        numbers = pd.to_numeric(values.where(~is_text), errors='coerce').astype(float)
+        numbers = numbers.fillna(pd.to_numeric(integer_text, errors='coerce').reindex(values.index))
+        numbers = np.trunc(numbers.replace([np.inf, -np.inf], np.nan))
+        return numbers.fillna(1).clip(lower=1).astype(int)
+    
+    def _is_text(self, values: pd.Series) -> pd.Series:
+        """Máscara de celdas de texto (las columnas de tipo object pueden mezclar tipos)"""
+        return values.map(lambda value: isinstance(value, str)).astype(bool)
+    
+    def _write_error_report(
+        self,
+        file_path: str,
+        filename: Optional[str],
+        errors: List[Dict],
+        report_format: str
+    ) -> str:
+        """Genera el reporte de validación y retorna su identificador
+        
+        El archivo se vuelve a recorrer en streaming y cada fila se escribe con
+        su número y una columna "error" (vacía si la fila es válida), de modo
+        que el usuario puede corregir el archivo sobre el mismo reporte.
+        """
+        errors_by_row = defaultdict(list)
+        for error in errors:
+            errors_by_row[error["fila"]].append(error["error"])
+        
+        report_dir = Path(settings.UPLOAD_DIR) / "reports"
+        report_dir.mkdir(parents=True, exist_ok=True)
+        report_id = uuid4().hex
+        report_path = report_dir / f"{report_id}.{report_format}"
+        
+        with self._open_rows(file_path, filename) as (columns, rows):
+            header = ["fila"] + columns + ["error"]
+            report_rows = (
+                (row_number, [row.get(col) for col in columns], "; ".join(errors_by_row.get(row_number, [])))
+                for row_number, row in rows
+            )
             
-            # Si es string, intentar parsear
-            if isinstance(value, str):
-                # Formatos comunes
-                formats = [
-                    "%Y-%m-%d %H:%M:%S",
-                    "%Y-%m-%d %H:%M",
-                    "%Y-%m-%d",
-                    "%d/%m/%Y %H:%M:%S",
-                    "%d/%m/%Y %H:%M",
-                    "%d/%m/%Y",
-                    "%d-%m-%Y %H:%M:%S",
-                    "%d-%m-%Y %H:%M",
-                    "%d-%m-%Y"
-                ]
+            if report_format == "csv":
+                with open(report_path, 'w', newline='', encoding='utf-8-sig') as output:
+                    writer = csv.writer(output)
+                    writer.writerow(header)
+                    for row_number, values, error in report_rows:
+                        writer.writerow([row_number] + values + [error])
+            else:
+                # Libro en modo write-only: las filas se escriben sin retenerlas en memoria
+                workbook = openpyxl.Workbook(write_only=True)
+                sheet = workbook.create_sheet("Validación")
+                sheet.append(header)
+                error_fill = PatternFill(start_color="FFC7CE", end_color="FFC7CE", fill_type="solid")
+                error_font = Font(color="9C0006")
                 
-                for fmt in formats:
-                    try:
-                        return datetime.strptime(str(value).strip(), fmt)
-                    except ValueError:
-                        continue
-            
-            # Si es timestamp de pandas
-            if hasattr(value, 'to_pydatetime'):
-                return value.to_pydatetime()
-            
-            return None
-            
-        except Exception:
+                for row_number, values, error in report_rows:
+                    error_cell = WriteOnlyCell(sheet, value=error or None)
+                    if error:
+                        error_cell.fill = error_fill
+                        error_cell.font = error_font
+                    sheet.append([row_number] + values + [error_cell])
+                
+                workbook.save(report_path)
+        
+        return report_id
+    
+    def get_report_path(self, report_id: str) -> Optional[Path]:
+        """Ruta del reporte de validación `report_id`, o None si no existe"""
+        if not re.fullmatch(r"[0-9a-f]{32}", report_id):
             return None
+        
+        for report_format in ("xlsx", "csv"):
+            report_path = Path(settings.UPLOAD_DIR) / "reports" / f"{report_id}.{report_format}"
+            if report_path.exists():
+                return report_path
+        
+        return None
     
-    def _validate_email(self, email: str) -> bool:
-        """Valida formato de email"""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        return bool(re.match(pattern, email))
+    def _duplicate_key(self, request_data: Dict) -> Tuple:
+        """Llave usada para detectar solicitudes duplicadas"""
+        return (
+            request_data["nombre_solicitante"],
+            request_data["fecha_viaje"],
+            request_data["destino"]
+        )
     
-    def _find_similar_request(self, db: Session, request_data: Dict) -> Optional[TransportRequest]:
-        """Busca solicitudes similares para evitar duplicados"""
-        # Buscar por solicitante, fecha y destino similar
-        similar = db.query(TransportRequest).filter(
-            TransportRequest.nombre_solicitante == request_data["nombre_solicitante"],
-            TransportRequest.fecha_viaje == request_data["fecha_viaje"],
-            TransportRequest.destino == request_data["destino"]
-        ).first()
+    def _find_existing_requests(self, db: Session, requests_data: List[Dict]) -> Dict[Tuple, int]:
+        """Busca en bloque solicitudes existentes con el mismo solicitante, fecha y destino
         
-        return similar
+        Retorna un diccionario llave -> ID de la solicitud existente.
+        """
+        keys = list({self._duplicate_key(data) for data in requests_data})
+        existing = {}
+        
+        # Lotes acotados para no superar el límite de parámetros de SQLite
+        for start in range(0, len(keys), self.DEDUP_QUERY_BATCH):
+            batch = keys[start:start + self.DEDUP_QUERY_BATCH]
+            matches = db.query(
+                TransportRequest.id,
+                TransportRequest.nombre_solicitante,
+                TransportRequest.fecha_viaje,
+                TransportRequest.destino
+            ).filter(
+                tuple_(
+                    TransportRequest.nombre_solicitante,
+                    TransportRequest.fecha_viaje,
+                    TransportRequest.destino
+                ).in_(batch)
+            ).order_by(TransportRequest.id).all()
+            
+            for match in matches:
+                existing.setdefault(
+                    (match.nombre_solicitante, match.fecha_viaje, match.destino),
+                    match.id
+                )
+        
+        return existing
     
     def get_excel_template(self) -> Dict:
         """Retorna la estructura del template de Excel"""
@@ -319,6 +1075,55 @@ class ExcelProcessorService:
                 }
             ]
         }
+    
+    def get_template_file(self) -> Dict:
+        """Retorna el template de Excel ya renderizado, con su ETag y fecha de modificación
+        
+        El libro solo depende de `get_excel_template`, así que se genera la
+        primera vez que se solicita y luego se sirve desde memoria. El ETag se
+        calcula sobre la estructura del template (no sobre los bytes, que
+        incluyen la fecha de creación del libro), de modo que es el mismo en
+        todos los procesos y reinicios mientras el template no cambie.
+        """
+        if self._template_file is None:
+            with self._template_lock:
+                if self._template_file is None:
+                    template_data = self.get_excel_template()
+                    fingerprint = json.dumps(template_data, sort_keys=True, ensure_ascii=False)
+                    
+                    self._template_file = {
+                        "content": self._render_template(template_data),
+                        "etag": f'"{hashlib.sha256(fingerprint.encode()).hexdigest()[:32]}"',
+                        # La estructura vive en este módulo: su fecha es la del template
+                        "last_modified": datetime.fromtimestamp(
+                            int(Path(__file__).stat().st_mtime), tz=timezone.utc
+                        )
+                    }
+        
+        return self._template_file
+    
+    def _render_template(self, template_data: Dict) -> bytes:
+        """Genera el libro del template con la hoja de ejemplo y la de instrucciones"""
+        columns = [col["name"] for col in template_data["columns"]]
+        df = pd.DataFrame(template_data["example_data"], columns=columns)
+        
+        excel_buffer = io.BytesIO()
+        with pd.ExcelWriter(excel_buffer, engine='openpyxl') as writer:
+            df.to_excel(writer, index=False, sheet_name='Solicitudes')
+            
+            # Agregar hoja con instrucciones
+            instructions_df = pd.DataFrame({
+                'Campo': [col["name"] for col in template_data["columns"]],
+                'Requerido': [col["required"] for col in template_data["columns"]],
+                'Descripción': [col["description"] for col in template_data["columns"]]
+            })
+            instructions_df.to_excel(writer, index=False, sheet_name='Instrucciones')
+        
+        return excel_buffer.getvalue()
 
 # Instancia global del servicio
-excel_processor = ExcelProcessorService()
\ No newline at end of file
+excel_processor = ExcelProcessorService()
+
+def _parse_bundle_unit(task: Tuple[str, str, Optional[str], str, int]) -> Dict:
+    """Punto de entrada de los procesos del pool de importación por lotes"""
+    return excel_processor._parse_unit(*task)
\ No newline at end of file
@@ -0,0 +1,258 @@
+from sqlalchemy import event, select, func, inspect, update, insert, delete, text
+from sqlalchemy.orm import Session
+from sqlalchemy.dialects import postgresql, sqlite
+from collections import Counter
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+import logging
+from ..database.models import FleetCounter, Vehicle, Driver, TransportRequest, MaintenanceAlert
+from ..database.history import track_previous_values
+
+logger = logging.getLogger(__name__)
+
+# Contadores materializados del dashboard (tabla fleet_counters): cada fila es
+# un conteo (grupo, clave) -> valor
+#   vehiculos    "<tipo>:<estado>" de los vehículos activos
+#   conductores  "<estado>:<vencimiento de licencia>" de los conductores
+#                activos (la vigencia depende del día en que se consulta)
+#   solicitudes  "<estado>"
+#   alertas      "activas"
+# Se actualizan en el mismo flush que modifica las tablas de origen, dentro de
+# la misma transacción. Las escrituras con Core (insert en lote, sin ORM) deben
+# llamar a adjust(); reconcile() los recalcula desde las tablas de origen.
+VEHICLES = "vehiculos"
+DRIVERS = "conductores"
+REQUESTS = "solicitudes"
+ALERTS = "alertas"
+ACTIVE_ALERTS_KEY = "activas"
+
+Deltas = Dict[Tuple[str, str], int]
+
+# Dialectos con INSERT ... ON CONFLICT (upsert en una sentencia)
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+def _text(value) -> str:
+    """Valor de enum o fecha como texto, con el mismo formato que la migración 0004"""
+    if value is None:
+        return ""
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(getattr(value, "value", value)).lower()
+
+def vehicle_key(tipo, estado, activo=True) -> Optional[str]:
+    """Clave del vehículo; None si no se cuenta (inactivo)"""
+    return f"{_text(tipo)}:{_text(estado)}" if activo else None
+
+def driver_key(estado, fecha_vencimiento_licencia, activo=True) -> Optional[str]:
+    """Clave del conductor; None si no se cuenta (inactivo)"""
+    return f"{_text(estado)}:{_text(fecha_vencimiento_licencia)}" if activo else None
+
+def request_key(estado) -> Optional[str]:
+    return _text(estado)
+
+def alert_key(activa) -> Optional[str]:
+    return ACTIVE_ALERTS_KEY if activa else None
+
+# Modelo -> (grupo, atributos que forman la clave, función de clave)
+TRACKED = {
+    Vehicle: (VEHICLES, ("tipo_vehiculo", "estado", "activo"), vehicle_key),
+    Driver: (DRIVERS, ("estado", "fecha_vencimiento_licencia", "activo"), driver_key),
+    TransportRequest: (REQUESTS, ("estado",), request_key),
+    MaintenanceAlert: (ALERTS, ("activa",), alert_key),
+}
+
+# La clave anterior de un objeto modificado sale del historial de sus atributos
+track_previous_values(*(
+    getattr(model, attribute)
+    for model, (group, attributes, key_function) in TRACKED.items()
+    for attribute in attributes
+))
+
+def _key(obj, old: bool = False) -> Optional[str]:
+    """Clave actual del objeto, o la que tenía antes de los cambios pendientes"""
+    group, attributes, key_function = TRACKED[type(obj)]
+    state = inspect(obj)
+    values = []
+    
+    for attribute in attributes:
+        if old:
+            history = state.attrs[attribute].load_history()
+            values.append((history.deleted or history.unchanged or [None])[0])
+        else:
+            values.append(getattr(obj, attribute))
+    
+    return key_function(*values)
+
+def flush_deltas(session: Session) -> Deltas:
+    """Variación de los contadores por los objetos del flush en curso"""
+    deltas = Counter()
+    
+    for obj in session.new:
+        if type(obj) in TRACKED:
+            deltas[(TRACKED[type(obj)][0], _key(obj))] += 1
+    
+    for obj in session.dirty:
+        if type(obj) in TRACKED:
+            old_key, new_key = _key(obj, old=True), _key(obj)
+            if old_key != new_key:
+                deltas[(TRACKED[type(obj)][0], old_key)] -= 1
+                deltas[(TRACKED[type(obj)][0], new_key)] += 1
+    
+    for obj in session.deleted:
+        if type(obj) in TRACKED:
+            deltas[(TRACKED[type(obj)][0], _key(obj, old=True))] -= 1
+    
+    return {(group, key): delta for (group, key), delta in deltas.items() if key is not None and delta}
+
+def adjust(connection, deltas: Deltas):
+    """Suma `deltas` a los contadores, creando las filas que no existan"""
+    if not deltas:
+        return
+    
+    rows = [{"grupo": group, "clave": key, "valor": delta} for (group, key), delta in sorted(deltas.items())]
+    dialect_insert = _UPSERT_INSERTS.get(connection.dialect.name)
+    
+    if dialect_insert is not None:
+        # Una sola sentencia INSERT ... ON CONFLICT DO UPDATE para todas las claves
+        statement = dialect_insert(FleetCounter).values(rows)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[FleetCounter.grupo, FleetCounter.clave],
+            set_={"valor": FleetCounter.valor + statement.excluded.valor, "updated_at": func.now()}
+        ))
+        return
+    
+    for row in rows:
+        updated = connection.execute(
+            update(FleetCounter)
+            .where(FleetCounter.grupo == row["grupo"], FleetCounter.clave == row["clave"])
+            .values(valor=FleetCounter.valor + row["valor"], updated_at=func.now())
+        )
+        if not updated.rowcount:
+            connection.execute(insert(FleetCounter).values(**row))
+
+@event.listens_for(Session, "after_flush")
+def _update_counters(session, flush_context):
+    deltas = flush_deltas(session)
+    if deltas:
+        adjust(session.connection(), deltas)
+
+def source_counts(db: Session) -> Deltas:
+    """Valor correcto de cada contador, calculado desde las tablas de origen"""
+    counts = {}
+    
+    for tipo, estado, count in db.execute(select(
+        Vehicle.tipo_vehiculo, Vehicle.estado, func.count(Vehicle.id)
+    ).where(Vehicle.activo == True).group_by(Vehicle.tipo_vehiculo, Vehicle.estado)):
+        counts[(VEHICLES, vehicle_key(tipo, estado))] = count
+    
+    for estado, fecha, count in db.execute(select(
+        Driver.estado, Driver.fecha_vencimiento_licencia, func.count(Driver.id)
+    ).where(Driver.activo == True).group_by(Driver.estado, Driver.fecha_vencimiento_licencia)):
+        counts[(DRIVERS, driver_key(estado, fecha))] = count
+    
+    for estado, count in db.execute(select(
+        TransportRequest.estado, func.count(TransportRequest.id)
+    ).group_by(TransportRequest.estado)):
+        counts[(REQUESTS, request_key(estado))] = count
+    
+    active_alerts = db.scalar(select(func.count(MaintenanceAlert.id)).where(MaintenanceAlert.activa == True))
+    if active_alerts:
+        counts[(ALERTS, ACTIVE_ALERTS_KEY)] = active_alerts
+    
+    return counts
+
+def reconcile(db: Session) -> Deltas:
+    """Recalcula los contadores desde las tablas de origen y corrige las
+    diferencias; retorna la diferencia encontrada (valor correcto - guardado)
+    
+    En PostgreSQL se bloquea la tabla de contadores durante el cálculo: las
+    escrituras concurrentes esperan y aplican su variación sobre el valor ya
+    corregido. En SQLite una escritura confirmada entre el cálculo y la
+    corrección queda como diferencia para la siguiente reconciliación.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE fleet_counters IN EXCLUSIVE MODE"))
+    
+    stored = {(row.grupo, row.clave): row.valor for row in db.execute(counters_query())}
+    expected = source_counts(db)
+    drift = {
+        item: expected.get(item, 0) - stored.get(item, 0)
+        for item in stored.keys() | expected.keys()
+        if expected.get(item, 0) != stored.get(item, 0)
+    }
+    
+    if drift:
+        logger.warning(f"Contadores del dashboard desfasados, corrigiendo: {drift}")
+        adjust(db.connection(), drift)
+    
+    # Las filas en cero (p. ej. fechas de licencia que ya nadie tiene) sobran
+    db.execute(delete(FleetCounter).where(FleetCounter.valor == 0))
+    db.commit()
+    return drift
+
+def counters_query():
+    return select(FleetCounter.grupo, FleetCounter.clave, FleetCounter.valor)
+
+def _split(key: str) -> Tuple[str, str]:
+    first, _, second = key.partition(":")
+    return first, second
+
+def _by_group(rows) -> Dict[str, Dict[str, int]]:
+    groups: Dict[str, Dict[str, int]] = {}
+    for row in rows:
+        groups.setdefault(row.grupo, {})[row.clave] = row.valor
+    return groups
+
+def dashboard_counts(rows, today: Optional[date] = None) -> Dict[str, int]:
+    """Indicadores de DashboardStats (salvo mantenimientos) a partir de las
+    filas de counters_query"""
+    today = (today or date.today()).isoformat()
+    groups = _by_group(rows)
+    vehicles = Counter()
+    
+    for key, value in groups.get(VEHICLES, {}).items():
+        vehicles[_split(key)[1]] += value
+    
+    drivers = groups.get(DRIVERS, {})
+    
+    return {
+        "total_vehiculos": sum(vehicles.values()),
+        "vehiculos_disponibles": vehicles["disponible"],
+        "vehiculos_en_uso": vehicles["en_uso"],
+        "vehiculos_mantenimiento": vehicles["mantenimiento"],
+        "total_conductores": sum(drivers.values()),
+        # Fechas ISO: la comparación de texto respeta el orden cronológico
+        "conductores_disponibles": sum(
+            value for key, value in drivers.items()
+            if _split(key)[0] == "disponible" and _split(key)[1] > today
+        ),
+        "solicitudes_pendientes": groups.get(REQUESTS, {}).get("pendiente", 0),
+        "alertas_activas": groups.get(ALERTS, {}).get(ACTIVE_ALERTS_KEY, 0),
+    }
+
+def fleet_status(rows, today: Optional[date] = None) -> Dict[str, List[Dict]]:
+    """Conteos de /dashboard/fleet-status a partir de las filas de counters_query"""
+    today = (today or date.today()).isoformat()
+    groups = _by_group(rows)
+    drivers = Counter()
+    
+    # Solo conductores con licencia vigente
+    for key, value in groups.get(DRIVERS, {}).items():
+        estado, fecha = _split(key)
+        if fecha > today:
+            drivers[estado] += value
+    
+    return {
+        "vehicle_status_by_type": [
+            {"tipo": _split(key)[0], "estado": _split(key)[1], "count": value}
+            for key, value in sorted(groups.get(VEHICLES, {}).items()) if value
+        ],
+        "driver_status": [
+            {"estado": estado, "count": value}
+            for estado, value in sorted(drivers.items()) if value
+        ],
+        "request_status": [
+            {"estado": estado, "count": value}
+            for estado, value in sorted(groups.get(REQUESTS, {}).items()) if value
+        ],
+    }
\ No newline at end of file
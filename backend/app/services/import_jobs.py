@@ -0,0 +1,217 @@
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import delete, or_, and_
+from typing import Dict, Optional
+from datetime import datetime, timedelta
+from uuid import uuid4
+import copy
+import logging
+import os
+import threading
+from pathlib import Path
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..database.models import ImportJob, ImportJobStatus
+from .excel_processor import excel_processor
+
+logger = logging.getLogger(__name__)
+
+# Campos del trabajo que se guardan en la tabla import_jobs
+JOB_FIELDS = [column.key for column in ImportJob.__table__.columns]
+
+class ImportJobService:
+    """Ejecuta importaciones masivas en segundo plano y registra su progreso
+    
+    El estado de cada trabajo se guarda en la tabla import_jobs al encolarlo,
+    al empezar y al terminar, de modo que cualquier worker de la aplicación
+    responde /import-jobs/{job_id}. El avance por bloque solo se mantiene en
+    memoria del proceso que ejecuta el trabajo: escribirlo en la base de datos
+    competiría con la transacción de la importación (en SQLite, el mismo lock
+    de escritura). Consultado desde otro worker, un trabajo en curso muestra el
+    estado "en_proceso" sin avance detallado.
+    """
+    
+    def __init__(self, max_workers: int):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="import-job")
+        # Sesiones de la importación y del registro de trabajos; None usa SessionLocal
+        self.session_factory = None
+        # Trabajos pendientes o en curso en este proceso (con su avance)
+        self.jobs: Dict[str, Dict] = {}
+        self.lock = threading.Lock()
+    
+    def submit(
+        self,
+        file_path: str,
+        filename: str,
+        file_size: int,
+        bundle: bool = False,
+        validate_only: bool = False,
+        report_format: Optional[str] = None
+    ) -> Dict:
+        """Registra un trabajo de importación y lo encola en el pool de workers
+        
+        El archivo en `file_path` pasa a ser propiedad del trabajo y se elimina
+        al terminar. Con `bundle` se importan todas las hojas del libro o todos
+        los archivos del .zip. `validate_only` y `report_format` se pasan al
+        procesador (el reporte solo está disponible para archivos individuales).
+        """
+        self._purge_expired_jobs()
+        
+        job_id = uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": ImportJobStatus.PENDIENTE,
+            "filename": filename,
+            "file_size": file_size,
+            "bundle": bundle,
+            "validate_only": validate_only,
+            "created_at": datetime.now(),
+            "started_at": None,
+            "finished_at": None,
+            "progress": {
+                "rows_read": 0,
+                "created": 0,
+                "rejected": 0
+            },
+            "result": None
+        }
+        
+        self._save_job(job)
+        
+        with self.lock:
+            self.jobs[job_id] = job
+            snapshot = copy.deepcopy(job)
+        
+        options = {"validate_only": validate_only}
+        if not bundle:
+            options["report_format"] = report_format
+        
+        self.executor.submit(self._run_job, job_id, file_path, filename, bundle, options)
+        
+        logger.info(f"Trabajo de importación {job_id} encolado: {filename}")
+        
+        return snapshot
+    
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """Retorna una copia del estado actual de un trabajo
+        
+        Los trabajos en curso en este proceso se leen de memoria (con el avance
+        al día); los demás, de la tabla import_jobs.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job:
+                return copy.deepcopy(job)
+        
+        with self._session() as db:
+            stored = db.get(ImportJob, job_id)
+            return {field: getattr(stored, field) for field in JOB_FIELDS} if stored else None
+    
+    def _session(self):
+        return (self.session_factory or SessionLocal)()
+    
+    def _save_job(self, job: Dict):
+        """Guarda el estado del trabajo en la tabla import_jobs"""
+        values = {field: job[field] for field in JOB_FIELDS}
+        values["progress"] = jsonable_encoder(values["progress"])
+        values["result"] = jsonable_encoder(values["result"])
+        
+        with self._session() as db:
+            db.merge(ImportJob(**values))
+            db.commit()
+    
+    def _save_current(self, job_id: str):
+        """Guarda el estado en memoria de un trabajo de este proceso"""
+        with self.lock:
+            job = copy.deepcopy(self.jobs[job_id])
+        self._save_job(job)
+    
+    def _update_job(self, job_id: str, **fields):
+        with self.lock:
+            self.jobs[job_id].update(fields)
+    
+    def _run_job(self, job_id: str, file_path: str, filename: str, bundle: bool, options: Dict):
+        """Procesa el archivo con una sesión propia (la del request ya se cerró)"""
+        self._update_job(job_id, status=ImportJobStatus.EN_PROCESO, started_at=datetime.now())
+        
+        db = None
+        try:
+            self._save_current(job_id)
+            
+            db = self._session()
+            process = excel_processor.process_excel_bundle if bundle else excel_processor.process_excel_file
+            result = process(
+                file_path,
+                db,
+                progress_callback=lambda progress: self._update_job(job_id, progress=progress),
+                filename=filename,
+                **options
+            )
+            status = ImportJobStatus.COMPLETADO if result["success"] else ImportJobStatus.FALLIDO
+        
+        except Exception as e:
+            logger.error(f"Error en trabajo de importación {job_id}: {e}")
+            status = ImportJobStatus.FALLIDO
+            result = {
+                "success": False,
+                "message": f"Error procesando archivo: {str(e)}",
+                "processed": 0,
+                "errors": [{"fila": "General", "error": str(e)}]
+            }
+        
+        finally:
+            if db is not None:
+                db.close()
+            try:
+                os.unlink(file_path)
+            except OSError:
+                pass
+        
+        self._update_job(job_id, status=status, result=result, finished_at=datetime.now())
+        
+        try:
+            self._save_current(job_id)
+        except Exception as e:
+            # Sin registro en la base de datos el resultado queda solo en este proceso
+            logger.error(f"No se pudo guardar el resultado del trabajo de importación {job_id}: {e}")
+        else:
+            with self.lock:
+                del self.jobs[job_id]
+        
+        logger.info(f"Trabajo de importación {job_id} finalizado: {status.value} ({result['processed']} solicitudes creadas)")
+    
+    def _purge_expired_jobs(self):
+        """Descarta resultados y reportes de trabajos terminados hace más del tiempo de retención
+        
+        También se descartan los trabajos que nunca terminaron (p. ej. por un
+        reinicio del proceso que los ejecutaba) creados antes de ese límite.
+        """
+        limit = datetime.now() - timedelta(hours=settings.IMPORT_JOB_RETENTION_HOURS)
+        
+        # Resultados que no se pudieron guardar en la base de datos
+        with self.lock:
+            expired = [
+                job_id for job_id, job in self.jobs.items()
+                if job["finished_at"] and job["finished_at"] < limit
+            ]
+            for job_id in expired:
+                del self.jobs[job_id]
+        
+        with self._session() as db:
+            db.execute(delete(ImportJob).where(or_(
+                ImportJob.finished_at < limit,
+                and_(ImportJob.finished_at.is_(None), ImportJob.created_at < limit)
+            )))
+            db.commit()
+        
+        report_dir = Path(settings.UPLOAD_DIR) / "reports"
+        if report_dir.exists():
+            for report_path in report_dir.iterdir():
+                try:
+                    if datetime.fromtimestamp(report_path.stat().st_mtime) < limit:
+                        report_path.unlink()
+                except OSError:
+                    pass
+
+# Instancia global del servicio
+import_job_service = ImportJobService(max_workers=settings.IMPORT_JOB_WORKERS)
\ No newline at end of file
@@ -0,0 +1,91 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from typing import Dict, List, Tuple
+from ..core.events import event_bus
+from ..database.history import track_previous_values
+from ..database.models import (
+    Vehicle, Assignment, TransportRequest, MaintenanceAlert, RequestStatus
+)
+
+# Eventos del dashboard en vivo a partir de los cambios que hacen los
+# endpoints de escritura: se acumulan en cada flush y se publican en el bus
+# solo cuando la transacción se confirma (un rollback los descarta)
+_PENDING_KEY = "live_events"
+
+# Transiciones de estado de la solicitud que marcan inicio y fin del viaje
+TRIP_EVENTS = {
+    RequestStatus.EN_CURSO: "trip_started",
+    RequestStatus.COMPLETADO: "trip_ended",
+}
+
+# El estado anterior sale del historial del atributo
+track_previous_values(Vehicle.estado, TransportRequest.estado)
+
+def _value(value):
+    return getattr(value, "value", value)
+
+def _estado_change(obj):
+    """(anterior, nuevo) si el estado del objeto cambió en este flush"""
+    history = inspect(obj).attrs.estado.history
+    if not history.added or not history.deleted or history.added[0] == history.deleted[0]:
+        return None
+    return history.deleted[0], history.added[0]
+
+def _assignment_data(assignment: Assignment) -> Dict:
+    return {
+        "id": assignment.id,
+        "solicitud_id": assignment.solicitud_id,
+        "vehiculo_id": assignment.vehiculo_id,
+        "conductor_id": assignment.conductor_id
+    }
+
+def flush_events(session: Session) -> List[Tuple[str, Dict]]:
+    """Eventos (tipo, datos) causados por los objetos del flush en curso"""
+    events = []
+    
+    for obj in session.new:
+        if isinstance(obj, Assignment):
+            events.append(("assignment_created", _assignment_data(obj)))
+        elif isinstance(obj, MaintenanceAlert):
+            events.append(("alert_created", {
+                "id": obj.id,
+                "vehiculo_id": obj.vehiculo_id,
+                "tipo_alerta": obj.tipo_alerta,
+                "prioridad": _value(obj.prioridad)
+            }))
+    
+    for obj in session.dirty:
+        if isinstance(obj, Vehicle):
+            change = _estado_change(obj)
+            if change:
+                events.append(("vehicle_status_changed", {
+                    "id": obj.id,
+                    "placa": obj.placa,
+                    "estado_anterior": _value(change[0]),
+                    "estado": _value(change[1])
+                }))
+        elif isinstance(obj, TransportRequest):
+            change = _estado_change(obj)
+            if change and change[1] in TRIP_EVENTS:
+                events.append((TRIP_EVENTS[change[1]], {"solicitud_id": obj.id, "estado": _value(change[1])}))
+    
+    for obj in session.deleted:
+        if isinstance(obj, Assignment):
+            events.append(("assignment_cancelled", _assignment_data(obj)))
+    
+    return events
+
+@event.listens_for(Session, "after_flush")
+def _collect_events(session, flush_context):
+    events = flush_events(session)
+    if events:
+        session.info.setdefault(_PENDING_KEY, []).extend(events)
+
+@event.listens_for(Session, "after_commit")
+def _publish_events(session):
+    for event_type, data in session.info.pop(_PENDING_KEY, []):
+        event_bus.publish(event_type, data)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_events(session):
+    session.info.pop(_PENDING_KEY, None)
\ No newline at end of file
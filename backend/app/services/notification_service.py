@@ -2,7 +2,9 @@ from typing import List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from ..database.models import Vehicle, MaintenanceAlert, Driver, AlertPriority
-from ..database.database import SessionLocal
+from ..core.database import SessionLocal
+from ..core.config import settings
+from . import fleet_counters
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
@@ -40,6 +42,15 @@ class NotificationService:
             id='document_alerts'
         )
         
+        # Reconciliar los contadores del dashboard con las tablas de origen
+        if settings.FLEET_COUNTERS_RECONCILE_MINUTES:
+            self.scheduler.add_job(
+                func=self.reconcile_fleet_counters,
+                trigger="interval",
+                minutes=settings.FLEET_COUNTERS_RECONCILE_MINUTES,
+                id='fleet_counters_reconcile'
+            )
+        
         self.scheduler.start()
         logger.info("Scheduler de alertas iniciado")
     
@@ -48,15 +59,32 @@ class NotificationService:
         if self.scheduler.running:
             self.scheduler.shutdown()
     
+    def reconcile_fleet_counters(self):
+        """Corrige los contadores del dashboard que se hayan desfasado"""
+        db = SessionLocal()
+        try:
+            fleet_counters.reconcile(db)
+        except Exception as e:
+            logger.error(f"Error reconciliando contadores del dashboard: {e}")
+            db.rollback()
+        finally:
+            db.close()
+    
     def check_maintenance_alerts(self):
         """Verifica y crea alertas de mantenimiento automáticamente"""
         db = SessionLocal()
         try:
             vehicles = db.query(Vehicle).filter(Vehicle.activo == True).all()
             
+            # Alertas activas de toda la flota en una sola consulta, en lugar de
+            # buscar la alerta existente vehículo por vehículo
+            active_alerts = set(db.query(
+                MaintenanceAlert.vehiculo_id, MaintenanceAlert.tipo_alerta
+            ).filter(MaintenanceAlert.activa == True).all())
+            
             for vehicle in vehicles:
-                self._check_vehicle_maintenance_due(db, vehicle)
-                self._check_document_expiration_for_vehicle(db, vehicle)
+                self._check_vehicle_maintenance_due(db, vehicle, active_alerts)
+                self._check_document_expiration_for_vehicle(db, vehicle, active_alerts)
             
             db.commit()
         except Exception as e:
@@ -65,7 +93,19 @@ class NotificationService:
         finally:
             db.close()
     
-    def _check_vehicle_maintenance_due(self, db: Session, vehicle: Vehicle):
+    def _has_active_alert(self, db: Session, vehicle: Vehicle, tipo_alerta: str, active_alerts: Optional[set] = None) -> bool:
+        """Indica si el vehículo ya tiene una alerta activa del tipo dado; usa
+        `active_alerts` (pares vehiculo_id, tipo_alerta) si ya se cargaron"""
+        if active_alerts is not None:
+            return (vehicle.id, tipo_alerta) in active_alerts
+        
+        return db.query(MaintenanceAlert.id).filter(
+            MaintenanceAlert.vehiculo_id == vehicle.id,
+            MaintenanceAlert.tipo_alerta == tipo_alerta,
+            MaintenanceAlert.activa == True
+        ).first() is not None
+    
+    def _check_vehicle_maintenance_due(self, db: Session, vehicle: Vehicle, active_alerts: Optional[set] = None):
         """Verifica si un vehículo necesita mantenimiento por kilometraje"""
         # Mantenimiento cada 10,000 km (configurable)
         maintenance_interval = 10000
@@ -76,13 +116,7 @@ class NotificationService:
             
             # Alerta cuando falten 1000 km para mantenimiento
             if km_until_maintenance <= 1000:
-                existing_alert = db.query(MaintenanceAlert).filter(
-                    MaintenanceAlert.vehiculo_id == vehicle.id,
-                    MaintenanceAlert.tipo_alerta == "mantenimiento_km",
-                    MaintenanceAlert.activa == True
-                ).first()
-                
-                if not existing_alert:
+                if not self._has_active_alert(db, vehicle, "mantenimiento_km", active_alerts):
                     priority = AlertPriority.ALTA if km_until_maintenance <= 500 else AlertPriority.MEDIA
                     
                     alert = MaintenanceAlert(
@@ -94,7 +128,7 @@ class NotificationService:
                     )
                     db.add(alert)
     
-    def _check_document_expiration_for_vehicle(self, db: Session, vehicle: Vehicle):
+    def _check_document_expiration_for_vehicle(self, db: Session, vehicle: Vehicle, active_alerts: Optional[set] = None):
         """Verifica documentos próximos a vencer"""
         now = datetime.now().date()
         
@@ -109,13 +143,7 @@ class NotificationService:
                 days_until_expiry = (fecha_vencimiento - now).days
                 
                 if 0 <= days_until_expiry <= 30:  # Vence en los próximos 30 días
-                    existing_alert = db.query(MaintenanceAlert).filter(
-                        MaintenanceAlert.vehiculo_id == vehicle.id,
-                        MaintenanceAlert.tipo_alerta == f"vencimiento_{doc_type}",
-                        MaintenanceAlert.activa == True
-                    ).first()
-                    
-                    if not existing_alert:
+                    if not self._has_active_alert(db, vehicle, f"vencimiento_{doc_type}", active_alerts):
                         if days_until_expiry <= 7:
                             priority = AlertPriority.CRITICA
                         elif days_until_expiry <= 15:
@@ -184,7 +212,7 @@ class NotificationService:
             
             logger.info(f"Email enviado a {to_email}")
             return True
-            
+        
         except Exception as e:
             logger.error(f"Error enviando email: {e}")
             return False
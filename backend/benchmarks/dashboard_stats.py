@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark de /dashboard/stats.
+
+Compara las versiones del endpoint: nueve COUNT(*) (un viaje a la base de
+datos por indicador), dashboard_stats_query (una sola sentencia con un
+agregado condicional por tabla) y la actual, que lee los contadores
+materializados de fleet_counters. Se mide sobre el engine asíncrono que usa el
+endpoint y una base SQLite con el perfil de la app. Por defecto carga 10.000
+vehículos y 1.000.000 de solicitudes; la carga inicial toma algunos segundos.
+
+Uso:
+    python benchmarks/dashboard_stats.py [--vehicles 10000] [--requests 1000000] [--iterations 50]
+"""
+
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio backend al path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import create_engine, event, func, insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.database import (
+    Base, InstrumentedAsyncQueuePool, _engine_options, async_database_url, set_sqlite_pragmas
+)
+from app.database.models import (
+    Vehicle, VehicleStatus, VehicleType, Driver, DriverStatus, TransportRequest, RequestStatus,
+    Maintenance, MaintenanceType, MaintenanceStatus, MaintenanceAlert, AlertPriority
+)
+from app.api.v1.endpoints.dashboard import dashboard_stats_query, upcoming_maintenance_query
+from app.services import fleet_counters
+
+BATCH_SIZE = 50000
+
+def seed(db_path: Path, vehicles: int, requests: int):
+    """Carga la flota de prueba con INSERT en lote (Core, sin ORM)"""
+    engine = create_engine(f"sqlite:///{db_path}")
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    
+    now = datetime.now()
+    today = date.today()
+    vehicle_statuses = list(VehicleStatus)
+    driver_statuses = list(DriverStatus)
+    request_statuses = list(RequestStatus)
+    
+    tables = [
+        (Vehicle, vehicles, lambda i: {
+            "placa": f"BEN{i:06d}", "marca": "Toyota", "modelo": "Hilux", "año": 2020,
+            "tipo_vehiculo": VehicleType.CAMIONETA, "estado": vehicle_statuses[i % len(vehicle_statuses)],
+            "activo": i % 20 != 0
+        }),
+        (Driver, vehicles, lambda i: {
+            "cedula": f"C{i}", "nombre_completo": f"Conductor {i}", "numero_licencia": f"L{i}",
+            "categoria_licencia": "C2", "estado": driver_statuses[i % len(driver_statuses)],
+            "fecha_vencimiento_licencia": today + timedelta(days=i % 400 - 30), "activo": True
+        }),
+        (TransportRequest, requests, lambda i: {
+            "numero_solicitud": f"BEN-{i}", "nombre_solicitante": f"Persona {i}",
+            "fecha_solicitud": now, "fecha_viaje": now + timedelta(hours=i % 5000),
+            "origen": "A", "destino": "B", "estado": request_statuses[i % len(request_statuses)]
+        }),
+        (Maintenance, vehicles * 5, lambda i: {
+            "vehiculo_id": i % vehicles + 1, "tipo_mantenimiento": MaintenanceType.PREVENTIVO,
+            "estado": MaintenanceStatus.PROGRAMADO if i % 2 else MaintenanceStatus.COMPLETADO,
+            "fecha_programada": now + timedelta(days=i % 90 - 30), "descripcion": "Revisión"
+        }),
+        (MaintenanceAlert, vehicles * 2, lambda i: {
+            "vehiculo_id": i % vehicles + 1, "tipo_alerta": "kilometraje", "mensaje": "Mantenimiento próximo",
+            "prioridad": AlertPriority.MEDIA, "activa": i % 3 == 0
+        })
+    ]
+    
+    with engine.begin() as connection:
+        for model, rows, build_row in tables:
+            for start in range(0, rows, BATCH_SIZE):
+                connection.execute(
+                    insert(model),
+                    [build_row(i) for i in range(start, min(start + BATCH_SIZE, rows))]
+                )
+    
+    # La carga con Core no pasa por el ORM: los contadores se calculan al final
+    with Session(engine) as db:
+        fleet_counters.reconcile(db)
+    
+    engine.dispose()
+
+async def legacy_stats(connection) -> dict:
+    """Versión anterior del endpoint: un COUNT(*) por indicador"""
+    async def count(model, *criteria):
+        return await connection.scalar(select(func.count(model.id)).where(*criteria))
+    
+    now = datetime.now()
+    return {
+        "total_vehiculos": await count(Vehicle, Vehicle.activo == True),
+        "vehiculos_disponibles": await count(Vehicle, Vehicle.activo == True, Vehicle.estado == VehicleStatus.DISPONIBLE),
+        "vehiculos_en_uso": await count(Vehicle, Vehicle.activo == True, Vehicle.estado == VehicleStatus.EN_USO),
+        "vehiculos_mantenimiento": await count(Vehicle, Vehicle.activo == True, Vehicle.estado == VehicleStatus.MANTENIMIENTO),
+        "total_conductores": await count(Driver, Driver.activo == True),
+        "conductores_disponibles": await count(
+            Driver, Driver.activo == True, Driver.estado == DriverStatus.DISPONIBLE,
+            Driver.fecha_vencimiento_licencia > date.today()
+        ),
+        "solicitudes_pendientes": await count(TransportRequest, TransportRequest.estado == RequestStatus.PENDIENTE),
+        "alertas_activas": await count(MaintenanceAlert, MaintenanceAlert.activa == True),
+        "mantenimientos_programados": await count(
+            Maintenance, Maintenance.estado == MaintenanceStatus.PROGRAMADO,
+            Maintenance.fecha_programada >= now, Maintenance.fecha_programada <= now + timedelta(days=30)
+        )
+    }
+
+async def single_query_stats(connection) -> dict:
+    """Una sola sentencia sobre las tablas de origen"""
+    return dict((await connection.execute(dashboard_stats_query())).mappings().one())
+
+async def counters_stats(connection) -> dict:
+    """Versión actual: contadores materializados + mantenimientos próximos"""
+    counters = (await connection.execute(fleet_counters.counters_query())).all()
+    return {
+        **fleet_counters.dashboard_counts(counters),
+        "mantenimientos_programados": await connection.scalar(upcoming_maintenance_query())
+    }
+
+async def measure(engine, stats_function, iterations: int) -> dict:
+    latencies = []
+    async with engine.connect() as connection:
+        # Una ejecución previa para calentar la caché de páginas de SQLite
+        result = await stats_function(connection)
+        
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await stats_function(connection)
+            latencies.append(time.perf_counter() - start)
+    
+    latencies.sort()
+    return {
+        "result": result,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] * 1000,
+        "max_ms": latencies[-1] * 1000
+    }
+
+async def run(db_path: Path, iterations: int) -> dict:
+    url = async_database_url(f"sqlite:///{db_path}")
+    engine = create_async_engine(url, **_engine_options(url, InstrumentedAsyncQueuePool))
+    event.listen(engine.sync_engine, "connect", set_sqlite_pragmas)
+    
+    try:
+        return {
+            "9 consultas COUNT(*)": await measure(engine, legacy_stats, iterations),
+            "1 consulta agregada": await measure(engine, single_query_stats, iterations),
+            "contadores": await measure(engine, counters_stats, iterations)
+        }
+    finally:
+        await engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehicles", type=int, default=10000, help="vehículos (y conductores) de prueba")
+    parser.add_argument("--requests", type=int, default=1000000, help="solicitudes de transporte de prueba")
+    parser.add_argument("--iterations", type=int, default=50, help="ejecuciones medidas por versión")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "bench.db"
+        
+        start = time.perf_counter()
+        seed(db_path, args.vehicles, args.requests)
+        print(f"{args.vehicles} vehículos, {args.requests} solicitudes cargados en {time.perf_counter() - start:.1f} s")
+        print()
+        
+        results = asyncio.run(run(db_path, args.iterations))
+    
+    print(f"{'versión':<24}{'p50 ms':>10}{'p95 ms':>10}{'máx ms':>10}")
+    for label, result in results.items():
+        print(f"{label:<24}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['max_ms']:>10.2f}")
+    
+    legacy, *others = (result["result"] for result in results.values())
+    print()
+    if all(other == legacy for other in others):
+        print("Resultados idénticos")
+    else:
+        print("⚠️ Resultados distintos:\n" + "\n".join(str(result) for result in (legacy, *others)))
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la importación masiva por formato de archivo.
+
+Genera las mismas solicitudes en Excel (.xlsx), CSV y Parquet y mide, para
+cada formato, la lectura del archivo (recorrer todas las filas con el lector
+del procesador) y la importación completa con process_excel_file (lectura,
+normalización, duplicados e inserción) sobre una base SQLite nueva. Por
+defecto usa 20.000 filas.
+
+Uso:
+    python benchmarks/import_formats.py [--rows 20000] [--iterations 3]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio backend al path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+import openpyxl
+import pandas as pd
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, set_sqlite_pragmas
+from app.database.models import TransportRequest
+from app.services.excel_processor import excel_processor
+
+COLUMNS = [
+    "nombre_solicitante", "fecha_viaje", "origen", "destino", "dependencia",
+    "email_contacto", "numero_pasajeros", "prioridad", "requiere_vehiculo_especial"
+]
+
+def build_rows(rows: int) -> pd.DataFrame:
+    """Solicitudes distintas entre sí, con fechas como texto (como en la plantilla)"""
+    start = datetime(2030, 1, 1, 8, 0)
+    priorities = ["baja", "media", "alta", "crítica"]
+    return pd.DataFrame({
+        "nombre_solicitante": [f"Solicitante {i}" for i in range(rows)],
+        "fecha_viaje": [(start + timedelta(minutes=30 * i)).strftime("%Y-%m-%d %H:%M") for i in range(rows)],
+        "origen": "Personería Municipal",
+        "destino": [f"Destino {i % 500}" for i in range(rows)],
+        "dependencia": [f"Dependencia {i % 20}" for i in range(rows)],
+        "email_contacto": [f"persona{i}@personeria.gov.co" for i in range(rows)],
+        "numero_pasajeros": [i % 6 + 1 for i in range(rows)],
+        "prioridad": [priorities[i % len(priorities)] for i in range(rows)],
+        "requiere_vehiculo_especial": ["Si" if i % 10 == 0 else "No" for i in range(rows)]
+    }, columns=COLUMNS)
+
+def write_files(frame: pd.DataFrame, directory: Path) -> dict:
+    """Escribe las filas en cada formato y retorna extensión -> ruta"""
+    xlsx_path = directory / "solicitudes.xlsx"
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet("Solicitudes")
+    sheet.append(COLUMNS)
+    for row in frame.itertuples(index=False, name=None):
+        sheet.append(row)
+    workbook.save(xlsx_path)
+    
+    csv_path = directory / "solicitudes.csv"
+    frame.to_csv(csv_path, index=False, encoding="utf-8-sig")
+    
+    parquet_path = directory / "solicitudes.parquet"
+    frame.to_parquet(parquet_path, index=False)
+    
+    return {".xlsx": xlsx_path, ".csv": csv_path, ".parquet": parquet_path}
+
+def read_all(path: Path) -> int:
+    """Recorre todas las filas del archivo sin normalizarlas"""
+    with excel_processor._open_rows(str(path)) as (columns, rows):
+        return sum(1 for _ in rows)
+
+def import_file(path: Path, directory: Path, run: int) -> tuple:
+    """Importa el archivo en una base nueva; retorna (segundos, filas guardadas)"""
+    engine = create_engine(f"sqlite:///{directory / f'bench-{path.suffix[1:]}-{run}.db'}")
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    Base.metadata.create_all(engine)
+    
+    try:
+        with sessionmaker(bind=engine)() as db:
+            start = time.perf_counter()
+            result = excel_processor.process_excel_file(str(path), db)
+            elapsed = time.perf_counter() - start
+            
+            assert result["success"] and not result["errors"], result["message"]
+            stored = [
+                (r.nombre_solicitante, r.fecha_viaje, r.destino, r.email_contacto, r.numero_pasajeros, r.prioridad)
+                for r in db.query(TransportRequest).order_by(TransportRequest.id)
+            ]
+        return elapsed, stored
+    finally:
+        engine.dispose()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000, help="filas del archivo de prueba")
+    parser.add_argument("--iterations", type=int, default=3, help="ejecuciones medidas por formato")
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        paths = write_files(build_rows(args.rows), directory)
+        print(f"{args.rows} filas por archivo")
+        print()
+        
+        results = {}
+        for extension, path in paths.items():
+            read_times = []
+            import_times = []
+            for run in range(args.iterations):
+                start = time.perf_counter()
+                rows_read = read_all(path)
+                read_times.append(time.perf_counter() - start)
+                assert rows_read == args.rows, (extension, rows_read)
+                
+                elapsed, stored = import_file(path, directory, run)
+                import_times.append(elapsed)
+            
+            results[extension] = {
+                "size_kb": path.stat().st_size / 1024,
+                "read_s": statistics.median(read_times),
+                "import_s": statistics.median(import_times),
+                "stored": stored
+            }
+    
+    xlsx_import = results[".xlsx"]["import_s"]
+    print(f"{'formato':<10}{'KB':>10}{'lectura s':>12}{'importación s':>16}{'vs xlsx':>10}")
+    for extension, result in results.items():
+        print(
+            f"{extension:<10}{result['size_kb']:>10.0f}{result['read_s']:>12.2f}"
+            f"{result['import_s']:>16.2f}{result['import_s'] / xlsx_import:>10.2f}"
+        )
+    
+    reference, *others = (result["stored"] for result in results.values())
+    print()
+    if all(other == reference for other in others):
+        print("Solicitudes idénticas en todos los formatos")
+    else:
+        print("⚠️ Los formatos guardaron solicitudes distintas")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
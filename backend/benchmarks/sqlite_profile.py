@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Benchmark del perfil de rendimiento de SQLite.
+
+Simula el caso de una oficina pequeña: un hilo escribe como lo hace
+check_maintenance_alerts (transacciones que actualizan vehículos e insertan
+alertas) mientras varios hilos leen como el dashboard. Se ejecuta primero con
+la configuración por defecto de SQLite (journal de rollback) y luego con el
+perfil de app.core.database (WAL, synchronous=NORMAL, mmap, cache, ...).
+
+Uso:
+    python benchmarks/sqlite_profile.py [--seconds 5] [--readers 4]
+"""
+
+import argparse
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio backend al path
+backend_path = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import create_engine, event, func, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, _engine_options, set_sqlite_pragmas, sqlite_pragmas
+from app.database.models import (
+    Vehicle, VehicleStatus, VehicleType, TransportRequest, RequestStatus,
+    MaintenanceAlert, AlertPriority
+)
+
+VEHICLES = 200
+REQUESTS = 5000
+
+def build_engine(db_path: Path, with_profile: bool):
+    """Engine con el mismo pool que la aplicación, con o sin el perfil de SQLite"""
+    url = f"sqlite:///{db_path}"
+    engine = create_engine(url, **_engine_options(url))
+    if with_profile:
+        event.listen(engine, "connect", set_sqlite_pragmas)
+    return engine
+
+def seed(SessionLocal):
+    """Carga vehículos y solicitudes de prueba"""
+    db = SessionLocal()
+    statuses = list(VehicleStatus)
+    db.add_all([
+        Vehicle(
+            placa=f"BEN{i:03d}",
+            marca="Toyota",
+            modelo="Hilux",
+            año=2020,
+            tipo_vehiculo=VehicleType.CAMIONETA,
+            kilometraje=i * 100,
+            estado=statuses[i % len(statuses)],
+            fecha_soat=date.today() + timedelta(days=i % 60)
+        )
+        for i in range(VEHICLES)
+    ])
+    now = datetime.now()
+    db.add_all([
+        TransportRequest(
+            numero_solicitud=f"BEN-{i}",
+            nombre_solicitante=f"Persona {i}",
+            fecha_solicitud=now,
+            fecha_viaje=now + timedelta(hours=i),
+            origen="A",
+            destino="B",
+            estado=RequestStatus.PENDIENTE if i % 3 else RequestStatus.COMPLETADO
+        )
+        for i in range(REQUESTS)
+    ])
+    db.commit()
+    db.close()
+
+def writer(SessionLocal, stop: threading.Event, stats: dict):
+    """Transacciones de escritura al estilo de check_maintenance_alerts"""
+    while not stop.is_set():
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(Vehicle)
+                .where(Vehicle.id % 4 == stats["writes"] % 4)
+                .values(kilometraje=Vehicle.kilometraje + 1)
+            )
+            db.add_all([
+                MaintenanceAlert(
+                    vehiculo_id=(stats["writes"] + i) % VEHICLES + 1,
+                    tipo_alerta="kilometraje",
+                    mensaje="Mantenimiento próximo",
+                    prioridad=AlertPriority.MEDIA
+                )
+                for i in range(20)
+            ])
+            db.flush()
+            time.sleep(0.01)  # trabajo dentro de la transacción (consultas, notificaciones)
+            db.commit()
+            stats["writes"] += 1
+        except OperationalError:
+            db.rollback()
+            stats["write_errors"] += 1
+        finally:
+            db.close()
+
+def reader(SessionLocal, stop: threading.Event, stats: dict, lock: threading.Lock):
+    """Consultas de conteo como las del dashboard"""
+    latencies = []
+    errors = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        db = SessionLocal()
+        try:
+            db.query(Vehicle.estado, func.count(Vehicle.id)).group_by(Vehicle.estado).all()
+            db.query(func.count(TransportRequest.id)).filter(
+                TransportRequest.estado == RequestStatus.PENDIENTE
+            ).scalar()
+            db.query(func.count(MaintenanceAlert.id)).filter(MaintenanceAlert.activa == True).scalar()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:
+            errors += 1
+        finally:
+            db.close()
+    
+    with lock:
+        stats["read_latencies"].extend(latencies)
+        stats["read_errors"] += errors
+
+def run(with_profile: bool, seconds: float, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = build_engine(Path(tmp) / "bench.db", with_profile)
+        Base.metadata.create_all(engine)
+        SessionLocal = sessionmaker(bind=engine)
+        seed(SessionLocal)
+        
+        stats = {"writes": 0, "write_errors": 0, "read_latencies": [], "read_errors": 0}
+        stop = threading.Event()
+        lock = threading.Lock()
+        threads = [threading.Thread(target=writer, args=(SessionLocal, stop, stats))]
+        threads += [
+            threading.Thread(target=reader, args=(SessionLocal, stop, stats, lock))
+            for _ in range(readers)
+        ]
+        
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        
+        engine.dispose()
+    
+    latencies = sorted(stats["read_latencies"])
+    return {
+        "reads_per_s": len(latencies) / seconds,
+        "writes_per_s": stats["writes"] / seconds,
+        "read_p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "read_p95_ms": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else 0.0,
+        "read_errors": stats["read_errors"],
+        "write_errors": stats["write_errors"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duración de cada escenario")
+    parser.add_argument("--readers", type=int, default=4, help="hilos de lectura concurrentes")
+    args = parser.parse_args()
+    
+    print(f"Perfil evaluado: {sqlite_pragmas()}")
+    print(f"{args.readers} lectores + 1 escritor, {args.seconds:.0f} s por escenario")
+    print()
+    print(f"{'escenario':<22}{'lecturas/s':>12}{'escrituras/s':>14}{'p50 ms':>9}{'p95 ms':>9}{'errores':>9}")
+    
+    for label, with_profile in (("SQLite por defecto", False), ("perfil de la app", True)):
+        result = run(with_profile, args.seconds, args.readers)
+        print(
+            f"{label:<22}{result['reads_per_s']:>12.1f}{result['writes_per_s']:>14.1f}"
+            f"{result['read_p50_ms']:>9.2f}{result['read_p95_ms']:>9.2f}"
+            f"{result['read_errors'] + result['write_errors']:>9}"
+        )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -13,12 +13,11 @@ from pathlib import Path
 backend_path = Path(__file__).parent
 sys.path.insert(0, str(backend_path))
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 # Import removed - using bcrypt directly
 
-from app.database.models import Base, User, UserRole
-from app.core.config import settings
+from app.core.database import SessionLocal
+from app.database.models import User, UserRole
+from app.database.migrations import upgrade_database
 
 # Contexto de encriptación para contraseñas - simplificado
 import bcrypt
@@ -31,17 +30,15 @@ def create_database():
     """Crea las tablas de la base de datos"""
     print("🔧 Creando base de datos y tablas...")
     
-    engine = create_engine(settings.DATABASE_URL)
-    Base.metadata.create_all(bind=engine)
+    # Las tablas e índices se crean con las migraciones de Alembic
+    upgrade_database()
     
     print("✅ Tablas creadas exitosamente")
-    return engine
 
-def create_admin_user(engine):
+def create_admin_user():
     """Crea un usuario administrador por defecto"""
     print("👤 Creando usuario administrador por defecto...")
     
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     db = SessionLocal()
     
     try:
@@ -73,7 +70,7 @@ def create_admin_user(engine):
         print(f"   - Contraseña: {admin_password}")
         print(f"   - Email: admin@personeria.gov.co")
         print(f"   ⚠️  IMPORTANTE: Cambiar la contraseña después del primer login")
-        
+    
     except Exception as e:
         print(f"❌ Error creando usuario administrador: {e}")
         db.rollback()
@@ -107,10 +104,10 @@ def main():
         create_directories()
         
         # Crear base de datos
-        engine = create_database()
+        create_database()
         
         # Crear usuario admin
-        create_admin_user(engine)
+        create_admin_user()
         
         print("=" * 60)
         print("✅ ¡Inicialización completada exitosamente!")
@@ -128,7 +125,7 @@ def main():
         print("   - Usuario: admin")
         print("   - Contraseña: admin123")
         print("   ⚠️  Cambiar credenciales en primer login")
-        
+    
     except Exception as e:
         print(f"❌ Error durante la inicialización: {e}")
         sys.exit(1)
@@ -0,0 +1,455 @@
+#!/usr/bin/env python3
+"""
+Test de número de consultas: cuenta las sentencias SQL que ejecuta cada
+endpoint y verifica que no superen un máximo fijo, independiente del número de
+filas (detecta consultas N+1 al recorrer relaciones)
+"""
+
+import sys
+import asyncio
+import json
+import shutil
+import tempfile
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+# Agregar el directorio backend al path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.core import database
+from app.core.config import settings
+from app.core.database import (
+    Base, get_db, get_read_db, get_async_db, get_async_read_db, reads_from_primary, PRIMARY_STICKY_COOKIE
+)
+from app.core.instrumentation import install_query_instrumentation, query_stats_middleware
+from app.core.cache import response_cache, cache_invalidation_middleware
+from app.core.events import event_bus
+from app.database.models import (
+    Vehicle, VehicleType, Driver, TransportRequest, RequestStatus, Assignment,
+    Maintenance, MaintenanceType, MaintenanceStatus, MaintenanceAlert, AlertPriority, User
+)
+from app.api.v1.api import api_router
+from app.api.v1.endpoints.auth import create_access_token
+from app.api.v1.endpoints.dashboard import dashboard_stats_query, dashboard_stream
+from app.services import fleet_counters
+
+# Filas por tabla: con consultas N+1 el conteo crecería con este número
+ROWS = 15
+
+# Máximo de sentencias por endpoint, sin contar la del usuario autenticado
+QUERY_BUDGET = {
+    ("GET", "/api/v1/assignments/?limit=50"): 1,
+    ("GET", "/api/v1/assignments/?limit=50&include_total=true"): 2,
+    ("GET", "/api/v1/assignments/active/"): 1,
+    ("GET", "/api/v1/assignments/1"): 1,
+    ("GET", "/api/v1/drivers/1/assignments"): 3,
+    ("GET", "/api/v1/dashboard/stats"): 2,
+    ("GET", "/api/v1/dashboard/fleet-status"): 1,
+    ("GET", "/api/v1/dashboard/vehicle-availability"): 3,
+    (
+        "GET",
+        f"/api/v1/dashboard/vehicle-availability?fecha={date.today()}&fecha_fin={date.today() + timedelta(days=6)}"
+    ): 3,
+    ("GET", "/api/v1/dashboard/recent-activity?limit=45"): 3,
+    ("GET", "/api/v1/dashboard/upcoming-events"): 3,
+    ("GET", "/api/v1/dashboard/alerts"): 6,
+    ("GET", "/api/v1/dashboard/performance-metrics"): 7,
+    ("GET", "/api/v1/alerts/"): 2,
+    ("POST", "/api/v1/alerts/check-expired-documents"): 7,
+    ("POST", "/api/v1/alerts/check-maintenance-due"): 5,
+}
+
+def seed(session):
+    """Flota de prueba: cada vehículo con conductor, solicitud, asignación,
+    mantenimiento y alerta"""
+    now = datetime.now()
+    session.add(User(username="admin", email="admin@test.co", hashed_password="x", rol="admin", activo=True))
+    
+    for i in range(ROWS):
+        vehicle = Vehicle(
+            placa=f"TST{i:03d}", marca="Marca", modelo="Modelo", año=2020,
+            tipo_vehiculo=VehicleType.SEDAN, kilometraje=20000 + i,
+            fecha_soat=date.today() + timedelta(days=5),
+            fecha_tecnicomecanica=date.today() + timedelta(days=10)
+        )
+        driver = Driver(
+            cedula=f"C{i}", nombre_completo=f"Conductor {i}", numero_licencia=f"L{i}",
+            categoria_licencia="B1", fecha_vencimiento_licencia=date.today() + timedelta(days=20)
+        )
+        request = TransportRequest(
+            numero_solicitud=f"S{i}", nombre_solicitante="Solicitante", fecha_solicitud=now,
+            fecha_viaje=now + timedelta(hours=1), origen="Origen", destino="Destino",
+            estado=RequestStatus.ASIGNADO, prioridad=AlertPriority.MEDIA
+        )
+        session.add_all([vehicle, driver, request])
+        session.flush()
+        
+        session.add_all([
+            Assignment(solicitud_id=request.id, vehiculo_id=vehicle.id, conductor_id=driver.id),
+            Maintenance(
+                vehiculo_id=vehicle.id, tipo_mantenimiento=MaintenanceType.PREVENTIVO,
+                estado=MaintenanceStatus.PROGRAMADO, fecha_programada=now + timedelta(days=2),
+                descripcion="Cambio de aceite"
+            ),
+            Maintenance(
+                vehiculo_id=vehicle.id, tipo_mantenimiento=MaintenanceType.PREVENTIVO,
+                estado=MaintenanceStatus.COMPLETADO, fecha_programada=now - timedelta(days=90),
+                fecha_finalizacion=now - timedelta(days=90), kilometraje_actual=1000,
+                descripcion="Revisión general"
+            ),
+            MaintenanceAlert(
+                vehiculo_id=vehicle.id, tipo_alerta="revision", mensaje="Alerta de prueba",
+                prioridad=AlertPriority.ALTA, activa=True
+            )
+        ])
+    
+    session.commit()
+
+@contextmanager
+def counting_client(replica: bool = False):
+    """Cliente de la API sobre una base de datos temporal; entrega también la
+    lista donde se registran las sentencias ejecutadas
+    
+    Con `replica` las lecturas sin la cookie de read-your-writes van a una
+    copia de la base de datos tomada después de cargar los datos de prueba
+    (una réplica que no recibe las escrituras posteriores).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "query_counts.db"
+        engine = create_engine(f"sqlite:///{db_path}")
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        statements = []
+        
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        
+        for bind in (engine, async_engine.sync_engine):
+            event.listen(bind, "before_cursor_execute", record)
+            install_query_instrumentation(bind)
+        
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        with Session() as session:
+            seed(session)
+        AsyncSession_ = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+        
+        def override_db():
+            with Session() as db:
+                yield db
+        
+        async def override_async_db():
+            async with AsyncSession_() as db:
+                yield db
+        
+        read_db, async_read_db = override_db, override_async_db
+        if replica:
+            replica_path = Path(tmp) / "replica.db"
+            shutil.copyfile(db_path, replica_path)
+            replica_engine = create_engine(f"sqlite:///{replica_path}")
+            async_replica_engine = create_async_engine(f"sqlite+aiosqlite:///{replica_path}")
+            ReplicaSession = sessionmaker(bind=replica_engine)
+            AsyncReplicaSession = async_sessionmaker(async_replica_engine, class_=AsyncSession, expire_on_commit=False)
+            
+            def read_db(request: Request):
+                with (Session if reads_from_primary(request) else ReplicaSession)() as db:
+                    yield db
+            
+            async def async_read_db(request: Request):
+                async with (AsyncSession_ if reads_from_primary(request) else AsyncReplicaSession)() as db:
+                    yield db
+        
+        app = FastAPI()
+        app.include_router(api_router, prefix="/api/v1")
+        app.middleware("http")(query_stats_middleware)
+        app.middleware("http")(cache_invalidation_middleware)
+        app.dependency_overrides.update({
+            get_db: override_db,
+            get_read_db: read_db,
+            get_async_db: override_async_db,
+            get_async_read_db: async_read_db
+        })
+        
+        app.state.session_factory = Session
+        dashboard_stream.session_factory = AsyncSession_
+        # Cada cliente parte de una caché vacía (la base de datos es otra)
+        asyncio.run(response_cache.clear())
+        
+        try:
+            with TestClient(app) as client:
+                yield client, statements
+        finally:
+            dashboard_stream.session_factory = None
+            asyncio.run(async_engine.dispose())
+            engine.dispose()
+            if replica:
+                asyncio.run(async_replica_engine.dispose())
+                replica_engine.dispose()
+
+def test_query_counts_within_budget():
+    """Ningún endpoint debe ejecutar más sentencias que su presupuesto"""
+    print("🔢 Contando consultas por endpoint...")
+    
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    failures = []
+    
+    with counting_client() as (client, statements):
+        for (method, url), budget in QUERY_BUDGET.items():
+            statements.clear()
+            response = client.request(method, url, headers=headers)
+            
+            # La consulta del usuario autenticado no cuenta para el endpoint
+            count = len([s for s in statements if "FROM users" not in s])
+            
+            if response.status_code != 200:
+                failures.append(f"{method} {url}: HTTP {response.status_code} {response.text[:200]}")
+            elif count > budget:
+                failures.append(f"{method} {url}: {count} consultas (máximo {budget})")
+            else:
+                print(f"  ✓ {method} {url}: {count} consultas (máximo {budget})")
+    
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    
+    assert not failures, "Endpoints sobre el presupuesto de consultas:\n" + "\n".join(failures)
+
+def test_query_stats_headers():
+    """Con DEBUG la respuesta informa las consultas ejecutadas, tanto en
+    endpoints síncronos (threadpool) como asíncronos"""
+    print("⏱️ Verificando cabeceras de instrumentación...")
+    
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    debug = settings.DEBUG
+    settings.DEBUG = True
+    
+    try:
+        with counting_client() as (client, statements):
+            for url in ("/api/v1/assignments/?limit=50", "/api/v1/alerts/"):
+                statements.clear()
+                response = client.get(url, headers=headers)
+                
+                assert response.headers["X-DB-Query-Count"] == str(len(statements)), url
+                assert float(response.headers["X-DB-Time-ms"]) > 0, url
+                assert f'desc="{len(statements)} consultas"' in response.headers["Server-Timing"], url
+                print(f"  ✓ {url}: {response.headers['Server-Timing'][:80]}...")
+    finally:
+        settings.DEBUG = debug
+
+def test_fleet_counters_follow_writes():
+    """Los contadores materializados del dashboard coinciden con las tablas de
+    origen después de escrituras por la API (ORM e INSERT en lote)"""
+    print("🧮 Verificando contadores del dashboard...")
+    
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    now = datetime.now()
+    
+    with counting_client() as (client, statements):
+        writes = [
+            ("POST", "/api/v1/vehicles/", {
+                "placa": "NEW001", "marca": "Marca", "modelo": "Modelo", "año": 2022, "tipo_vehiculo": "suv"
+            }),
+            ("PUT", "/api/v1/vehicles/2", {"estado": "mantenimiento"}),
+            ("DELETE", "/api/v1/vehicles/3", None),
+            ("POST", "/api/v1/requests/", {
+                "nombre_solicitante": "Solicitante", "fecha_viaje": (now + timedelta(days=1)).isoformat(),
+                "origen": "Origen", "destino": "Destino"
+            }),
+            ("POST", "/api/v1/assignments/1/start-trip", None),
+            ("DELETE", "/api/v1/drivers/4", None),
+            ("POST", "/api/v1/alerts/check-expired-documents", None),
+        ]
+        
+        for method, url, body in writes:
+            response = client.request(method, url, headers=headers, json=body)
+            assert response.status_code < 300, f"{method} {url}: HTTP {response.status_code} {response.text[:200]}"
+        
+        stats = client.get("/api/v1/dashboard/stats", headers=headers).json()
+        fleet_status = client.get("/api/v1/dashboard/fleet-status", headers=headers).json()
+        
+        with client.app.state.session_factory() as db:
+            expected = dict(db.execute(dashboard_stats_query()).mappings().one())
+            drift = fleet_counters.reconcile(db)
+        
+        assert stats == expected, f"{stats} != {expected}"
+        assert drift == {}, f"Contadores desfasados: {drift}"
+        assert {"estado": "en_curso", "count": 1} in fleet_status["request_status"], fleet_status
+        print(f"  ✓ {stats}")
+
+def test_dashboard_cache_invalidated_by_writes():
+    """Una lectura repetida del dashboard sale de la caché sin consultas, y una
+    escritura en la API la invalida antes de responder"""
+    print("🗄️ Verificando caché del dashboard...")
+    
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    
+    with counting_client() as (client, statements):
+        first = client.get("/api/v1/dashboard/stats", headers=headers).json()
+        
+        statements.clear()
+        assert client.get("/api/v1/dashboard/stats", headers=headers).json() == first
+        assert not [s for s in statements if "FROM users" not in s], statements
+        
+        response = client.put("/api/v1/vehicles/1", headers=headers, json={"estado": "mantenimiento"})
+        assert response.status_code == 200, response.text
+        
+        after_write = client.get("/api/v1/dashboard/stats", headers=headers).json()
+        assert after_write["vehiculos_mantenimiento"] == first["vehiculos_mantenimiento"] + 1, after_write
+        
+        # Otros parámetros son otra entrada de la caché
+        client.get("/api/v1/dashboard/recent-activity?limit=5", headers=headers)
+        client.get("/api/v1/dashboard/recent-activity?limit=6", headers=headers)
+        
+        metrics = response_cache.metrics()["endpoints"]
+        assert metrics["dashboard:stats"]["hits"] == 1 and metrics["dashboard:stats"]["misses"] == 2, metrics
+        assert metrics["dashboard:recent-activity"]["misses"] == 2, metrics
+        print(f"  ✓ {metrics}")
+
+def test_dashboard_cache_read_your_writes():
+    """Un cliente que acaba de escribir lee del primario y no recibe respuestas
+    cacheadas desde la réplica, aunque otro cliente las haya calculado después
+    de su escritura"""
+    print("📌 Verificando caché con lecturas fijadas al primario...")
+    
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    
+    with counting_client(replica=True) as (client, statements):
+        before = client.get("/api/v1/dashboard/stats", headers=headers).json()
+        
+        client.cookies.set(PRIMARY_STICKY_COOKIE, "1")
+        response = client.put("/api/v1/vehicles/1", headers=headers, json={"estado": "mantenimiento"})
+        assert response.status_code == 200, response.text
+        
+        # Otro cliente (sin la cookie) llena la caché desde la réplica atrasada
+        client.cookies.clear()
+        from_replica = client.get("/api/v1/dashboard/stats", headers=headers).json()
+        assert from_replica == before, from_replica
+        
+        client.cookies.set(PRIMARY_STICKY_COOKIE, "1")
+        for attempt in range(2):
+            sticky = client.get("/api/v1/dashboard/stats", headers=headers).json()
+            assert sticky["vehiculos_mantenimiento"] == before["vehiculos_mantenimiento"] + 1, (attempt, sticky)
+        
+        metrics = response_cache.metrics()["endpoints"]["dashboard:stats"]
+        assert metrics["hits"] == 1 and metrics["misses"] == 3, metrics
+        print(f"  ✓ réplica {from_replica['vehiculos_mantenimiento']}, primario {sticky['vehiculos_mantenimiento']}")
+
+class SSEStream:
+    """Conexión a un endpoint de Server-Sent Events directamente sobre ASGI
+    (TestClient espera a que termine la respuesta, y un stream no termina)"""
+    
+    def __init__(self, app, path: str):
+        self.app = app
+        self.path = path
+        self.chunks = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self.request_sent = False
+    
+    async def __aenter__(self):
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": self.path, "raw_path": self.path.encode(), "query_string": b"",
+            "root_path": "", "headers": [(b"host", b"testserver")], "client": ("testclient", 50000),
+            "server": ("testserver", 80)
+        }
+        self.task = asyncio.create_task(self.app(scope, self._receive, self._send))
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 5)
+    
+    async def next_message(self) -> dict:
+        """Siguiente mensaje SSE como {"event": ..., "data": ...}"""
+        message = {}
+        for line in (await asyncio.wait_for(self.chunks.get(), 5)).splitlines():
+            field, _, value = line.partition(": ")
+            message[field] = json.loads(value) if field == "data" else value
+        return message
+    
+    async def _receive(self):
+        if not self.request_sent:
+            self.request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+    
+    async def _send(self, message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            await self.chunks.put(message["body"].decode())
+
+def test_dashboard_stream_single_computation():
+    """Los clientes de /dashboard/stream reciben las actualizaciones de las
+    escrituras y las estadísticas se recalculan una sola vez para todos"""
+    print("📡 Verificando dashboard en vivo...")
+    
+    headers = {"Authorization": f"Bearer {create_access_token({'sub': 'admin'})}"}
+    batch_seconds = settings.DASHBOARD_STREAM_BATCH_SECONDS
+    settings.DASHBOARD_STREAM_BATCH_SECONDS = 0.05
+    
+    async def scenario(app, statements):
+        transport = httpx.ASGITransport(app=app)
+        async with SSEStream(app, "/api/v1/dashboard/stream") as first, \
+                SSEStream(app, "/api/v1/dashboard/stream") as second, \
+                httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+            snapshots = [await first.next_message(), await second.next_message()]
+            assert all(message["event"] == "snapshot" for message in snapshots), snapshots
+            
+            statements.clear()
+            response = await client.put("/api/v1/vehicles/1", headers=headers, json={"estado": "mantenimiento"})
+            assert response.status_code == 200, response.text
+            
+            updates = [await first.next_message(), await second.next_message()]
+            assert updates[0] == updates[1], updates
+            assert [e["type"] for e in updates[0]["data"]["events"]] == ["vehicle_status_changed"], updates[0]
+            assert updates[0]["data"]["changes"]["vehiculos_mantenimiento"] == 1, updates[0]
+            
+            # Una sola lectura de los contadores para los dos clientes
+            reads = [s for s in statements if s.lstrip().startswith("SELECT") and "FROM fleet_counters" in s]
+            assert len(reads) == 1, reads
+            print(f"  ✓ {updates[0]['data']}")
+    
+    try:
+        with counting_client() as (client, statements):
+            asyncio.run(scenario(client.app, statements))
+        assert event_bus.subscriber_count() == 0
+    finally:
+        settings.DASHBOARD_STREAM_BATCH_SECONDS = batch_seconds
+
+def test_dashboard_stream_requires_async():
+    """Sin acceso asíncrono a la base de datos (DB_ASYNC_ENABLED=false)
+    /dashboard/stream responde 503 en lugar de fallar al calcular"""
+    print("🔌 Verificando dashboard en vivo sin acceso asíncrono...")
+    
+    async_session_local = database.AsyncSessionLocal
+    
+    with counting_client() as (client, statements):
+        dashboard_stream.session_factory = None
+        database.AsyncSessionLocal = None
+        try:
+            response = client.get("/api/v1/dashboard/stream")
+        finally:
+            database.AsyncSessionLocal = async_session_local
+        
+        assert response.status_code == 503, response.text
+        assert event_bus.subscriber_count() == 0
+        print(f"  ✓ {response.json()['detail']}")
+
+if __name__ == "__main__":
+    try:
+        test_query_counts_within_budget()
+        test_query_stats_headers()
+        test_fleet_counters_follow_writes()
+        test_dashboard_cache_invalidated_by_writes()
+        test_dashboard_cache_read_your_writes()
+        test_dashboard_stream_single_computation()
+        test_dashboard_stream_requires_async()
+        print("✅ Todos los endpoints están dentro del presupuesto de consultas")
+    except AssertionError:
+        sys.exit(1)
\ No newline at end of file
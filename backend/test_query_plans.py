@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test de planes de ejecución: verifica con EXPLAIN QUERY PLAN que las consultas
+más frecuentes de la API usan índices y no recorren tablas completas
+"""
+
+import sys
+import re
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+
+# Agregar el directorio backend al path
+backend_path = Path(__file__).parent
+sys.path.insert(0, str(backend_path))
+
+from sqlalchemy import create_engine, func, select
+from app.core.database import Base
+from app.core.pagination import encode_cursor, keyset_paginate
+from app.api.v1.endpoints.dashboard import vehicle_trips_query, vehicle_maintenance_query
+from app.database.models import (
+    Vehicle, VehicleStatus, Driver, DriverStatus, Maintenance, MaintenanceStatus,
+    TransportRequest, RequestStatus, Assignment, MaintenanceAlert
+)
+
+# Recorrido completo de una tabla, sin índice: "SCAN vehicles"
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+def keyset_page(model, sort_column):
+    """Página siguiente de un listado paginado por cursor (orden descendente)"""
+    position = SimpleNamespace(id=10, **{sort_column.key: datetime(2026, 1, 1)})
+    cursor = encode_cursor(position, [sort_column])
+    return keyset_paginate(select(model), model, 20, cursor, sort_columns=[sort_column], descending=True)
+
+def hot_queries():
+    """Consultas de los endpoints y del servicio de notificaciones, por nombre"""
+    now = datetime.now()
+    return {
+        "vehículos activos por estado (dashboard)": select(func.count(Vehicle.id)).where(
+            Vehicle.activo == True,
+            Vehicle.estado == VehicleStatus.DISPONIBLE
+        ),
+        "conductores disponibles (dashboard)": select(func.count(Driver.id)).where(
+            Driver.activo == True,
+            Driver.estado == DriverStatus.DISPONIBLE,
+            Driver.fecha_vencimiento_licencia > date.today()
+        ),
+        "solicitudes por estado y fecha de viaje": select(TransportRequest).where(
+            TransportRequest.estado == RequestStatus.PENDIENTE,
+            TransportRequest.fecha_viaje >= now,
+            TransportRequest.fecha_viaje <= now + timedelta(days=7)
+        ),
+        "asignaciones de un vehículo": select(Assignment).where(
+            Assignment.vehiculo_id == 1
+        ).order_by(Assignment.fecha_asignacion.desc()),
+        "asignaciones de un conductor": select(Assignment).where(
+            Assignment.conductor_id == 1
+        ).order_by(Assignment.fecha_asignacion.desc()),
+        "asignación de una solicitud": select(Assignment).where(Assignment.solicitud_id == 1),
+        "mantenimientos de un vehículo por estado": select(Maintenance).where(
+            Maintenance.vehiculo_id == 1,
+            Maintenance.estado == MaintenanceStatus.PROGRAMADO
+        ).order_by(Maintenance.fecha_programada),
+        "mantenimientos programados próximos (dashboard)": select(func.count(Maintenance.id)).where(
+            Maintenance.estado == MaintenanceStatus.PROGRAMADO,
+            Maintenance.fecha_programada >= now,
+            Maintenance.fecha_programada <= now + timedelta(days=30)
+        ),
+        "alerta existente de un vehículo (notificaciones)": select(MaintenanceAlert).where(
+            MaintenanceAlert.vehiculo_id == 1,
+            MaintenanceAlert.tipo_alerta == "mantenimiento_km",
+            MaintenanceAlert.activa == True
+        ),
+        "alertas activas recientes": select(MaintenanceAlert).where(
+            MaintenanceAlert.activa == True
+        ).order_by(MaintenanceAlert.fecha_creacion.desc()).limit(50),
+        "conteo de alertas activas (dashboard)": select(func.count(MaintenanceAlert.id)).where(
+            MaintenanceAlert.activa == True
+        ),
+        "viajes de la flota en una semana (disponibilidad)": vehicle_trips_query(
+            date.today(), date.today() + timedelta(days=6)
+        ),
+        "mantenimientos de la flota en una semana (disponibilidad)": vehicle_maintenance_query(
+            date.today(), date.today() + timedelta(days=6)
+        ),
+        "listado de solicitudes por cursor": keyset_page(TransportRequest, TransportRequest.created_at),
+        "listado de asignaciones por cursor": keyset_page(Assignment, Assignment.fecha_asignacion),
+        "listado de mantenimientos por cursor": keyset_page(Maintenance, Maintenance.fecha_programada)
+    }
+
+def query_plan(connection, statement):
+    """Detalle de EXPLAIN QUERY PLAN para una sentencia"""
+    sql = str(statement.compile(connection, compile_kwargs={"literal_binds": True}))
+    return [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+
+def test_hot_queries_use_indexes():
+    """Ninguna consulta frecuente debe recorrer una tabla completa"""
+    print("🔎 Verificando planes de ejecución...")
+    
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    
+    failures = []
+    with engine.connect() as connection:
+        for name, statement in hot_queries().items():
+            plan = query_plan(connection, statement)
+            scans = [step for step in plan if FULL_SCAN.match(step)]
+            if scans:
+                failures.append(f"{name}: {'; '.join(plan)}")
+            else:
+                print(f"  ✓ {name}: {'; '.join(plan)}")
+    
+    for failure in failures:
+        print(f"  ❌ {failure}")
+    
+    assert not failures, "Consultas sin índice:\n" + "\n".join(failures)
+
+if __name__ == "__main__":
+    try:
+        test_hot_queries_use_indexes()
+        print("✅ Todas las consultas frecuentes usan índices")
+    except AssertionError:
+        sys.exit(1)
\ No newline at end of file